@@ -0,0 +1,3 @@
+"""
+Benchmarks for Mezmur Telegram Bot
+"""
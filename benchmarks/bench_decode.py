@@ -0,0 +1,111 @@
+"""
+Benchmark decoding of an 80-item search_prefix response (the inline query size)
+
+Compares the previous per-method conversion into plain dataclasses with the
+shared decode path into slotted models, with each available JSON backend.
+
+Usage: python -m benchmarks.bench_decode [--items 80] [--rounds 2000]
+"""
+import argparse
+import json
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.stub_api import build_catalog
+from utils.api_client import SearchResult, decode_page
+
+
+@dataclass
+class LegacySearchResult:
+    title: str
+    pageid: int
+    snippet: Optional[str] = None
+    size: Optional[int] = None
+    wordcount: Optional[int] = None
+
+
+@dataclass
+class LegacyPaginatedResponse:
+    data: List[Any]
+    total: int
+    page: int
+    limit: int
+    has_next: bool
+    has_prev: bool
+    next_token: Optional[str] = None
+
+
+def legacy_decode(body: bytes) -> LegacyPaginatedResponse:
+    """The conversion code previously repeated in each client method"""
+    data = json.loads(body)
+    search_results = [
+        LegacySearchResult(
+            title=item["title"],
+            pageid=item["pageid"],
+            snippet=item.get("snippet"),
+            size=item.get("size"),
+            wordcount=item.get("wordcount")
+        )
+        for item in data["data"]
+    ]
+    return LegacyPaginatedResponse(
+        data=search_results,
+        total=data["total"],
+        page=data["page"],
+        limit=data["limit"],
+        has_next=data["has_next"],
+        has_prev=data["has_prev"],
+        next_token=data.get("next_token")
+    )
+
+
+def make_body(items: int) -> bytes:
+    titles = [t for t in build_catalog(artists=10) if t.count("/") == 2][:items]
+    return json.dumps({
+        "data": [
+            {"title": t, "pageid": i, "snippet": None, "size": 1000 + i, "wordcount": 150}
+            for i, t in enumerate(titles)
+        ],
+        "total": len(titles), "page": 1, "limit": items,
+        "has_next": False, "has_prev": False, "next_token": None,
+    }).encode()
+
+
+def retained_bytes(decode: Callable[[bytes], Any], body: bytes) -> int:
+    """Bytes still allocated after decoding, i.e. what a cached response costs"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = decode(body)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=80)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    
+    body = make_body(args.items)
+    decoders: Dict[str, Callable[[bytes], Any]] = {
+        "legacy dataclass + json": legacy_decode,
+        "slots + json": lambda b: decode_page(json.loads(b), SearchResult.from_dict),
+    }
+    try:
+        import orjson
+        decoders["slots + orjson"] = lambda b: decode_page(orjson.loads(b), SearchResult.from_dict)
+    except ImportError:
+        print("orjson not installed; skipping the orjson backend")
+    
+    print(f"{args.items}-item search_prefix body: {len(body)} bytes")
+    for name, decode in decoders.items():
+        seconds = min(timeit.repeat(lambda: decode(body), number=args.rounds, repeat=3)) / args.rounds
+        print(f"{name:<26} {seconds * 1e6:8.1f} us/decode   {retained_bytes(decode, body):>8} bytes retained")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark formatting an 80-result search page (the inline query size)
+
+Renders the same results the way a search reply is built: the categorized
+result text, the action keyboard labels and the inline song filter with its
+first page of names. Compares the previous code, which counted and split
+each title again in every step, with reading the kind and names parsed from
+the title on first use; that parse is paid once per result (on the first
+render, not at decode) and is reported separately.
+
+Usage: python -m benchmarks.bench_format [--items 80] [--rounds 2000]
+"""
+import argparse
+import random
+import timeit
+from typing import Dict, List, Tuple
+
+from benchmarks.stub_api import build_catalog
+from utils.api_client import MezmurAPIClient, SearchResult, parse_title
+
+
+def legacy_categorize(results: List[SearchResult]) -> Dict[str, List[SearchResult]]:
+    categorized = {"artists": [], "albums": [], "songs": []}
+    for result in results:
+        slash_count = result.title.count("/")
+        if slash_count == 0:
+            categorized["artists"].append(result)
+        elif slash_count == 1:
+            categorized["albums"].append(result)
+        else:
+            categorized["songs"].append(result)
+    return categorized
+
+
+def legacy_format(results: List[SearchResult]) -> str:
+    formatted = []
+    categorized = legacy_categorize(results)
+    if categorized["artists"]:
+        formatted.append("👤 **ARTISTS**")
+        for artist in categorized["artists"]:
+            formatted.append(f"• {artist.title}")
+        formatted.append("")
+    if categorized["albums"]:
+        formatted.append("💿 **ALBUMS**")
+        for album in categorized["albums"]:
+            album_name = album.title.split("/")[-1] if "/" in album.title else album.title
+            formatted.append(f"• {album_name}")
+        formatted.append("")
+    if categorized["songs"]:
+        formatted.append("🎵 **SONGS**")
+        for song in categorized["songs"]:
+            song_name = song.title.split("/")[-1] if "/" in song.title else song.title
+            formatted.append(f"• {song_name}")
+    return "\n".join(formatted)
+
+
+def legacy_buttons(results: List[SearchResult]) -> List[Tuple[str, str]]:
+    buttons = []
+    for result in results[:5]:
+        slash_count = result.title.count("/")
+        if slash_count == 0:
+            buttons.append((f"👤 {result.title}", f"artist:{result.title}"))
+        elif slash_count == 1:
+            buttons.append((f"💿 {result.title.split('/')[-1]}", f"album:{result.title}"))
+        else:
+            buttons.append((f"🎵 {result.title.split('/')[-1]}", f"lyrics:{result.title}"))
+    return buttons
+
+
+def legacy_inline(results: List[SearchResult]) -> List[Tuple[str, str]]:
+    songs = [result for result in results if result.title.count("/") > 1]
+    return [(song.title.split("/")[-1], song.title.split("/")[0]) for song in songs[:5]]
+
+
+def buttons(results: List[SearchResult]) -> List[Tuple[str, str]]:
+    labels = {"artist": "👤", "album": "💿", "song": "🎵"}
+    actions = {"artist": "artist", "album": "album", "song": "lyrics"}
+    return [(f"{labels[r.kind]} {r.name}", f"{actions[r.kind]}:{r.title}") for r in results[:5]]
+
+
+def inline(results: List[SearchResult]) -> List[Tuple[str, str]]:
+    songs = [result for result in results if result.kind == "song"]
+    return [(song.name, song.artist) for song in songs[:5]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=80)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    
+    rng = random.Random(8)
+    titles = rng.sample(build_catalog(artists=10), args.items)
+    results = [SearchResult(title, i) for i, title in enumerate(titles)]
+    client = MezmurAPIClient("http://test.api")
+    assert legacy_format(results) == client.format_search_results(results, max_results=args.items)
+    assert legacy_inline(results) == inline(results)
+    
+    render = {
+        "previous (count/split per step)": lambda: (legacy_format(results), legacy_buttons(results), legacy_inline(results)),
+        "parsed fields": lambda: (
+            client.format_search_results(results, max_results=args.items), buttons(results), inline(results)
+        ),
+        "  parse on first use": lambda: [parse_title(title) for title in titles],
+    }
+    print(f"{args.items} results ({sum(r.kind == 'song' for r in results)} songs)")
+    for name, run in render.items():
+        seconds = min(timeit.repeat(run, number=args.rounds, repeat=5)) / args.rounds
+        print(f"{name:<32} {seconds * 1e6:8.1f} us/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark fuzzy name resolution over catalog-sized name lists
+
+Builds one NameResolver per kind (artists, albums, songs) from a synthetic
+catalog of transliterated Amharic-like names (consonants times vowel
+orders, as names are actually spelled, rather than the prefix benchmark's
+small syllable set, which has too few distinct trigrams to be realistic
+here) and resolves misspelled names: a letter dropped, doubled, swapped
+with its neighbour or replaced, or the words run together. Reports build
+time, per-query latency and how often the intended name ranks first.
+
+Usage: python -m benchmarks.bench_fuzzy [--titles 100000] [--queries 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.bench_prefix_index import build_titles, percentile
+from utils.fuzzy import NameResolver
+
+
+CONSONANTS = ["h", "l", "m", "r", "s", "sh", "q", "b", "t", "ch", "n", "ny", "k", "w", "z", "zh", "y", "d", "j", "g", "ts", "f", "p"]
+SYLLABLES = [consonant + vowel for consonant in CONSONANTS for vowel in ("a", "e", "i", "o", "u", "ie")]
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """One typing mistake of the kind users make"""
+    i = rng.randrange(1, max(2, len(name) - 1))
+    edits: List[Callable[[str], str]] = [
+        lambda s: s[:i] + s[i + 1:],
+        lambda s: s[:i] + s[i] + s[i:],
+        lambda s: s[:i - 1] + s[i] + s[i - 1] + s[i + 1:],
+        lambda s: s[:i] + rng.choice("aeiouktsmn") + s[i + 1:],
+        lambda s: s.replace(" ", ""),
+    ]
+    return rng.choice(edits)(name).lower()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    
+    rng = random.Random(5)
+    titles = build_titles(args.titles, syllables=SYLLABLES)
+    kinds: Dict[str, List[Tuple[str, int]]] = {"artist": [], "album": [], "song": []}
+    for title, pageid in titles:
+        kinds[("artist", "album", "song")[min(title.count("/"), 2)]].append((title, pageid))
+    
+    print(f"titles: {len(titles)}, queries per kind: {args.queries}")
+    for kind, names in kinds.items():
+        started = time.perf_counter()
+        resolver = NameResolver(names)
+        build_seconds = time.perf_counter() - started
+        
+        samples, top1 = [], 0
+        for title, pageid in rng.choices(names, k=args.queries):
+            name = title.rsplit("/", 1)[-1]
+            query = misspell(name, rng)
+            started = time.perf_counter()
+            matches = resolver.resolve(query)
+            samples.append(time.perf_counter() - started)
+            # Songs and albums often share names across artists; count any title with the intended name
+            top1 += bool(matches) and matches[0].title.rsplit("/", 1)[-1] == name
+        
+        print(
+            f"{kind:<7} {len(names):>6} names, build {build_seconds:5.2f}s   "
+            f"p50 {percentile(samples, 0.5) * 1e6:6.0f} us   p99 {percentile(samples, 0.99) * 1e6:6.0f} us   "
+            f"mean {statistics.fmean(samples) * 1e6:6.0f} us   top-1 {top1 / args.queries:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
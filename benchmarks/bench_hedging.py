@@ -0,0 +1,87 @@
+"""
+Benchmark hedged lyrics requests against a backend with a slow tail
+
+Serves /lyrics from an in-process mock transport where most responses take
+a few tens of milliseconds and a small share stall for much longer, then
+fetches distinct songs with and without hedging. Reports caller-visible
+p50/p99 latency, how many duplicate requests were sent and how many of
+them won.
+
+Usage: python -m benchmarks.bench_hedging [--requests 2000] [--concurrency 20] [--slow-share 0.02]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List, Optional
+
+import httpx
+
+from benchmarks.bench_prefix_index import percentile
+from utils.api_client import MezmurAPIClient
+from utils.resilience import HedgePolicy
+
+
+def make_client(rng: random.Random, slow_share: float, slow_seconds: float,
+                hedge_policy: Optional[HedgePolicy]) -> MezmurAPIClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        delay = slow_seconds if rng.random() < slow_share else rng.uniform(0.01, 0.04)
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"title": request.url.path.rsplit("/", 1)[-1], "lyrics": "..."})
+    
+    client = MezmurAPIClient("http://bench.api", enable_cache=False, hedge_policy=hedge_policy)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+async def run(client: MezmurAPIClient, requests: int, concurrency: int) -> List[float]:
+    samples: List[float] = []
+    limiter = asyncio.Semaphore(concurrency)
+    
+    async def fetch(i: int):
+        async with limiter:
+            started = time.perf_counter()
+            await client.get_lyrics(f"Artist/Album/Song {i}")
+            samples.append(time.perf_counter() - started)
+    
+    await asyncio.gather(*(fetch(i) for i in range(requests)))
+    return samples
+
+
+async def main_async(args: argparse.Namespace):
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}, "
+          f"{args.slow_share:.0%} of responses take {args.slow_seconds}s")
+    for name, policy in [
+        ("no hedging", None),
+        (f"hedge at p{args.percentile:g}", HedgePolicy(percentile=args.percentile, budget=args.budget)),
+    ]:
+        client = make_client(random.Random(9), args.slow_share, args.slow_seconds, policy)
+        samples = await run(client, args.requests, args.concurrency)
+        line = (
+            f"{name:<14} p50 {percentile(samples, 0.5) * 1e3:6.1f} ms   p99 {percentile(samples, 0.99) * 1e3:6.1f} ms   "
+            f"mean {statistics.fmean(samples) * 1e3:6.1f} ms"
+        )
+        stats = client.hedge_stats().get("lyrics")
+        if stats:
+            line += (
+                f"   hedges {stats['hedges']} ({stats['hedges'] / stats['requests']:.1%}), "
+                f"won {stats['wins']}, lost {stats['losses']}, throttled {stats['throttled']}"
+            )
+        print(line)
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--slow-share", type=float, default=0.02)
+    parser.add_argument("--slow-seconds", type=float, default=0.5)
+    parser.add_argument("--percentile", type=float, default=95.0)
+    parser.add_argument("--budget", type=float, default=0.1)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark Ge'ez spelling normalization of search queries
+
+Generates a stream of realistic inline queries: Ge'ez words typed with
+whichever homophone letter series the user reaches for (ሀ/ሐ/ኀ, ሰ/ሠ, አ/ዐ,
+ጸ/ፀ), Latin transliterations and typed-as-you-go prefixes. Reports the
+throughput of the translate table against a dict translate table, a
+per-character dict lookup and chained str.replace, the cost it adds to normalize_query, and how many
+distinct cache keys the stream collapses into.
+
+Usage: python -m benchmarks.bench_normalize [--queries 100000] [--rounds 5]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from benchmarks.bench_fuzzy import SYLLABLES
+from benchmarks.bench_text_index import GEEZ_BASES
+from utils.cache import normalize_query
+from utils.text import _GEEZ_VARIANTS, normalize_geez
+
+
+# Letter series people type interchangeably, with the one the rest fold into first
+HOMOPHONES = [(0x1200, 0x1210, 0x1280), (0x1230, 0x1220), (0x12A0, 0x12D0), (0x1338, 0x1340)]
+
+
+def build_queries(count: int, seed: int = 6) -> List[str]:
+    """Ge'ez words with homophone letters spelled at random, transliterations and prefixes"""
+    rng = random.Random(seed)
+    bases = GEEZ_BASES + [series[0] for series in HOMOPHONES] * 4
+    # Every letter of a homophone series, with the series and its vowel order
+    series_of = {letter + order: (series, order) for series in HOMOPHONES for letter in series for order in range(7)}
+    
+    def respell(word: str) -> str:
+        """The word as one user might type it, homophone letters picked at random"""
+        letters = []
+        for ch in word:
+            series, order = series_of.get(ord(ch), ((ord(ch),), 0))
+            letters.append(chr(rng.choice(series) + order))
+        return "".join(letters)
+    
+    geez_word = lambda: "".join(chr(rng.choice(bases) + rng.randrange(7)) for _ in range(rng.randint(2, 5)))
+    latin_word = lambda: "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    vocabulary = [geez_word() for _ in range(2000)]
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            words = rng.choices(vocabulary, k=rng.randint(1, 3))
+            queries.append(" ".join(map(respell, words)))
+        elif kind < 0.85:
+            queries.append(" ".join(latin_word().title() for _ in range(rng.randint(1, 3))))
+        else:
+            word = respell(rng.choice(vocabulary)) if rng.random() < 0.5 else latin_word()
+            queries.append(word[:rng.randint(2, max(2, len(word)))])
+    return queries
+
+
+def per_char(text: str) -> str:
+    return "".join([chr(_GEEZ_VARIANTS.get(ord(ch), ord(ch))) for ch in text])
+
+
+_PAIRS = [(chr(variant), chr(canonical)) for variant, canonical in _GEEZ_VARIANTS.items()]
+
+
+def chained_replace(text: str) -> str:
+    for variant, canonical in _PAIRS:
+        text = text.replace(variant, canonical)
+    return text
+
+
+def previous_normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def best_of(func: Callable[[str], str], queries: List[str], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for query in queries:
+            func(query)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    
+    queries = build_queries(args.queries)
+    chars = sum(map(len, queries))
+    geez = sum(not query.isascii() for query in queries)
+    assert all(normalize_geez(q) == per_char(q) == chained_replace(q) for q in queries[:1000])
+    
+    print(f"queries: {len(queries)} ({geez} with Ge'ez), mean length {chars / len(queries):.1f} chars")
+    for name, func in [
+        ("translate table", normalize_geez),
+        ("dict translate table", lambda text: text.translate(_GEEZ_VARIANTS)),
+        ("per-char dict", per_char),
+        ("chained replace", chained_replace),
+        ("normalize_query (before)", previous_normalize_query),
+        ("normalize_query", normalize_query),
+    ]:
+        seconds = best_of(func, queries, args.rounds)
+        print(
+            f"{name:<25} {seconds / len(queries) * 1e9:7.0f} ns/query   "
+            f"{len(queries) / seconds / 1e6:5.2f} M queries/s   {chars / seconds / 1e6:6.1f} M chars/s"
+        )
+    
+    before = len(set(map(previous_normalize_query, queries)))
+    after = len(set(map(normalize_query, queries)))
+    print(f"distinct cache keys: {before} before, {after} with Ge'ez normalization ({1 - after / before:.1%} fewer)")
+
+
+if __name__ == "__main__":
+    main()
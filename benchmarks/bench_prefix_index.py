@@ -0,0 +1,118 @@
+"""
+Benchmark local prefix search over a catalog-sized title list
+
+Builds a PrefixIndex over a synthetic Artist/Album/Song catalog and reports
+build time, the memory held by the index, and per-query latency for a mix
+of short prefixes, whole-segment prefixes and misses. A linear scan over
+the same titles (what a naive local search would do) is the comparison.
+
+Usage: python -m benchmarks.bench_prefix_index [--titles 100000] [--queries 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from utils.cache import normalize_query
+from utils.prefix_index import PrefixIndex
+
+
+SYLLABLES = ["ye", "ke", "be", "re", "sa", "mu", "el", "ge", "ta", "me", "ha", "ni", "lu", "de", "wa", "zi"]
+
+
+def build_titles(count: int, seed: int = 1, syllables: List[str] = SYLLABLES) -> List[Tuple[str, int]]:
+    """Artist, album and song titles in roughly the live catalog's proportions"""
+    rng = random.Random(seed)
+    word = lambda: "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+    titles = []
+    while len(titles) < count:
+        artist = f"{word().title()} {word().title()}"
+        titles.append((artist, len(titles) + 1))
+        for _ in range(rng.randint(1, 6)):
+            album = f"{artist}/{word().title()} {word()}"
+            titles.append((album, len(titles) + 1))
+            for _ in range(rng.randint(4, 14)):
+                titles.append((f"{album}/{word().title()} {word()}", len(titles) + 1))
+    return titles[:count]
+
+
+def build_queries(titles: List[Tuple[str, int]], count: int, seed: int = 2) -> List[str]:
+    """Typed-as-you-go prefixes of random title segments, plus misses"""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        if i % 10 == 0:
+            queries.append("qx" + "".join(rng.choice(SYLLABLES) for _ in range(2)))
+            continue
+        title, _ = rng.choice(titles)
+        segment = rng.choice(title.split("/"))
+        queries.append(segment[:rng.randint(1, len(segment))])
+    return queries
+
+
+def linear_scan(titles: List[Tuple[str, int]]) -> Callable[[str, int], List[str]]:
+    keys = [(normalize_query(title), title) for title, _ in titles]
+    
+    def search(query: str, limit: int) -> List[str]:
+        q = normalize_query(query)
+        matches = []
+        for key, title in keys:
+            if key.startswith(q) or f"/{q}" in key:
+                matches.append(title)
+                if len(matches) == limit:
+                    break
+        return matches
+    return search
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def time_queries(search: Callable[[str], object], queries: List[str]) -> List[float]:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=80)
+    args = parser.parse_args()
+    
+    titles = build_titles(args.titles)
+    queries = build_queries(titles, args.queries)
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = PrefixIndex(titles)
+    build_seconds = time.perf_counter() - started
+    index_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"titles: {len(titles)}, suffixes: {len(index.keys)}, queries: {len(queries)}")
+    print(f"build: {build_seconds:.2f}s, index memory {index_bytes / 2**20:.1f} MiB (peak {peak_bytes / 2**20:.1f} MiB)")
+    
+    scan = linear_scan(titles)
+    rows = {
+        "prefix index": time_queries(lambda q: index.search_prefix(q, limit=args.limit), queries),
+        "linear scan": time_queries(lambda q: scan(q, args.limit), queries[:max(1, len(queries) // 10)]),
+    }
+    for name, samples in rows.items():
+        print(
+            f"{name:<14} p50 {percentile(samples, 0.5) * 1e6:9.1f} us   "
+            f"p99 {percentile(samples, 0.99) * 1e6:9.1f} us   "
+            f"mean {statistics.fmean(samples) * 1e6:9.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
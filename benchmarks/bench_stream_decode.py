@@ -0,0 +1,134 @@
+"""
+Benchmark peak memory of concurrent large rich-lyrics fetches
+
+Serves /lyrics/rich from an in-process mock transport that sends a long
+Ge'ez song as JSON in network-sized chunks, gzip-compressed or not, and
+fetches it with many requests at once. Compares the previous path, which
+read each body whole and decoded it in one go, with the streamed decode.
+Reports the body size on the wire, the Python heap peak while the
+fetches run (tracemalloc), how much of it is the decoded results
+themselves, and the wall time.
+
+Usage: python -m benchmarks.bench_stream_decode [--concurrency 50] [--size 2000000]
+"""
+import argparse
+import asyncio
+import gc
+import gzip
+import json
+import random
+import time
+import tracemalloc
+from typing import AsyncIterator, List
+
+import httpx
+
+from benchmarks.bench_text_index import GEEZ_BASES
+from utils.api_client import MezmurAPIClient, RichLyrics, TransportConfig
+
+# Bytes per read on the mock "socket"
+WIRE_CHUNK = 16 * 1024
+
+
+def build_body(size: int, seed: int = 10) -> bytes:
+    """JSON rich lyrics body with about size bytes of HTML: verses of Ge'ez words, each with a refrain"""
+    rng = random.Random(seed)
+    word = lambda: "".join(chr(rng.choice(GEEZ_BASES) + rng.randrange(7)) for _ in range(rng.randint(2, 5)))
+    vocabulary = [word() for _ in range(3000)]
+    refrain = "<p><i>ሃሌ ሉያ ሃሌ ሉያ</i></p>\n"
+    lines: List[str] = []
+    written = 0
+    while written < size:
+        verse = "".join(f"<p>{' '.join(rng.choices(vocabulary, k=8))}</p>\n" for _ in range(4))
+        text = f"<h3>{len(lines) + 1}</h3>\n{verse}{refrain}"
+        lines.append(text)
+        written += len(text.encode())
+    return json.dumps({
+        "title": "ቅዳሴ ማርያም",
+        "html_content": "".join(lines),
+        "artist": "Liturgy",
+        "album": "Kidase",
+        "page_id": 1,
+    }, ensure_ascii=False).encode()
+
+
+def make_client(body: bytes, compression: bool) -> MezmurAPIClient:
+    wire = gzip.compress(body) if compression else body
+    
+    async def chunks() -> AsyncIterator[bytes]:
+        for start in range(0, len(wire), WIRE_CHUNK):
+            await asyncio.sleep(0)
+            yield wire[start:start + WIRE_CHUNK]
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers = {"Content-Length": str(len(wire))}
+        if compression and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+        return httpx.Response(200, content=chunks(), headers=headers)
+    
+    return MezmurAPIClient(
+        "http://bench.api", enable_cache=False, coalesce_requests=False,
+        transport_config=TransportConfig(compression=compression), transport=httpx.MockTransport(handler)
+    )
+
+
+async def read_whole(client: MezmurAPIClient, title: str) -> RichLyrics:
+    """The previous decode path: read the whole body, then decode it"""
+    response = await client._get("rich_lyrics", f"{client.base_url}/lyrics/rich/{title}")
+    response.raise_for_status()
+    return RichLyrics.from_dict(client.json_loads(response.content))
+
+
+async def fetch_all(client: MezmurAPIClient, streamed: bool, concurrency: int) -> List[RichLyrics]:
+    fetch = client.get_rich_lyrics if streamed else lambda title: read_whole(client, title)
+    return await asyncio.gather(*(fetch(f"Liturgy/Kidase/Song {i}") for i in range(concurrency)))
+
+
+async def measure(body: bytes, compression: bool, streamed: bool, concurrency: int):
+    """Heap peak and retained results of one round under tracemalloc, then the time of an untraced round"""
+    client = make_client(body, compression)
+    gc.collect()
+    tracemalloc.start()
+    results = await fetch_all(client, streamed, concurrency)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bytes_per_fetch = client.metrics.snapshot()["rich_lyrics"]["bytes_received"] / concurrency
+    await client.close()
+    
+    html = results[0].html_content
+    assert all(result.html_content == html for result in results)
+    del results
+    gc.collect()
+    client = make_client(body, compression)
+    started = time.perf_counter()
+    await fetch_all(client, streamed, concurrency)
+    seconds = time.perf_counter() - started
+    await client.close()
+    return peak, retained, bytes_per_fetch, seconds
+
+
+async def main_async(args: argparse.Namespace):
+    body = build_body(args.size)
+    html = json.loads(body)["html_content"]
+    print(f"body: {len(body) / 1e6:.2f} MB JSON ({len(html)} characters of HTML), "
+          f"gzip {len(gzip.compress(body)) / 1e3:.0f} kB, concurrency: {args.concurrency}")
+    for compression in (False, True):
+        for streamed in (False, True):
+            peak, retained, bytes_per_fetch, seconds = await measure(body, compression, streamed, args.concurrency)
+            name = f"{'gzip' if compression else 'identity'}, {'streamed' if streamed else 'read whole'}"
+            print(
+                f"{name:<22} peak {peak / 1e6:7.1f} MB   of which results {retained / 1e6:6.1f} MB   "
+                f"body {bytes_per_fetch / 1e6:5.2f} MB/fetch   {seconds * 1e3:6.0f} ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--size", type=int, default=2000000)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark the local full text index over titles and lyrics
+
+Builds a TextIndex over a synthetic catalog where a share of the songs have
+Ge'ez lyrics (as they would once fetched and cached), and reports build
+time, the memory held by the index and query latency for single words,
+multi-word queries and typed-as-you-go prefixes.
+
+Usage: python -m benchmarks.bench_text_index [--titles 100000] [--lyrics 10000] [--queries 1000]
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.bench_prefix_index import build_titles, percentile
+from utils.text_index import TextIndex
+
+
+# Consonant rows of the Ethiopic syllabary; each base letter is followed by its six vowel orders
+GEEZ_BASES = [0x1200, 0x1208, 0x1218, 0x1228, 0x1230, 0x1240, 0x1260, 0x1270, 0x1290, 0x12A0, 0x12A8, 0x12C8, 0x12E8, 0x12F0, 0x1308, 0x1320]
+
+
+def geez_vocabulary(size: int, rng: random.Random) -> List[str]:
+    syllable = lambda: chr(rng.choice(GEEZ_BASES) + rng.randrange(7))
+    return ["".join(syllable() for _ in range(rng.randint(2, 5))) for _ in range(size)]
+
+
+def build_documents(titles: List[Tuple[str, int]], lyrics: int, seed: int = 3) -> List[Tuple[str, int, Optional[str]]]:
+    """Titles with roughly 40 lines of Zipf-distributed Ge'ez lyrics on `lyrics` of the songs"""
+    rng = random.Random(seed)
+    vocabulary = geez_vocabulary(20000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    songs = [i for i, (title, _) in enumerate(titles) if title.count("/") == 2]
+    with_lyrics = set(rng.sample(songs, min(lyrics, len(songs))))
+    
+    documents = []
+    for i, (title, pageid) in enumerate(titles):
+        text = None
+        if i in with_lyrics:
+            words = rng.choices(vocabulary, weights, k=240)
+            text = "\n".join(" ".join(words[j:j + 6]) for j in range(0, len(words), 6))
+        documents.append((title, pageid, text))
+    return documents
+
+
+def build_queries(documents: List[Tuple[str, int, Optional[str]]], count: int, seed: int = 4) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    texts = [text for _, _, text in documents if text]
+    titles = [title for title, _, _ in documents]
+    queries: Dict[str, List[str]] = {"lyrics word": [], "title words": [], "prefix": []}
+    for _ in range(count):
+        queries["lyrics word"].append(rng.choice(rng.choice(texts).split()))
+        words = rng.choice(titles).replace("/", " ").split()
+        queries["title words"].append(" ".join(rng.sample(words, min(2, len(words)))))
+        word = rng.choice(words)
+        queries["prefix"].append(word[:rng.randint(2, max(2, len(word)))])
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--lyrics", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    
+    documents = build_documents(build_titles(args.titles), args.lyrics)
+    queries = build_queries(documents, args.queries)
+    text_bytes = sum(len(text.encode()) for _, _, text in documents if text)
+    
+    started = time.perf_counter()
+    TextIndex(documents)
+    build_seconds = time.perf_counter() - started
+    
+    # Build again under tracemalloc (which slows it down) to measure memory
+    tracemalloc.start()
+    index = TextIndex(documents)
+    index_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"documents: {len(index)}, with lyrics: {args.lyrics} ({text_bytes / 2**20:.1f} MiB of text), terms: {len(index.terms)}")
+    print(
+        f"build: {build_seconds:.1f}s, index memory {index_bytes / 2**20:.1f} MiB "
+        f"(peak {peak_bytes / 2**20:.1f} MiB, lyrics text shared with the caller)"
+    )
+    for name, batch in queries.items():
+        samples = []
+        for query in batch:
+            started = time.perf_counter()
+            index.search(query, limit=10)
+            samples.append(time.perf_counter() - started)
+        print(
+            f"{name:<12} p50 {percentile(samples, 0.5) * 1e3:7.2f} ms   "
+            f"p99 {percentile(samples, 0.99) * 1e3:7.2f} ms   "
+            f"mean {statistics.fmean(samples) * 1e3:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the per-request cost of debug output in get_lyrics
+
+Compares the previous print statements (which decode the response body as
+text and write to stdout) with the tracer at several settings. Each round
+builds a fresh response for a typical lyrics body so that text decoding is
+not cached between rounds; the "none" row is that baseline.
+
+Usage: python -m benchmarks.bench_tracing [--rounds 20000]
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import timeit
+from typing import Callable, Dict
+
+import httpx
+
+from utils.tracing import Tracer
+
+
+URL = "http://localhost:8000/lyrics/Artist/Album/Song"
+
+
+def make_body() -> bytes:
+    lyrics = "\n".join(["ክብር ለእግዚአብሔር በአርያም ይሁን ሰላምም በምድር"] * 60)
+    return json.dumps({"title": "Artist/Album/Song", "lyrics": lyrics}, ensure_ascii=False).encode()
+
+
+def print_debug(body: bytes):
+    """The previous debug output"""
+    response = httpx.Response(200, content=body)
+    print(f"Making request to: {URL}")
+    print(f"Response status: {response.status_code}")
+    print(f"Response text: {response.text[:200]}...")
+
+
+def trace_debug(tracer: Tracer) -> Callable[[bytes], None]:
+    """The tracing that replaced it"""
+    def run(body: bytes):
+        span = tracer.span("lyrics", url=URL)
+        response = httpx.Response(200, content=body)
+        if span:
+            span.event(
+                "response",
+                status=response.status_code,
+                bytes=len(response.content),
+                preview=lambda: response.content[:200].decode("utf-8", "replace")
+            )
+    return run
+
+
+def tracer_for(name: str, sample_rate: float, level: int) -> Tracer:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.propagate = False
+    logger.setLevel(level)
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    logger.addHandler(handler)
+    return Tracer(logger.name, sample_rate=sample_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+    
+    body = make_body()
+    variants: Dict[str, Callable[[bytes], None]] = {
+        "none": lambda b: httpx.Response(200, content=b),
+        "print (before)": print_debug,
+        "trace off (rate 0)": trace_debug(tracer_for("off", 0.0, logging.DEBUG)),
+        "trace level-gated": trace_debug(tracer_for("gated", 1.0, logging.INFO)),
+        "trace 1% sampled": trace_debug(tracer_for("sampled", 0.01, logging.DEBUG)),
+        "trace 100%": trace_debug(tracer_for("all", 1.0, logging.DEBUG)),
+    }
+    
+    timings = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, run in variants.items():
+            seconds = min(timeit.repeat(lambda: run(body), number=args.rounds, repeat=3)) / args.rounds
+            timings[name] = seconds
+    
+    print(f"lyrics body: {len(body)} bytes, {args.rounds} rounds")
+    for name, seconds in timings.items():
+        overhead = seconds - timings["none"]
+        print(f"{name:<20} {seconds * 1e6:8.2f} us/request   overhead {overhead * 1e6:+8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
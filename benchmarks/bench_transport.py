@@ -0,0 +1,97 @@
+"""
+Benchmark MezmurAPIClient transport settings against a local stub API
+
+Usage: python -m benchmarks.bench_transport [--requests N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.stub_api import StubProcess, build_catalog
+from utils.api_client import MezmurAPIClient, TransportConfig
+
+
+SCENARIOS = {
+    "default pool": TransportConfig(),
+    "no keep-alive": TransportConfig(max_keepalive_connections=0),
+    "small pool (5)": TransportConfig(max_connections=5, max_keepalive_connections=5),
+    "large pool (200)": TransportConfig(max_connections=200, max_keepalive_connections=200, keepalive_expiry=30.0),
+}
+
+
+async def run_scenario(base_url: str, config: TransportConfig, titles: List[str], requests: int, concurrency: int):
+    """Fire `requests` lyrics calls with `concurrency` workers and return latencies"""
+    client = MezmurAPIClient(base_url, enable_cache=False, coalesce_requests=False, transport_config=config)
+    latencies: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(titles[i % len(titles)])
+    
+    async def worker():
+        while not queue.empty():
+            title = queue.get_nowait()
+            started = time.perf_counter()
+            await client._fetch_lyrics(title)
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    await client.close()
+    return elapsed, latencies
+
+
+def stub_connections(base_url: str, uds: str = None) -> int:
+    """Number of TCP/UDS connections the stub has accepted so far"""
+    transport = httpx.HTTPTransport(uds=uds) if uds else None
+    with httpx.Client(transport=transport) as client:
+        return client.get(f"{base_url}/_stats").json()["connections"]
+
+
+def report(name: str, elapsed: float, latencies: List[float], connections: int):
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:<22} {len(latencies) / elapsed:>9.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms   connections {connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    
+    # Silence the per-request debug output of get_lyrics while benchmarking
+    import builtins
+    builtins.print, real_print = (lambda *a, **k: None), builtins.print
+    
+    titles = [t for t in build_catalog() if t.count("/") == 2]
+    results = []
+    with StubProcess() as stub:
+        for name, config in SCENARIOS.items():
+            before = stub_connections(stub.url)
+            elapsed, latencies = asyncio.run(run_scenario(stub.url, config, titles, args.requests, args.concurrency))
+            results.append((name, elapsed, latencies, stub_connections(stub.url) - before))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        sock = os.path.join(tmp, "mezmur.sock")
+        config = TransportConfig(uds=sock)
+        with StubProcess(uds=sock) as stub:
+            elapsed, latencies = asyncio.run(run_scenario(stub.url, config, titles, args.requests, args.concurrency))
+            results.append(("unix socket", elapsed, latencies, stub_connections(stub.url, uds=sock)))
+    
+    builtins.print = real_print
+    print(f"{args.requests} lyrics requests, concurrency {args.concurrency}")
+    for result in results:
+        report(*result)
+    print("HTTP/2 needs TLS with ALPN (and the 'h2' package), so it is not exercised against the plain-HTTP stub.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Local stub of the Mezmur API for benchmarks and tests
+
+Serves a synthetic catalog over a minimal HTTP/1.1 keep-alive server running
+on its own event loop thread, over TCP or a Unix domain socket.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+from email.utils import formatdate
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+def build_catalog(artists: int = 20, albums_per_artist: int = 4, songs_per_album: int = 10) -> List[str]:
+    """Synthetic Artist/Album/Song titles (artists and albums included)"""
+    titles = []
+    for a in range(artists):
+        artist = f"Artist {a:03d}"
+        titles.append(artist)
+        for b in range(albums_per_artist):
+            album = f"{artist}/Album {b:02d}"
+            titles.append(album)
+            for c in range(songs_per_album):
+                titles.append(f"{album}/Song {c:03d}")
+    return titles
+
+
+class StubAPI:
+    """Minimal Mezmur API stand-in for local benchmarks and tests"""
+    
+    def __init__(self, titles: Optional[List[str]] = None, latency: float = 0.0,
+                 lyrics_size: int = 2000, uds: Optional[str] = None, validators: bool = True):
+        self.titles = titles if titles is not None else build_catalog()
+        self.pageids = {title: i + 1 for i, title in enumerate(self.titles)}
+        self.latency = latency
+        self.lyrics_size = lyrics_size
+        self.uds = uds
+        self.validators = validators
+        self.revisions: Dict[str, int] = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.connections = 0
+        self.routes: List[Tuple[str, Callable[[str, Dict[str, str], Dict[str, str]], Response]]] = [
+            ("/health", self._health),
+            ("/_stats", self._stats),
+            ("/search/prefix", self._search_prefix),
+            ("/search", self._search_full),
+            ("/albums/songs", self._album_songs),
+            ("/lyrics/rich/", self._rich_lyrics),
+            ("/lyrics/", self._lyrics),
+            ("/artists", self._artists),
+        ]
+        self.port = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+    
+    @property
+    def url(self) -> str:
+        """Base URL to pass to MezmurAPIClient"""
+        return "http://stub" if self.uds else f"http://127.0.0.1:{self.port}"
+    
+    # Lifecycle
+    def start(self) -> "StubAPI":
+        """Start serving on a background thread"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+    
+    def stop(self):
+        """Stop the server and its thread"""
+        if self._loop and self._server:
+            async def shutdown():
+                self._server.close()
+                # Drop keep-alive connections that clients left open
+                handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in handlers:
+                    task.cancel()
+                await asyncio.gather(*handlers, return_exceptions=True)
+                await self._server.wait_closed()
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join()
+    
+    def __enter__(self) -> "StubAPI":
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        if self.uds:
+            server = asyncio.start_unix_server(self._handle_connection, path=self.uds)
+        else:
+            server = asyncio.start_server(self._handle_connection, host="127.0.0.1", port=0)
+        self._server = self._loop.run_until_complete(server)
+        if not self.uds:
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+    
+    # HTTP plumbing
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, extra_headers, body = self.dispatch(target, headers)
+                
+                keep_alive = headers.get("connection", "").lower() != "close"
+                response_headers = {
+                    "content-type": "application/json",
+                    "content-length": str(len(body)),
+                    "connection": "keep-alive" if keep_alive else "close",
+                }
+                response_headers.update(extra_headers)
+                reason = "Not Modified" if status == 304 else "OK" if status < 400 else "Error"
+                out = f"HTTP/1.1 {status} {reason}\r\n"
+                out += "".join(f"{k}: {v}\r\n" for k, v in response_headers.items())
+                writer.write(out.encode("latin-1") + b"\r\n" + (body if method != "HEAD" else b""))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    def dispatch(self, target: str, headers: Dict[str, str]) -> Response:
+        """Route a request target to its handler"""
+        parts = urlsplit(target)
+        path = unquote(parts.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if path.startswith("/artists/") and path.endswith("/albums"):
+            return self._artist_albums(path[len("/artists/"):-len("/albums")], params, headers)
+        for prefix, handler in self.routes:
+            if path == prefix or (prefix.endswith("/") and path.startswith(prefix)):
+                return handler(path[len(prefix):], params, headers)
+        return self._json(404, {"detail": "Not found"})
+    
+    # Endpoints
+    @staticmethod
+    def _json(status: int, payload, headers: Optional[Dict[str, str]] = None) -> Response:
+        return status, headers or {}, json.dumps(payload).encode()
+    
+    def _page(self, titles: List[str], params: Dict[str, str], namespace: bool = False) -> Response:
+        page = int(params.get("page", 1))
+        limit = int(params.get("limit", 10))
+        start = int(params["continue_token"]) if params.get("continue_token") else (page - 1) * limit
+        chunk = titles[start:start + limit]
+        end = start + len(chunk)
+        data = []
+        for title in chunk:
+            item = {"title": title, "pageid": self.pageids[title]}
+            if namespace:
+                item["namespace"] = 0
+            else:
+                item.update({"snippet": None, "size": 1000, "wordcount": 150})
+            data.append(item)
+        return self._json(200, {
+            "data": data,
+            "total": len(titles),
+            "page": page,
+            "limit": limit,
+            "has_next": end < len(titles),
+            "has_prev": start > 0,
+            "next_token": str(end) if end < len(titles) else None,
+        })
+    
+    def _health(self, rest, params, headers) -> Response:
+        return self._json(200, {"status": "healthy"})
+    
+    def _stats(self, rest, params, headers) -> Response:
+        return self._json(200, {
+            "requests": self.requests,
+            "connections": self.connections,
+            "not_modified": self.not_modified,
+        })
+    
+    def _search_prefix(self, rest, params, headers) -> Response:
+        q = params.get("q", "").lower()
+        return self._page([t for t in self.titles if t.lower().startswith(q)], params)
+    
+    def _search_full(self, rest, params, headers) -> Response:
+        q = params.get("q", "").lower()
+        return self._page([t for t in self.titles if q in t.lower()], params)
+    
+    def _artists(self, rest, params, headers) -> Response:
+        return self._page([t for t in self.titles if "/" not in t], params, namespace=True)
+    
+    def _artist_albums(self, artist, params, headers) -> Response:
+        prefix = artist + "/"
+        albums = [t for t in self.titles if t.startswith(prefix) and t.count("/") == 1]
+        return self._page(albums, params, namespace=True)
+    
+    def _album_songs(self, rest, params, headers) -> Response:
+        prefix = params.get("album_title", "") + "/"
+        songs = [t for t in self.titles if t.startswith(prefix) and t.count("/") == 2]
+        return self._page(songs, params, namespace=True)
+    
+    def touch(self, title: str):
+        """Mark a song's lyrics as edited so its validators change"""
+        self.revisions[title] = self.revisions.get(title, 0) + 1
+    
+    def _conditional(self, title: str, headers: Dict[str, str], response: Response) -> Response:
+        """Attach ETag/Last-Modified to a lyrics response and answer 304 when the client's copy is current"""
+        if not self.validators:
+            return response
+        revision = self.revisions.get(title, 0)
+        etag = f'"{self.pageids[title]}-{revision}"'
+        last_modified = formatdate(1700000000 + revision * 60, usegmt=True)
+        if headers.get("if-none-match") == etag or (
+            "if-none-match" not in headers and headers.get("if-modified-since") == last_modified
+        ):
+            self.not_modified += 1
+            return 304, {"etag": etag, "last-modified": last_modified}, b""
+        status, extra_headers, body = response
+        return status, dict(extra_headers, etag=etag, **{"last-modified": last_modified}), body
+    
+    def _lyrics_text(self, title: str) -> str:
+        line = f"{title.split('/')[-1]} lyrics line\n"
+        return (line * (self.lyrics_size // len(line) + 1))[:self.lyrics_size]
+    
+    def _lyrics(self, title, params, headers) -> Response:
+        if title not in self.pageids:
+            return self._json(404, {"detail": "Song not found"})
+        parts = title.split("/")
+        return self._conditional(title, headers, self._json(200, {
+            "title": parts[-1],
+            "artist": parts[0],
+            "album": parts[1] if len(parts) > 2 else None,
+            "lyrics": self._lyrics_text(title) + "\n" * self.revisions.get(title, 0),
+        }))
+    
+    def _rich_lyrics(self, title, params, headers) -> Response:
+        if title not in self.pageids:
+            return self._json(404, {"detail": "Song not found"})
+        parts = title.split("/")
+        html = "".join(f"<p>{line}</p>" for line in self._lyrics_text(title).splitlines())
+        html += "<br>" * self.revisions.get(title, 0)
+        return self._conditional(title, headers, self._json(200, {
+            "title": parts[-1],
+            "html_content": html,
+            "artist": parts[0],
+            "album": parts[1] if len(parts) > 2 else None,
+            "page_id": self.pageids[title],
+        }))
+
+
+class StubProcess:
+    """Run the stub API in a child process so it does not share the GIL with the client"""
+    
+    def __init__(self, uds: Optional[str] = None, latency: float = 0.0):
+        self.uds = uds
+        self.latency = latency
+        self.port = 0
+        self._proc: Optional[subprocess.Popen] = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL to pass to MezmurAPIClient"""
+        return "http://stub" if self.uds else f"http://127.0.0.1:{self.port}"
+    
+    def __enter__(self) -> "StubProcess":
+        cmd = [sys.executable, "-m", "benchmarks.stub_api", "--latency", str(self.latency)]
+        if self.uds:
+            cmd += ["--uds", self.uds]
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+        self.port = int(self._proc.stdout.readline())
+        return self
+    
+    def __exit__(self, *exc):
+        if self._proc:
+            self._proc.terminate()
+            self._proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the stub Mezmur API")
+    parser.add_argument("--uds", default=None)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    stub = StubAPI(uds=args.uds, latency=args.latency).start()
+    print(stub.port, flush=True)
+    try:
+        stub._thread.join()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
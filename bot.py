@@ -3,11 +3,20 @@ Main Telegram Bot for Mezmur
 """
 import os
 import asyncio
+import functools
 import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import httpx
 from dotenv import load_dotenv
 from telegram import Update, BotCommand, InlineQueryResultArticle, InputTextMessageContent, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, InlineQueryHandler, filters, ContextTypes
 from utils.api_client import MezmurAPIClient
+from utils.cache import TTLCache, normalize_query, query_key
+from utils.catalog import CatalogMirror
+from utils.text_index import SearchIndexer
+from utils.metrics import format_samples, start_metrics_server
+from utils.prefix_index import segment_prefix_match
+from utils.tracing import Tracer
 from handlers.search import SearchHandler
 from handlers.lyrics import LyricsHandler
 from handlers.albums import AlbumsHandler
@@ -18,6 +27,7 @@ logging.basicConfig(
     level=logging.DEBUG
 )
 logger = logging.getLogger(__name__)
+tracer = Tracer(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -26,10 +36,71 @@ load_dotenv()
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
 
+# Inline lyrics budget: per-song timeout and total deadline for one page of results
+INLINE_LYRICS_TIMEOUT = float(os.getenv('INLINE_LYRICS_TIMEOUT', '3.0'))
+INLINE_PAGE_DEADLINE = float(os.getenv('INLINE_PAGE_DEADLINE', '4.0'))
+
+# API call time budgets in seconds: each inline query and each button press shares one deadline
+# across its calls, while background jobs give every call its own budget
+INLINE_API_BUDGET = float(os.getenv('INLINE_API_BUDGET', '5.0'))
+CALLBACK_API_BUDGET = float(os.getenv('CALLBACK_API_BUDGET', '10.0'))
+BACKGROUND_API_BUDGET = float(os.getenv('BACKGROUND_API_BUDGET', '60.0'))
+
+# Prefix results fetched per inline search page; deeper pages are fetched as the user scrolls
+INLINE_SEARCH_LIMIT = int(os.getenv('INLINE_SEARCH_LIMIT', '20'))
+
+# Songs per inline answer, and the most search pages one answer may fetch to fill it
+INLINE_PAGE_SIZE = 5
+INLINE_MAX_FETCHES = 3
+
+# Telegram's limit on an inline next_offset, in bytes
+MAX_INLINE_OFFSET = 64
+
+# Where a page of inline results came from: continue tokens only mean something to their own source
+INLINE_SOURCES = ("local", "api")
+
+# Inline search cache limits
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '1000'))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv('SEARCH_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', '600'))
+
+# Serve API client metrics for Prometheus on this port (disabled when unset)
+METRICS_PORT = os.getenv('METRICS_PORT')
+
+# Catalog mirror sync period in seconds (0 disables the mirror)
+CATALOG_SYNC_INTERVAL = float(os.getenv('CATALOG_SYNC_INTERVAL', '900'))
+
+# Local full text index refresh period in seconds (0 disables it)
+SEARCH_INDEX_INTERVAL = float(os.getenv('SEARCH_INDEX_INTERVAL', '300'))
+
 if not BOT_TOKEN:
     raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
 
 
+def encode_inline_offset(page: int, skip: int, source: str, token: Optional[str]) -> str:
+    """Inline next_offset for a search page, the source it came from, its continue token and the songs on it already shown
+    
+    A continue token too long for Telegram is left out; the page number alone resumes there.
+    """
+    offset = f"{page}:{skip}:{source}:{token or ''}"
+    return offset if len(offset.encode()) <= MAX_INLINE_OFFSET else f"{page}:{skip}:{source}:"
+
+
+def decode_inline_offset(offset: Optional[str]) -> Tuple[int, int, Optional[str], Optional[str]]:
+    """Search page, songs to skip on it, its source and continue token from an inline offset ("" is the start)"""
+    if not offset:
+        return 1, 0, None, None
+    page, _, rest = offset.partition(":")
+    if not rest:
+        # A plain song index from before offsets were cursors
+        return 1, int(page), None, None
+    skip, _, rest = rest.partition(":")
+    source, _, token = rest.partition(":")
+    if source not in INLINE_SOURCES:
+        return int(page), int(skip), None, None
+    return int(page), int(skip), source, token or None
+
+
 class MezmurBot:
     """Main Mezmur Telegram Bot"""
     
@@ -40,10 +111,20 @@ class MezmurBot:
         # Initialize API client
         self.api_client = MezmurAPIClient(api_base_url)
         
+        # In-memory catalog mirror, synced in the background once the bot starts
+        self.catalog = (
+            CatalogMirror(self.api_client, call_budget=BACKGROUND_API_BUDGET) if CATALOG_SYNC_INTERVAL > 0 else None
+        )
+        self._catalog_task: Optional[asyncio.Task] = None
+        
+        # Full text index over mirrored titles and cached lyrics, refreshed in the background
+        self.search_index = SearchIndexer(self.api_client, self.catalog) if SEARCH_INDEX_INTERVAL > 0 else None
+        self._search_index_task: Optional[asyncio.Task] = None
+        
         # Initialize handlers
-        self.search_handler = SearchHandler(self.api_client)
+        self.search_handler = SearchHandler(self.api_client, catalog=self.catalog, search_index=self.search_index)
         self.lyrics_handler = LyricsHandler(self.api_client)
-        self.albums_handler = AlbumsHandler(self.api_client)
+        self.albums_handler = AlbumsHandler(self.api_client, catalog=self.catalog)
         
         # Initialize application
         self.application = Application.builder().token(bot_token).build()
@@ -51,6 +132,28 @@ class MezmurBot:
         # User conversation states - tracks what each user is waiting for
         self.user_states = {}
         
+        # Pages of inline search songs, keyed by (query, page, continue token, source asked), with case and
+        # spacing folded but not Ge'ez spelling, since the API matches that as typed;
+        # an entry's meta is (has_next, next_token, source), and a longer query can be answered by
+        # filtering a first page that has no next page
+        self._search_cache = TTLCache(
+            max_entries=SEARCH_CACHE_MAX_ENTRIES,
+            max_bytes=SEARCH_CACHE_MAX_BYTES,
+            ttl=SEARCH_CACHE_TTL,
+            key_func=lambda key: (query_key(key[0]),) + key[1:]
+        )
+        self.inline_exact_hits = 0
+        self.inline_prefix_hits = 0
+        self.inline_searches = 0
+        
+        # The inline query being worked on for each user; a newer query from the same user cancels it
+        self._inline_tasks: Dict[int, asyncio.Task] = {}
+        self.inline_superseded = 0
+        self.inline_lyrics_cancelled = 0
+        
+        # Prometheus metrics endpoint, started with the bot when METRICS_PORT is set
+        self._metrics_server: Optional[asyncio.AbstractServer] = None
+        
         # Register handlers
         self._register_handlers()
     
@@ -76,16 +179,59 @@ class MezmurBot:
         self.application.add_handler(CommandHandler("artists", self.albums_handler.artists_command))
         
         # Callback query handlers - order matters! Put the most specific ones first
-        self.application.add_handler(CallbackQueryHandler(self.handle_button_callback, pattern="^(search_artist|search_album|search_song|inline_search|back_to_home)$"))
-        self.application.add_handler(CallbackQueryHandler(self.search_handler.handle_callback_query))
-        self.application.add_handler(CallbackQueryHandler(self.albums_handler.handle_callback_query))
-        
-        # Inline query handler
-        self.application.add_handler(InlineQueryHandler(self.handle_inline_query))
+        self.application.add_handler(CallbackQueryHandler(
+            self._with_budget(self.handle_button_callback, CALLBACK_API_BUDGET),
+            pattern="^(search_artist|search_album|search_song|inline_search|back_to_home)$"
+        ))
+        self.application.add_handler(CallbackQueryHandler(
+            self._with_budget(self.search_handler.handle_callback_query, CALLBACK_API_BUDGET)
+        ))
+        self.application.add_handler(CallbackQueryHandler(
+            self._with_budget(self.albums_handler.handle_callback_query, CALLBACK_API_BUDGET)
+        ))
+        
+        # Inline query handler; non-blocking so a user's next keystroke can supersede the query still running
+        self.application.add_handler(InlineQueryHandler(
+            self._with_budget(self._latest_per_user(self.handle_inline_query), INLINE_API_BUDGET),
+            block=False
+        ))
         
         # Message handlers
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text_message))
     
+    def _with_budget(self, callback: Callable[..., Awaitable[Any]], seconds: float) -> Callable[..., Awaitable[Any]]:
+        """Wrap a handler so the API calls it makes share one deadline, seconds after the update arrives"""
+        @functools.wraps(callback)
+        async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            with self.api_client.budget(seconds):
+                return await callback(update, context)
+        return handler
+    
+    def _latest_per_user(self, callback: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Wrap the inline handler so a newer query from a user cancels the one still running for them
+        
+        Only the answer to the latest query is shown, so an older one's search and
+        lyrics fetches are wasted work that competes with the current query and
+        with other users for API capacity.
+        """
+        @functools.wraps(callback)
+        async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            user = update.inline_query.from_user if update.inline_query else None
+            if user is None:
+                return await callback(update, context)
+            
+            previous = self._inline_tasks.get(user.id)
+            if previous is not None and not previous.done():
+                previous.cancel()
+                self.inline_superseded += 1
+            task = self._inline_tasks[user.id] = asyncio.current_task()
+            try:
+                return await callback(update, context)
+            finally:
+                if self._inline_tasks.get(user.id) is task:
+                    del self._inline_tasks[user.id]
+        return handler
+    
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
         if not update.effective_message:
@@ -172,7 +318,7 @@ Contact @your_username for support
         if not data:
             return
         
-        print(f"DEBUG: Main menu button callback received: '{data}'")
+        tracer.event("menu.callback", data=data)
         
         if data == "search_artist":
             await self._handle_artist_search_request(query, context)
@@ -188,11 +334,10 @@ Contact @your_username for support
     async def _handle_artist_search_request(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Handle artist search button click"""
         user_id = query.from_user.id
-        print(f"DEBUG: Artist search button clicked by user {user_id}")
         
         # Set user state to waiting for artist name
         self.user_states[user_id] = 'waiting_for_artist'
-        print(f"DEBUG: Set user {user_id} state to: waiting_for_artist")
+        tracer.event("state.set", user_id=user_id, state='waiting_for_artist')
         
         message = """
 👤 **Search Artists** 👤
@@ -330,34 +475,29 @@ Just click a button below or type any command to get started! 🚀
         user_id = update.effective_user.id
         message_text = update.effective_message.text or ""
         
-        print(f"DEBUG: Received text message from user {user_id}: '{message_text}'")
-        print(f"DEBUG: Current user states: {self.user_states}")
+        tracer.event("message.text", user_id=user_id, text=message_text, state=self.user_states.get(user_id))
         
         # Check if user is in a conversation state
         if user_id in self.user_states:
             state = self.user_states[user_id]
-            print(f"DEBUG: User {user_id} is in state: {state}")
             
             # Clear the user state first
             del self.user_states[user_id]
             
             # Process based on conversation state
             if state == 'waiting_for_artist':
-                print(f"DEBUG: Processing artist search for: {message_text}")
                 # Simulate /artist command
                 context.args = [message_text]
                 await self.albums_handler.artist_command(update, context)
                 return
                 
             elif state == 'waiting_for_album':
-                print(f"DEBUG: Processing album search for: {message_text}")
                 # Simulate /album command
                 context.args = [message_text]
                 await self.albums_handler.album_command(update, context)
                 return
                 
             elif state == 'waiting_for_song_search':
-                print(f"DEBUG: Processing song search for: {message_text}")
                 # Simulate /search command
                 context.args = [message_text]
                 await self.search_handler.search_command(update, context)
@@ -390,63 +530,49 @@ Just click a button below or type any command to get started! 🚀
             return
             
         query = update.inline_query.query
-        offset = int(update.inline_query.offset or 0)  # Get current offset for pagination
+        offset = update.inline_query.offset
         
         if not query or len(query) < 2:
             return
         
         try:
-            logger.info(f"Processing inline query: '{query}' with offset: {offset}")
+            logger.info(f"Processing inline query: '{query}' with offset: '{offset}'")
             
-            # Check if we have cached results for this query
-            cache_key = f"search_{query}"
-            if not hasattr(self, '_search_cache'):
-                self._search_cache = {}
+            # The offset is a cursor into the prefix results: a search page, where it came from, its
+            # continue token and the songs of that page already shown. Fill this page, fetching further
+            # pages from the same source only as needed
+            page, skip, source, token = decode_inline_offset(offset)
+            first_page, first_skip = page, skip
+            songs_to_show: List[Any] = []
+            next_offset = None
+            for fetch in range(INLINE_MAX_FETCHES):
+                songs, has_next, next_token, source = await self._inline_search_page(query, page, token, source)
+                take = INLINE_PAGE_SIZE - len(songs_to_show)
+                songs_to_show += songs[skip:skip + take]
+                if len(songs) > skip + take:
+                    next_offset = encode_inline_offset(page, skip + take, source, token)
+                    break
+                if not has_next:
+                    break
+                page, skip, token = page + 1, 0, next_token
+                if len(songs_to_show) == INLINE_PAGE_SIZE or fetch + 1 == INLINE_MAX_FETCHES:
+                    next_offset = encode_inline_offset(page, skip, source, token)
+                    break
             
-            # If offset is 0, perform new search and cache results
-            if offset == 0 or cache_key not in self._search_cache:
-                logger.info(f"Performing new search for query: '{query}'")
-                # Perform search with higher limit to get more results for pagination
-                results = await self.api_client.search_prefix(query, limit=80)
-                logger.info(f"Search returned {len(results.data)} results")
-                
-                if not results.data:
-                    return
-                
-                # Filter only songs (more than 1 slash = song)
-                songs = [result for result in results.data if result.title.count("/") > 1]
-                logger.info(f"Found {len(songs)} songs after filtering")
-                
-                if not songs:
-                    logger.info("No songs found, returning empty results")
-                    return
-                
-                # Cache the songs list
-                self._search_cache[cache_key] = songs
-                logger.info(f"Cached {len(songs)} songs for query: '{query}'")
-            else:
-                # Use cached results
-                songs = self._search_cache[cache_key]
-                logger.info(f"Using cached results: {len(songs)} songs for query: '{query}'")
+            if not songs_to_show:
+                logger.info("No songs found, returning empty results")
+                return
             
-            # Calculate pagination
-            songs_per_page = 5
-            start_idx = offset
-            end_idx = start_idx + songs_per_page
-            songs_to_show = songs[start_idx:end_idx]
+            # Fetch lyrics for the whole page concurrently so the answer fits the inline deadline
+            page_lyrics = await self._fetch_inline_lyrics(songs_to_show)
             
             # Create inline results for current page
             inline_results = []
-            for i, song in enumerate(songs_to_show):
-                song_name = song.title.split("/")[-1]
-                artist_name = song.title.split("/")[0]
+            for i, (song, lyrics_data) in enumerate(zip(songs_to_show, page_lyrics)):
+                song_name = song.name
+                artist_name = song.artist
                 
-                try:
-                    # Fetch the actual lyrics for this song
-                    logger.info(f"Fetching lyrics for song: {song.title}")
-                    lyrics_data = await self.api_client.get_lyrics(song.title)
-                    logger.info(f"Lyrics data received: {lyrics_data}")
-                    
+                if lyrics_data is not None:
                     # Create the lyrics message
                     lyrics_text = lyrics_data.get("lyrics", "No lyrics available")
                     title = lyrics_data.get("title", song_name)
@@ -466,11 +592,11 @@ Just click a button below or type any command to get started! 🚀
                     if len(message) > 4000:
                         message = message[:3900] + "\n\n... (truncated)"
                     
-                    logger.info(f"Created message for {song_name}: {message[:200]}...")
+                    tracer.event("inline.result", song=song_name, chars=len(message))
                     
                     # Create inline result with actual lyrics
                     inline_result = InlineQueryResultArticle(
-                        id=f"{offset}_{i}",
+                        id=f"{first_page}_{first_skip}_{i}",
                         title=f"🎵 {song_name}",
                         description=f"by {artist_name}",
                         input_message_content=InputTextMessageContent(
@@ -480,19 +606,10 @@ Just click a button below or type any command to get started! 🚀
                     )
                     inline_results.append(inline_result)
                     
-                except Exception as lyrics_error:
-                    logger.error(f"Failed to fetch lyrics for {song.title}: {lyrics_error}")
-                    logger.error(f"Error type: {type(lyrics_error).__name__}")
-                    
-                    # Try to get more details about the error if it's an HTTP error
-                    import httpx
-                    if isinstance(lyrics_error, httpx.HTTPStatusError):
-                        logger.error(f"HTTP Status: {lyrics_error.response.status_code}")
-                        logger.error(f"Response text: {lyrics_error.response.text}")
-                    
-                    # Fallback to showing command if lyrics fetch fails
+                else:
+                    # Fallback to showing command if lyrics fetch failed or missed the deadline
                     inline_result = InlineQueryResultArticle(
-                        id=f"{offset}_{i}",
+                        id=f"{first_page}_{first_skip}_{i}",
                         title=f"🎵 {song_name}",
                         description=f"by {artist_name}",
                         input_message_content=InputTextMessageContent(
@@ -507,28 +624,18 @@ Just click a button below or type any command to get started! 🚀
             
             # Add loading indicator only on first page to show there are more results
             # On subsequent pages, we don't show loading indicator so users can see fresh content
-            if end_idx < len(songs) and offset == 0:
-                remaining_songs = len(songs) - end_idx
+            if next_offset is not None and (first_page, first_skip) == (1, 0):
                 loading_result = InlineQueryResultArticle(
-                    id=f"loading_{offset}",
+                    id="loading",
                     title="⏳ Load More Songs",
-                    description=f"{remaining_songs} more songs available - scroll down",
+                    description="More songs available - scroll down",
                     input_message_content=InputTextMessageContent(
                         message_text=f"⏳ **Load More Songs**\n\n"
-                                   f"📊 {remaining_songs} more songs available\n"
                                    f"🔄 Scroll down to load more results",
                         parse_mode='Markdown'
                     )
                 )
                 inline_results.append(loading_result)
-                logger.info(f"Added loading indicator: {remaining_songs} more songs available")
-            elif end_idx < len(songs) and offset > 0:
-                # On subsequent pages, just log that there are more songs but don't show indicator
-                remaining_songs = len(songs) - end_idx
-                logger.info(f"Page {offset//5 + 1}: {remaining_songs} more songs available (no loading indicator shown)")
-            
-            # Calculate next offset for pagination
-            next_offset = str(end_idx) if end_idx < len(songs) else None
             
             # Answer the inline query with pagination support
             logger.info(f"Returning {len(inline_results)} inline results, next_offset: {next_offset}")
@@ -541,6 +648,154 @@ Just click a button below or type any command to get started! 🚀
         except Exception as e:
             logger.error(f"Inline query failed: {e}")
     
+    async def _inline_search_page(self, query: str, page: int, token: Optional[str],
+                                  source: Optional[str]) -> Tuple[List[Any], bool, Optional[str], str]:
+        """Songs on one page of prefix results for an inline query, whether more pages follow, their token and source
+        
+        A first page comes from the catalog mirror when it has matches, else
+        from the API; later pages go back to the source of the first, since a
+        continue token only means something there. Pages are cached, and a
+        query extending one whose cached first page has no next page is
+        answered by filtering it. The counters cover first pages only.
+        """
+        route = source if page > 1 else None
+        key = (query, page, token, route)
+        entry = self._search_cache.get_entry(key)
+        if entry is not None:
+            if page == 1:
+                self.inline_exact_hits += 1
+            return entry.value, *entry.meta
+        if page == 1:
+            filtered = self._filter_cached_prefix(query)
+            if filtered is not None:
+                songs, source = filtered
+                self.inline_prefix_hits += 1
+                self._search_cache.set(key, songs, meta=(False, None, source))
+                return songs, False, None, source
+            self.inline_searches += 1
+        
+        params = {"page": page, "limit": INLINE_SEARCH_LIMIT, "continue_token": token}
+        results = None
+        if route != "api" and self.catalog:
+            results, source = self.catalog.search_prefix(query, **params), "local"
+        if results is None or (route is None and not results.data):
+            if route == "local":
+                # The mirror's position token means nothing to the API: resume there by page number
+                params["continue_token"] = None
+            results, source = await self.api_client.search_prefix(query, **params), "api"
+        songs = [result for result in results.data if result.kind == "song"]
+        has_next = bool(results.data) and bool(results.has_next)
+        logger.info(
+            f"Search page {page} for '{query}' returned {len(results.data)} results, {len(songs)} songs ({source})"
+        )
+        self._search_cache.set(key, songs, meta=(has_next, results.next_token, source))
+        return songs, has_next, results.next_token, source
+    
+    def _filter_cached_prefix(self, query: str) -> Optional[Tuple[List[Any], str]]:
+        """Songs matching query, filtered from the cached complete result of the longest query it extends, and its source
+        
+        Returns None when no shorter query has a complete cached result. Typing
+        "samuel tesfa" sends "sa", "sam", ... in turn; once one of them returns
+        fewer matches than the limit, the rest are answered from it.
+        """
+        key = query_key(query)
+        for end in range(len(key) - 1, 1, -1):
+            entry = self._search_cache.peek((key[:end], 1, None, None))
+            if entry is not None and not entry.meta[0]:
+                # Match the way the source did: the mirror folds Ge'ez spellings, the API does not
+                normalize = normalize_query if entry.meta[2] == "local" else query_key
+                match_key = normalize(query)
+                songs = [song for song in entry.value if segment_prefix_match(normalize(song.title), match_key)]
+                return songs, entry.meta[2]
+        return None
+    
+    def inline_search_stats(self) -> Dict[str, Any]:
+        """How inline queries were answered: exact cache hits, filtered cached prefixes and new searches"""
+        lookups = self.inline_exact_hits + self.inline_prefix_hits + self.inline_searches
+        return {
+            "lookups": lookups,
+            "exact_hits": self.inline_exact_hits,
+            "prefix_hits": self.inline_prefix_hits,
+            "searches": self.inline_searches,
+            "exact_hit_rate": self.inline_exact_hits / lookups if lookups else 0.0,
+            "prefix_hit_rate": self.inline_prefix_hits / lookups if lookups else 0.0,
+        }
+    
+    def superseded_stats(self) -> Dict[str, Any]:
+        """Work saved by cancelling superseded inline queries, and the queries still running
+        
+        A lyrics fetch is counted when the query stops waiting for it; the API client's
+        abandoned_requests counts the upstream requests that were cancelled as a result
+        (one shared with another query's identical call keeps running for that caller).
+        """
+        return {
+            "superseded_queries": self.inline_superseded,
+            "lyrics_fetches_cancelled": self.inline_lyrics_cancelled,
+            "in_flight": len(self._inline_tasks),
+        }
+    
+    def prometheus_metrics(self) -> str:
+        """API client metrics plus inline search counters in the Prometheus text format"""
+        answered = [
+            ("exact_cache", self.inline_exact_hits),
+            ("prefix_cache", self.inline_prefix_hits),
+            ("search", self.inline_searches),
+        ]
+        samples = [("inline_queries_total", {"source": source}, count) for source, count in answered]
+        samples.append(("inline_superseded_total", {}, self.inline_superseded))
+        samples.append(("inline_lyrics_cancelled_total", {}, self.inline_lyrics_cancelled))
+        return self.api_client.prometheus_metrics() + format_samples(self.api_client.metrics.namespace, samples)
+    
+    async def _fetch_inline_lyrics(self, songs: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        """Fetch lyrics for a page of inline results concurrently.
+        
+        Each song gets INLINE_LYRICS_TIMEOUT seconds and the whole page gets
+        INLINE_PAGE_DEADLINE seconds. Songs that fail or miss the deadline
+        come back as None so the caller can show the placeholder instead.
+        """
+        if not songs:
+            return []
+        
+        async def fetch(song):
+            tracer.event("inline.lyrics", title=song.title)
+            return await asyncio.wait_for(self.api_client.get_lyrics(song.title), timeout=INLINE_LYRICS_TIMEOUT)
+        
+        tasks = [asyncio.create_task(fetch(song)) for song in songs]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=INLINE_PAGE_DEADLINE)
+        except asyncio.CancelledError:
+            # The query was superseded: stop its fetches so they do not hold API capacity
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            self.inline_lyrics_cancelled += len(unfinished)
+            raise
+        for task in pending:
+            task.cancel()
+        
+        page_lyrics: List[Optional[Dict[str, Any]]] = []
+        for song, task in zip(songs, tasks):
+            if task in pending:
+                logger.warning(f"Lyrics for {song.title} missed the {INLINE_PAGE_DEADLINE}s inline deadline")
+                page_lyrics.append(None)
+                continue
+            
+            lyrics_error = task.exception()
+            if lyrics_error is None:
+                page_lyrics.append(task.result())
+                continue
+            
+            logger.error(f"Failed to fetch lyrics for {song.title}: {lyrics_error}")
+            logger.error(f"Error type: {type(lyrics_error).__name__}")
+            
+            # Try to get more details about the error if it's an HTTP error
+            if isinstance(lyrics_error, httpx.HTTPStatusError):
+                logger.error(f"HTTP Status: {lyrics_error.response.status_code}")
+                logger.error(f"Response text: {lyrics_error.response.text}")
+            page_lyrics.append(None)
+        
+        return page_lyrics
+    
     async def health_check(self):
         """Check if the API is healthy"""
         try:
@@ -580,6 +835,10 @@ Just click a button below or type any command to get started! 🚀
             logger.error("API is not healthy. Please check the API service.")
             return
         
+        if METRICS_PORT:
+            self._metrics_server = await start_metrics_server(self.prometheus_metrics, port=int(METRICS_PORT))
+            logger.info(f"Serving API metrics on port {METRICS_PORT}")
+        
         # Start the bot
         await self.application.initialize()
         await self.application.start()
@@ -587,6 +846,21 @@ Just click a button below or type any command to get started! 🚀
         # Set bot commands menu
         await self._set_bot_commands()
         
+        # Keep the catalog mirror in sync
+        if self.catalog is not None:
+            if self.application.job_queue is not None:
+                self.catalog.schedule(self.application.job_queue, CATALOG_SYNC_INTERVAL)
+            else:
+                logger.warning("JobQueue not available (install python-telegram-bot[job-queue]); syncing the catalog with a plain task")
+                self._catalog_task = asyncio.create_task(self.catalog.run_periodically(CATALOG_SYNC_INTERVAL))
+        
+        # Keep the full text index up to date
+        if self.search_index is not None:
+            if self.application.job_queue is not None:
+                self.search_index.schedule(self.application.job_queue, SEARCH_INDEX_INTERVAL)
+            else:
+                self._search_index_task = asyncio.create_task(self.search_index.run_periodically(SEARCH_INDEX_INTERVAL))
+        
         if self.application.updater:
             await self.application.updater.start_polling()
         
@@ -609,6 +883,15 @@ Just click a button below or type any command to get started! 🚀
         await self.application.stop()
         await self.application.shutdown()
         
+        if self._catalog_task is not None:
+            self._catalog_task.cancel()
+        if self._search_index_task is not None:
+            self._search_index_task.cancel()
+        
+        if self._metrics_server is not None:
+            self._metrics_server.close()
+            await self._metrics_server.wait_closed()
+        
         # Close API client
         await self.api_client.close()
         
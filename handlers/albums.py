@@ -3,14 +3,18 @@ Albums handlers for the Telegram bot
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from utils.api_client import MezmurAPIClient
+from typing import Awaitable, Callable, List, Optional, Tuple
+from utils.api_client import MezmurAPIClient, PaginatedResponse
+from utils.catalog import CatalogMirror
+from utils.fuzzy import NameMatch, confident_match
 
 
 class AlbumsHandler:
     """Handler for albums-related commands"""
     
-    def __init__(self, api_client: MezmurAPIClient):
+    def __init__(self, api_client: MezmurAPIClient, catalog: Optional[CatalogMirror] = None):
         self.api_client = api_client
+        self.catalog = catalog
     
     async def artist_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /artist command - get albums by artist"""
@@ -83,6 +87,47 @@ class AlbumsHandler:
                 parse_mode='Markdown'
             )
     
+    async def _lookup_resolved(self, name: str, kind: str,
+                               lookup: Callable[[str], Awaitable[PaginatedResponse]]) -> Tuple[str, PaginatedResponse, List[NameMatch]]:
+        """Look up a name as typed, then, only if that finds nothing, its confident fuzzy match from the catalog mirror
+        
+        Returns the name whose result is used, the result, and close matches
+        to suggest when neither lookup found anything. A new artist, or one
+        whose albums the mirror failed to walk, is still found under its exact
+        name instead of being rewritten to a similar mirrored one.
+        """
+        error: Optional[Exception] = None
+        try:
+            result = await lookup(name)
+            if result.data:
+                return name, result, []
+        except Exception as e:
+            error = e
+        
+        matches = self.catalog.resolve(name, kind) if self.catalog else []
+        match = confident_match(matches)
+        if match is not None and match.title != name:
+            resolved = await lookup(match.title)
+            if resolved.data:
+                return match.title, resolved, []
+        if error is not None:
+            raise error
+        return name, result, matches
+    
+    async def _artist_albums(self, artist_name: str, limit: int) -> PaginatedResponse:
+        """Albums of an artist from the catalog mirror, falling back to the API"""
+        albums = self.catalog.artist_albums(artist_name, limit=limit) if self.catalog else None
+        if albums is None:
+            albums = await self.api_client.get_artist_albums(artist_name, limit=limit)
+        return albums
+    
+    async def _album_songs(self, album_title: str, limit: int) -> PaginatedResponse:
+        """Songs of an album from the catalog mirror, falling back to the API"""
+        songs = self.catalog.album_songs(album_title, limit=limit) if self.catalog else None
+        if songs is None:
+            songs = await self.api_client.get_album_songs(album_title, limit=limit)
+        return songs
+    
     async def _get_artist_albums(self, update: Update, context: ContextTypes.DEFAULT_TYPE, artist_name: str):
         """Get albums by artist"""
         if not update.effective_message or not update.effective_chat:
@@ -92,22 +137,27 @@ class AlbumsHandler:
             # Show typing indicator
             await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
             
-            # Get artist albums
-            albums_result = await self.api_client.get_artist_albums(artist_name, limit=20)
+            # Get artist albums, resolving misspelled or differently transliterated names if there are none
+            artist_name, albums_result, suggestions = await self._lookup_resolved(
+                artist_name, "artist", lambda name: self._artist_albums(name, limit=20)
+            )
             
             if not albums_result.data:
-                # Create keyboard with retry and home options
+                # Offer close matches, then retry and home options
                 keyboard = [
-                    [
-                        InlineKeyboardButton("🔄 Try Another Artist", callback_data="search_artist"),
-                        InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")
-                    ]
+                    [InlineKeyboardButton(f"👤 {match.title}", callback_data=f"artist:{match.title}")]
+                    for match in suggestions
                 ]
+                keyboard.append([
+                    InlineKeyboardButton("🔄 Try Another Artist", callback_data="search_artist"),
+                    InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")
+                ])
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
+                hint = "Did you mean one of these artists?" if suggestions else "Please check the artist name and try again."
                 await update.effective_message.reply_text(
                     f"❌ No albums found for '{artist_name}'\n\n"
-                    "Please check the artist name and try again.\n\n"
+                    f"{hint}\n\n"
                     "You can try searching for another artist or go back to the main menu.",
                     parse_mode='Markdown',
                     reply_markup=reply_markup
@@ -117,8 +167,7 @@ class AlbumsHandler:
             # Format albums list
             albums_text = f"👤 **{artist_name}**\n\n💿 **Albums:**\n\n"
             for i, album in enumerate(albums_result.data, 1):
-                album_name = album.title.split("/")[-1] if "/" in album.title else album.title
-                albums_text += f"{i}. {album_name}\n"
+                albums_text += f"{i}. {album.name}\n"
             
             if albums_result.has_next:
                 albums_text += f"\n📄 Showing {len(albums_result.data)} of {albums_result.total} albums"
@@ -126,8 +175,7 @@ class AlbumsHandler:
             # Create inline keyboard for album selection
             keyboard = []
             for album in albums_result.data[:5]:  # Show first 5 albums
-                album_name = album.title.split("/")[-1] if "/" in album.title else album.title
-                button_text = f"💿 {album_name}"
+                button_text = f"💿 {album.name}"
                 callback_data = f"album:{album.title}"
                 keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
             
@@ -160,22 +208,27 @@ class AlbumsHandler:
             # Show typing indicator
             await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
             
-            # Get album songs
-            songs_result = await self.api_client.get_album_songs(album_title, limit=20)
+            # Get album songs, resolving misspelled or partial album titles if there are none
+            album_title, songs_result, suggestions = await self._lookup_resolved(
+                album_title, "album", lambda title: self._album_songs(title, limit=20)
+            )
             
             if not songs_result.data:
-                # Create keyboard with retry and home options
+                # Offer close matches, then retry and home options
                 keyboard = [
-                    [
-                        InlineKeyboardButton("🔄 Try Another Album", callback_data="search_album"),
-                        InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")
-                    ]
+                    [InlineKeyboardButton(f"💿 {match.title}", callback_data=f"album:{match.title}")]
+                    for match in suggestions
                 ]
+                keyboard.append([
+                    InlineKeyboardButton("🔄 Try Another Album", callback_data="search_album"),
+                    InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")
+                ])
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
+                hint = "Did you mean one of these albums?" if suggestions else "Please check the album title and try again."
                 await update.effective_message.reply_text(
                     f"❌ No songs found for '{album_title}'\n\n"
-                    "Please check the album title and try again.\n\n"
+                    f"{hint}\n\n"
                     "You can try searching for another album or go back to the main menu.",
                     parse_mode='Markdown',
                     reply_markup=reply_markup
@@ -186,8 +239,7 @@ class AlbumsHandler:
             album_name = album_title.split("/")[-1] if "/" in album_title else album_title
             songs_text = f"💿 **{album_name}**\n\n🎵 **Songs:**\n\n"
             for i, song in enumerate(songs_result.data, 1):
-                song_name = song.title.split("/")[-1] if "/" in song.title else song.title
-                songs_text += f"{i}. {song_name}\n"
+                songs_text += f"{i}. {song.name}\n"
             
             if songs_result.has_next:
                 songs_text += f"\n📄 Showing {len(songs_result.data)} of {songs_result.total} songs"
@@ -195,8 +247,7 @@ class AlbumsHandler:
             # Create inline keyboard for song selection
             keyboard = []
             for song in songs_result.data[:5]:  # Show first 5 songs
-                song_name = song.title.split("/")[-1] if "/" in song.title else song.title
-                button_text = f"🎵 {song_name}"
+                button_text = f"🎵 {song.name}"
                 callback_data = f"lyrics:{song.title}"
                 keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
             
@@ -253,7 +304,7 @@ class AlbumsHandler:
         try:
             await context.bot.send_chat_action(chat_id=query.message.chat_id, action="album songs")
             
-            songs_result = await self.api_client.get_album_songs(album_title, limit=15)
+            songs_result = await self._album_songs(album_title, limit=15)
             
             if not songs_result.data:
                 # Create keyboard with retry and home options
@@ -276,8 +327,7 @@ class AlbumsHandler:
             album_name = album_title.split("/")[-1] if "/" in album_title else album_title
             songs_text = f"💿 **{album_name}**\n\n🎵 **Songs:**\n\n"
             for i, song in enumerate(songs_result.data, 1):
-                song_name = song.title.split("/")[-1] if "/" in song.title else song.title
-                songs_text += f"{i}. {song_name}\n"
+                songs_text += f"{i}. {song.name}\n"
             
             if songs_result.has_next:
                 songs_text += f"\n📄 Showing {len(songs_result.data)} of {songs_result.total} songs"
@@ -285,8 +335,7 @@ class AlbumsHandler:
             # Create inline keyboard for song selection
             keyboard = []
             for song in songs_result.data[:5]:  # Show first 5 songs
-                song_name = song.title.split("/")[-1] if "/" in song.title else song.title
-                button_text = f"🎵 {song_name}"
+                button_text = f"🎵 {song.name}"
                 callback_data = f"lyrics:{song.title}"  # Store FULL path for lyrics
                 keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
             
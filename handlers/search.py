@@ -3,15 +3,24 @@ Search handlers for the Telegram bot
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from typing import List
-from utils.api_client import MezmurAPIClient, SearchResult
+from typing import List, Optional
+from utils.api_client import MezmurAPIClient, PaginatedResponse, SearchResult
+from utils.catalog import CatalogMirror
+from utils.text_index import SearchIndexer
+from utils.tracing import Tracer
+
+
+tracer = Tracer(__name__)
 
 
 class SearchHandler:
     """Handler for search-related commands"""
     
-    def __init__(self, api_client: MezmurAPIClient):
+    def __init__(self, api_client: MezmurAPIClient, catalog: Optional[CatalogMirror] = None,
+                 search_index: Optional[SearchIndexer] = None):
         self.api_client = api_client
+        self.catalog = catalog
+        self.search_index = search_index
     
     async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /search command - prefix search"""
@@ -49,6 +58,42 @@ class SearchHandler:
         query = " ".join(context.args)
         await self._perform_search(update, context, query, search_type="full")
     
+    async def _search_prefix(self, query: str, limit: int) -> PaginatedResponse:
+        """Prefix search over the catalog mirror, asking the API when the mirror has no match"""
+        results = self.catalog.search_prefix(query, limit=limit) if self.catalog else None
+        if results is None or not results.data:
+            results = await self.api_client.search_prefix(query, limit=limit)
+        return results
+    
+    async def _search_full(self, query: str, limit: int) -> PaginatedResponse:
+        """Full text search over the local index, topped up from the API when the index has less than a page
+        
+        The index only has the lyrics of songs whose lyrics were cached, so the
+        API may match lyrics of other songs; its results follow the local ones.
+        """
+        local = self.search_index.search(query, limit=limit) if self.search_index else None
+        if local is not None and len(local.data) >= limit:
+            return local
+        try:
+            remote = await self.api_client.search_full(query, limit=limit)
+        except Exception:
+            if local is None or not local.data:
+                raise
+            return local
+        if local is None or not local.data:
+            return remote
+        
+        titles = {result.title for result in local.data}
+        data = local.data + [result for result in remote.data if result.title not in titles]
+        return PaginatedResponse(
+            data=data[:limit],
+            total=max(remote.total, len(data)),
+            page=1,
+            limit=limit,
+            has_next=remote.has_next or len(data) > limit,
+            has_prev=False
+        )
+    
     async def _perform_search(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query: str, search_type: str):
         """Perform the actual search"""
         if not update.effective_message or not update.effective_chat:
@@ -60,9 +105,9 @@ class SearchHandler:
             
             # Perform search
             if search_type == "prefix":
-                results = await self.api_client.search_prefix(query, limit=10)
+                results = await self._search_prefix(query, limit=10)
             else:
-                results = await self.api_client.search_full(query, limit=10)
+                results = await self._search_full(query, limit=10)
             
             if not results.data:
                 await update.effective_message.reply_text(
@@ -73,7 +118,9 @@ class SearchHandler:
                 return
             
             # Format results
-            formatted_results = self.api_client.format_search_results(results.data)
+            formatted_results = self.api_client.format_search_results(
+                results.data, show_snippets=search_type == "full"
+            )
             
             # Create response message
             message = f"🔍 **Search Results for '{query}'**\n\n{formatted_results}"
@@ -104,19 +151,15 @@ class SearchHandler:
         keyboard = []
         
         for i, result in enumerate(results[:5]):  # Limit to 5 results
-            # Determine result type and create appropriate button
-            slash_count = result.title.count("/")
-            
-            if slash_count == 0:  # Artist
+            # Create the button for the result type
+            if result.kind == "artist":
                 button_text = f"👤 {result.title}"
                 callback_data = f"artist:{result.title}"
-            elif slash_count == 1:  # Album
-                album_name = result.title.split("/")[-1]
-                button_text = f"💿 {album_name}"
+            elif result.kind == "album":
+                button_text = f"💿 {result.name}"
                 callback_data = f"album:{result.title}"
-            else:  # Song
-                song_name = result.title.split("/")[-1]
-                button_text = f"🎵 {song_name}"
+            else:
+                button_text = f"🎵 {result.name}"
                 callback_data = f"lyrics:{result.title}"
             
             keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
@@ -184,8 +227,7 @@ class SearchHandler:
             # Format albums
             albums_text = "💿 **Albums:**\n"
             for album in albums_result.data:
-                album_name = album.title.split("/")[-1] if "/" in album.title else album.title
-                albums_text += f"• {album_name}\n"
+                albums_text += f"• {album.name}\n"
             
             message = f"👤 **{artist_name}**\n\n{albums_text}"
             
@@ -230,8 +272,7 @@ class SearchHandler:
             album_name = album_title.split("/")[-1] if "/" in album_title else album_title
             songs_text = f"💿 **{album_name}**\n\n🎵 **Songs:**\n\n"
             for i, song in enumerate(songs_result.data, 1):
-                song_name = song.title.split("/")[-1] if "/" in song.title else song.title
-                songs_text += f"{i}. {song_name}\n"
+                songs_text += f"{i}. {song.name}\n"
             
             if songs_result.has_next:
                 songs_text += f"\n📄 Showing {len(songs_result.data)} of {songs_result.total} songs"
@@ -239,14 +280,13 @@ class SearchHandler:
             # Create inline keyboard for song selection
             keyboard = []
             for song in songs_result.data[:5]:  # Show first 5 songs
-                song_name = song.title.split("/")[-1] if "/" in song.title else song.title
-                button_text = f"🎵 {song_name}"
+                button_text = f"🎵 {song.name}"
                 
                 # Construct full path: album_title/song_name
-                full_song_path = f"{album_title}/{song_name}"
+                full_song_path = f"{album_title}/{song.name}"
                 callback_data = f"lyrics:{full_song_path}"
+                tracer.event("album.song_button", album=album_title, song=song.name, callback=callback_data)
                 
-                print(f"DEBUG: Song button created - Song name: '{song_name}', Album: '{album_title}', Full path: '{full_song_path}', Callback: '{callback_data}'")
                 keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
             
             if len(songs_result.data) > 5:
@@ -274,7 +314,7 @@ class SearchHandler:
         try:
             await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
             
-            print(f"DEBUG: Lyrics handler called with song_title: '{song_title}'")
+            tracer.event("lyrics.show", song_title=song_title)
             
             # Get regular lyrics
             lyrics_data = await self.api_client.get_lyrics(song_title)
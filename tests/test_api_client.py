@@ -1,10 +1,17 @@
 """
 Tests for the MezmurAPIClient class
 """
+import asyncio
+import gc
+import gzip
+import json
+import time
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
-from utils.api_client import MezmurAPIClient, SearchResult, Artist, Album, RichLyrics
+from utils.api_client import STREAM_CHUNK_BYTES, MezmurAPIClient, SearchResult, Artist, Album, Song, RichLyrics, TransportConfig, build_http_client, decode_page, parse_title
+from utils.resilience import DeadlineExceededError, HedgePolicy, RetryPolicy
+from benchmarks.stub_api import StubAPI
 
 
 class TestMezmurAPIClient:
@@ -336,3 +343,1004 @@ class TestMezmurAPIClient:
         assert lyrics.album == "Test Album"
         assert lyrics.html_content == "<b>Test Song</b> lyrics content"
         assert lyrics.page_id == 123
+
+
+def make_client(handler, **kwargs) -> MezmurAPIClient:
+    """Build a client whose HTTP transport is served by a local handler function"""
+    client = MezmurAPIClient("http://test.api", **kwargs)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+class TestResponseCache:
+    """Test cases for the opt-in response cache"""
+    
+    @staticmethod
+    def lyrics_handler(calls):
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": f"version {len(calls)}"})
+        return handler
+    
+    @pytest.mark.asyncio
+    async def test_cache_disabled_by_default(self):
+        """Test every call goes to the API when caching is off"""
+        calls = []
+        client = make_client(self.lyrics_handler(calls))
+        
+        await client.get_lyrics("A/B/Yekebere")
+        await client.get_lyrics("A/B/Yekebere")
+        
+        assert len(calls) == 2
+        assert client.cache_stats() == {}
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_fresh_entry_served_from_cache(self):
+        """Test a fresh entry is served without another request"""
+        calls = []
+        client = make_client(self.lyrics_handler(calls), enable_cache=True)
+        
+        first = await client.get_lyrics("A/B/Yekebere")
+        second = await client.get_lyrics("A/B/Yekebere")
+        
+        assert first == second
+        assert len(calls) == 1
+        assert client.cache_stats()["hits"] == 1
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_revalidating(self):
+        """Test a stale entry is returned immediately and refreshed in the background"""
+        calls = []
+        client = make_client(self.lyrics_handler(calls), enable_cache=True, cache_ttls={"lyrics": 10})
+        now = [0.0]
+        client.cache.clock = lambda: now[0]
+        
+        await client.get_lyrics("A/B/Yekebere")
+        now[0] = 11.0
+        stale = await client.get_lyrics("A/B/Yekebere")
+        assert stale["lyrics"] == "version 1"
+        
+        await asyncio.gather(*client._refresh_tasks.values())
+        refreshed = await client.get_lyrics("A/B/Yekebere")
+        
+        assert refreshed["lyrics"] == "version 2"
+        assert client.cache_stats()["stale_served"] == 1
+        assert client.cache_stats()["refreshes"] == 1
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_endpoint_without_ttl_not_cached(self):
+        """Test endpoints with a zero TTL bypass the cache"""
+        calls = []
+        client = make_client(self.lyrics_handler(calls), enable_cache=True, cache_ttls={"lyrics": 0})
+        
+        await client.get_lyrics("A/B/Yekebere")
+        await client.get_lyrics("A/B/Yekebere")
+        
+        assert len(calls) == 2
+        await client.close()
+    
+    
+    @pytest.mark.asyncio
+    async def test_search_spellings_sent_as_typed(self):
+        """Test searches differing in case or spacing share an entry, but other Ge'ez spellings go to the API"""
+        queries = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            queries.append(request.url.params["q"])
+            return httpx.Response(200, json={"data": [], "total": 0, "page": 1, "limit": 10, "has_next": False, "has_prev": False})
+        
+        client = make_client(handler, enable_cache=True, cache_ttls={"search_prefix": 60})
+        
+        await client.search_prefix("ሠላም ሐዋርያ Samuel")
+        await client.search_prefix("ሠላም  ሐዋርያ samuel")
+        await client.search_prefix("ሰላም ሀዋርያ samuel")
+        
+        assert queries == ["ሠላም ሐዋርያ Samuel", "ሰላም ሀዋርያ samuel"]
+        assert client.cache_stats()["hits"] == 1
+        await client.close()
+
+
+class TestConditionalRevalidation:
+    """Test cases for ETag/Last-Modified revalidation against the local stub API"""
+    
+    SONG = "Artist 000/Album 00/Song 000"
+    
+    @staticmethod
+    def stale_client(stub: StubAPI):
+        client = MezmurAPIClient(stub.url, enable_cache=True, cache_ttls={"rich_lyrics": 10, "lyrics": 10})
+        now = [0.0]
+        client.cache.clock = lambda: now[0]
+        return client, now
+    
+    @staticmethod
+    async def refresh(client: MezmurAPIClient):
+        await asyncio.gather(*client._refresh_tasks.values())
+    
+    @pytest.mark.asyncio
+    async def test_not_modified_refreshes_entry(self):
+        """Test a 304 keeps the cached value and makes it fresh again"""
+        with StubAPI() as stub:
+            client, now = self.stale_client(stub)
+            first = await client.get_rich_lyrics(self.SONG)
+            
+            now[0] = 11.0
+            assert await client.get_rich_lyrics(self.SONG) is first
+            await self.refresh(client)
+            
+            assert await client.get_rich_lyrics(self.SONG) is first
+            stats = client.cache_stats()
+            assert stats["revalidations"] == 1
+            assert stats["not_modified"] == 1
+            assert stats["refreshes"] == 1
+            assert stub.not_modified == 1
+            assert client.metrics.snapshot()["rich_lyrics"]["errors"] == {}
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_changed_resource_is_replaced(self):
+        """Test a changed resource comes back in full and replaces the entry"""
+        with StubAPI() as stub:
+            client, now = self.stale_client(stub)
+            first = await client.get_rich_lyrics(self.SONG)
+            
+            stub.touch(self.SONG)
+            now[0] = 11.0
+            await client.get_rich_lyrics(self.SONG)
+            await self.refresh(client)
+            
+            updated = await client.get_rich_lyrics(self.SONG)
+            assert updated.html_content == first.html_content + "<br>"
+            assert client.cache_stats()["not_modified"] == 0
+            
+            # The new validators are used for the next revalidation
+            now[0] = 22.0
+            await client.get_rich_lyrics(self.SONG)
+            await self.refresh(client)
+            assert client.cache_stats()["not_modified"] == 1
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_without_validators_refetches_in_full(self):
+        """Test responses without validators are refreshed with plain GETs"""
+        with StubAPI(validators=False) as stub:
+            client, now = self.stale_client(stub)
+            await client.get_lyrics(self.SONG)
+            
+            now[0] = 11.0
+            await client.get_lyrics(self.SONG)
+            await self.refresh(client)
+            
+            stats = client.cache_stats()
+            assert stats["revalidations"] == 0
+            assert stats["refreshes"] == 1
+            assert stub.requests == 2
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_last_modified_only(self):
+        """Test If-Modified-Since is used when the API sends only Last-Modified"""
+        requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.headers.get("if-modified-since"))
+            if request.headers.get("if-modified-since") == "Tue, 14 Nov 2023 22:13:20 GMT":
+                return httpx.Response(304)
+            return httpx.Response(
+                200, json={"title": "Yekebere", "lyrics": "..."},
+                headers={"Last-Modified": "Tue, 14 Nov 2023 22:13:20 GMT"}
+            )
+        
+        client = make_client(handler, enable_cache=True, cache_ttls={"lyrics": 10})
+        now = [0.0]
+        client.cache.clock = lambda: now[0]
+        await client.get_lyrics("A/B/Yekebere")
+        now[0] = 11.0
+        await client.get_lyrics("A/B/Yekebere")
+        await self.refresh(client)
+        
+        assert requests == [None, "Tue, 14 Nov 2023 22:13:20 GMT"]
+        assert client.cache_stats()["not_modified"] == 1
+        await client.close()
+
+
+class TestRequestCoalescing:
+    """Test cases for single-flight request coalescing"""
+    
+    @staticmethod
+    def slow_handler(calls):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(str(request.url))
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": "..."})
+        return handler
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_request(self):
+        """Test concurrent calls for the same song send one request"""
+        calls = []
+        client = make_client(self.slow_handler(calls))
+        
+        results = await asyncio.gather(*[client.get_lyrics("A/B/Yekebere") for _ in range(10)])
+        
+        assert len(calls) == 1
+        assert all(result == results[0] for result in results)
+        assert client.coalesced_requests == 9
+        assert not client._inflight
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_different_params_not_coalesced(self):
+        """Test calls with different parameters are sent separately"""
+        calls = []
+        client = make_client(self.slow_handler(calls))
+        
+        await asyncio.gather(client.get_lyrics("A/B/One"), client.get_lyrics("A/B/Two"))
+        
+        assert len(calls) == 2
+        assert client.coalesced_requests == 0
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_errors_shared_with_waiters(self):
+        """Test a failed request fails every coalesced caller"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(404, json={"detail": "Not found"})
+        
+        client = make_client(handler)
+        results = await asyncio.gather(
+            *[client.get_rich_lyrics("Missing/Song") for _ in range(3)],
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(result, Exception) for result in results)
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Test cancelling one waiter leaves the shared request running"""
+        calls = []
+        client = make_client(self.slow_handler(calls))
+        
+        first = asyncio.ensure_future(client.get_lyrics("A/B/Yekebere"))
+        second = asyncio.ensure_future(client.get_lyrics("A/B/Yekebere"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        
+        result = await second
+        assert result["title"] == "Yekebere"
+        assert len(calls) == 1
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_coalescing_can_be_disabled(self):
+        """Test every call is sent when coalescing is off"""
+        calls = []
+        client = make_client(self.slow_handler(calls), coalesce_requests=False)
+        
+        await asyncio.gather(*[client.get_lyrics("A/B/Yekebere") for _ in range(3)])
+        
+        assert len(calls) == 3
+        await client.close()
+
+
+class TestTransportConfig:
+    """Test cases for transport configuration"""
+    
+    def test_defaults(self, monkeypatch):
+        """Test default pool and timeout settings"""
+        for name in ("API_MAX_CONNECTIONS", "API_READ_TIMEOUT", "API_UDS", "API_HTTP2"):
+            monkeypatch.delenv(name, raising=False)
+        config = TransportConfig.from_env()
+        
+        assert config == TransportConfig()
+        assert config.timeout().read == 30.0
+        assert config.limits().max_connections == 100
+    
+    def test_from_env(self, monkeypatch):
+        """Test settings are read from API_* environment variables"""
+        monkeypatch.setenv("API_MAX_CONNECTIONS", "8")
+        monkeypatch.setenv("API_MAX_KEEPALIVE_CONNECTIONS", "4")
+        monkeypatch.setenv("API_KEEPALIVE_EXPIRY", "60")
+        monkeypatch.setenv("API_CONNECT_TIMEOUT", "2.5")
+        monkeypatch.setenv("API_POOL_TIMEOUT", "1")
+        monkeypatch.setenv("API_UDS", "/tmp/mezmur.sock")
+        config = TransportConfig.from_env()
+        
+        assert config.max_connections == 8
+        assert config.max_keepalive_connections == 4
+        assert config.keepalive_expiry == 60.0
+        assert config.connect_timeout == 2.5
+        assert config.pool_timeout == 1.0
+        assert config.uds == "/tmp/mezmur.sock"
+    
+    @pytest.mark.asyncio
+    async def test_client_uses_config(self):
+        """Test the client applies the configured timeouts"""
+        config = TransportConfig(connect_timeout=1.0, read_timeout=2.0, pool_timeout=3.0)
+        client = MezmurAPIClient("http://test.api", transport_config=config)
+        
+        assert client.client.timeout.connect == 1.0
+        assert client.client.timeout.read == 2.0
+        assert client.client.timeout.pool == 3.0
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_http2_without_h2_falls_back(self):
+        """Test HTTP/2 is skipped with a warning when h2 is missing"""
+        try:
+            import h2  # noqa: F401
+            pytest.skip("h2 is installed")
+        except ImportError:
+            pass
+        client = build_http_client(TransportConfig(http2=True))
+        
+        assert client is not None
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_compression_negotiated(self):
+        """Test requests ask for compressed bodies unless compression is turned off"""
+        sent = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request.headers["accept-encoding"])
+            return httpx.Response(200, json={"status": "healthy"})
+        
+        for compression in (True, False):
+            client = MezmurAPIClient("http://test.api", transport_config=TransportConfig(compression=compression),
+                                     transport=httpx.MockTransport(handler))
+            await client.health_check()
+            await client.close()
+        
+        assert sent[0] in ("gzip", "br, gzip")
+        assert sent[1] == "identity"
+
+
+class TestPageIterators:
+    """Test cases for the async page iterators"""
+    
+    @staticmethod
+    def paged_handler(titles, calls, namespace=True):
+        def handler(request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params.get("page", 1))
+            limit = int(request.url.params.get("limit", 10))
+            token = request.url.params.get("continue_token")
+            start = int(token) if token else (page - 1) * limit
+            calls.append(start)
+            chunk = titles[start:start + limit]
+            end = start + len(chunk)
+            return httpx.Response(200, json={
+                "data": [{"title": t, "pageid": i, "namespace": 0} for i, t in enumerate(chunk, start)],
+                "total": len(titles),
+                "page": page,
+                "limit": limit,
+                "has_next": end < len(titles),
+                "has_prev": start > 0,
+                "next_token": str(end) if end < len(titles) else None
+            })
+        return handler
+    
+    @pytest.mark.asyncio
+    async def test_iter_artists_follows_next_token(self):
+        """Test all artists are yielded across pages"""
+        titles = [f"Artist {i}" for i in range(23)]
+        calls = []
+        client = make_client(self.paged_handler(titles, calls))
+        
+        artists = [artist async for artist in client.iter_artists(page_size=10)]
+        
+        assert [artist.title for artist in artists] == titles
+        assert calls == [0, 10, 20]
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_iter_album_songs_follows_has_next(self):
+        """Test album songs are walked by page number"""
+        titles = [f"A/B/Song {i}" for i in range(7)]
+        calls = []
+        client = make_client(self.paged_handler(titles, calls))
+        
+        songs = [song async for song in client.iter_album_songs("A/B", page_size=3)]
+        
+        assert len(songs) == 7
+        assert isinstance(songs[0], Song)
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_next_page_prefetched(self):
+        """Test page 2 is requested while page 1 is still being consumed"""
+        titles = [f"Artist {i}/Album {i}" for i in range(20)]
+        calls = []
+        client = make_client(self.paged_handler(titles, calls))
+        
+        iterator = client.iter_artist_albums("Artist", page_size=10)
+        first = await iterator.__anext__()
+        await asyncio.sleep(0.01)
+        
+        assert first.title == titles[0]
+        assert calls == [0, 10]
+        await iterator.aclose()
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_no_prefetch(self):
+        """Test prefetching can be turned off"""
+        titles = [f"Artist {i}" for i in range(20)]
+        calls = []
+        client = make_client(self.paged_handler(titles, calls))
+        
+        iterator = client.iter_artists(page_size=10, prefetch=False)
+        await iterator.__anext__()
+        await asyncio.sleep(0.01)
+        
+        assert calls == [0]
+        await iterator.aclose()
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_early_stop_drops_prefetch(self):
+        """Test stopping early cancels a running prefetch and retrieves a failed one"""
+        titles = [f"Artist {i}" for i in range(20)]
+        calls = []
+        paged = self.paged_handler(titles, calls)
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.params.get("continue_token") == "10":
+                await asyncio.sleep(float(request.url.host == "slow.api"))
+                return httpx.Response(500, json={"detail": "boom"})
+            return paged(request)
+        
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+        try:
+            for host in ("test.api", "slow.api"):
+                client = make_client(handler, retry_policy=RetryPolicy(attempts=1))
+                client.base_url = f"http://{host}"
+                async for artist in client.iter_artists(page_size=10):
+                    await asyncio.sleep(0.01)
+                    break
+                await asyncio.sleep(0.01)
+                gc.collect()
+                await client.close()
+        finally:
+            loop.set_exception_handler(None)
+        
+        assert unhandled == []
+        assert calls == [0, 0]
+
+
+class TestBulkLyrics:
+    """Test cases for get_lyrics_many / iter_lyrics_many"""
+    
+    @staticmethod
+    def tracking_handler(state):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            title = request.url.path.split("/lyrics/", 1)[1]
+            if title.endswith("Missing"):
+                return httpx.Response(404, json={"detail": "Not found"})
+            return httpx.Response(200, json={"title": title.split("/")[-1], "lyrics": "..."})
+        return handler
+    
+    @pytest.mark.asyncio
+    async def test_get_lyrics_many_captures_errors(self):
+        """Test per-title errors are returned instead of raised"""
+        state = {"active": 0, "peak": 0}
+        client = make_client(self.tracking_handler(state))
+        
+        results = await client.get_lyrics_many(["A/B/One", "A/B/Missing", "A/B/Two"])
+        
+        assert set(results) == {"A/B/One", "A/B/Missing", "A/B/Two"}
+        assert results["A/B/One"].ok
+        assert results["A/B/One"].lyrics["title"] == "One"
+        assert not results["A/B/Missing"].ok
+        assert results["A/B/Missing"].error is not None
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self):
+        """Test a single bulk call respects its concurrency"""
+        state = {"active": 0, "peak": 0}
+        client = make_client(self.tracking_handler(state))
+        
+        titles = [f"A/B/Song {i}" for i in range(12)]
+        results = [result async for result in client.iter_lyrics_many(titles, concurrency=3)]
+        
+        assert len(results) == 12
+        assert state["peak"] <= 3
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_shared_limiter_caps_all_bulk_callers(self):
+        """Test concurrent bulk calls share the client-wide limiter"""
+        state = {"active": 0, "peak": 0}
+        client = make_client(self.tracking_handler(state), bulk_concurrency=2)
+        
+        await asyncio.gather(
+            client.get_lyrics_many([f"A/B/One {i}" for i in range(5)], concurrency=4),
+            client.get_lyrics_many([f"A/B/Two {i}" for i in range(5)], concurrency=4)
+        )
+        
+        assert state["peak"] <= 2
+        await client.close()
+
+
+class TestResilience:
+    """Test cases for retries and circuit breaking in the client"""
+    
+    @pytest.mark.asyncio
+    async def test_transient_502_is_retried(self):
+        """Test a 502 followed by success returns the successful response"""
+        statuses = [502, 200]
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            status = statuses.pop(0)
+            return httpx.Response(status, json={"title": "Yekebere", "lyrics": "..."})
+        
+        client = make_client(handler, retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        result = await client.get_lyrics("A/B/Yekebere")
+        
+        assert result["title"] == "Yekebere"
+        assert client.breaker_stats()["retries"] == 1
+        assert client.breaker_stats()["endpoints"]["lyrics"]["state"] == "closed"
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_connection_reset_is_retried(self):
+        """Test transport errors are retried"""
+        calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(1)
+            if len(calls) == 1:
+                raise httpx.ReadError("connection reset", request=request)
+            return httpx.Response(200, json={"data": [], "total": 0, "page": 1, "limit": 10,
+                                             "has_next": False, "has_prev": False})
+        
+        client = make_client(handler, retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        result = await client.search_prefix("samuel")
+        
+        assert result.total == 0
+        assert len(calls) == 2
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_not_found_is_not_retried(self):
+        """Test client errors fail immediately"""
+        calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(1)
+            return httpx.Response(404, json={"detail": "Not found"})
+        
+        client = make_client(handler, retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        with pytest.raises(Exception):
+            await client.get_rich_lyrics("Missing/Song")
+        
+        assert len(calls) == 1
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_breaker_fails_fast(self):
+        """Test an open breaker rejects calls without touching the network"""
+        calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(1)
+            return httpx.Response(503)
+        
+        client = make_client(handler, retry_policy=RetryPolicy(attempts=1), breaker_threshold=2)
+        for _ in range(2):
+            with pytest.raises(Exception):
+                await client.get_lyrics("A/B/Yekebere")
+        
+        with pytest.raises(Exception, match="unavailable"):
+            await client.get_lyrics("A/B/Other")
+        
+        assert len(calls) == 2
+        stats = client.breaker_stats()["endpoints"]["lyrics"]
+        assert stats["state"] == "open"
+        assert stats["rejected"] == 1
+        await client.close()
+
+
+class TestDeadlines:
+    """Test cases for per-call time budgets"""
+    
+    @staticmethod
+    def slow_handler(delay):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(delay)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": "..."})
+        return handler
+    
+    @staticmethod
+    def timed_handler(delay, calls):
+        """Handler answering after delay seconds unless the request's read timeout expires first, like a socket"""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(1)
+            read_timeout = request.extensions.get("timeout", {}).get("read") or delay
+            await asyncio.sleep(min(delay, read_timeout))
+            if read_timeout < delay:
+                raise httpx.ReadTimeout("timed out", request=request)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": "..."})
+        return handler
+    
+    @pytest.mark.asyncio
+    async def test_slow_call_raises_typed_error(self):
+        """Test a call running past its budget raises DeadlineExceededError promptly"""
+        client = make_client(self.slow_handler(1.0))
+        
+        started = time.monotonic()
+        with client.budget(0.05):
+            with pytest.raises(DeadlineExceededError) as raised:
+                await client.get_lyrics("A/B/Yekebere")
+        
+        assert time.monotonic() - started < 0.5
+        assert isinstance(raised.value, TimeoutError)
+        assert (raised.value.endpoint, raised.value.budget) == ("lyrics", 0.05)
+        assert client.breaker_stats()["deadlines_exceeded"] == 1
+        assert client.metrics.snapshot()["lyrics"]["errors"] == {"DeadlineExceededError": 1}
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_shared_and_per_call_budgets(self):
+        """Test calls in a block share its deadline unless each gets its own"""
+        client = make_client(self.slow_handler(0.05))
+        
+        with client.budget(0.2, per_call=True):
+            for _ in range(3):
+                await client.get_lyrics("A/B/Yekebere")
+        with client.budget(0.08):
+            await client.get_lyrics("A/B/Yekebere")
+            with pytest.raises(DeadlineExceededError):
+                await client.get_lyrics("A/B/Yekebere")
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_no_retry_past_deadline(self):
+        """Test a retry that could not start before the deadline is skipped"""
+        calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(1)
+            return httpx.Response(503)
+        
+        client = make_client(handler)
+        client.retry_policy.backoff = lambda attempt: 5.0
+        
+        with client.budget(1.0):
+            with pytest.raises(Exception, match="503"):
+                await client.get_lyrics("A/B/Yekebere")
+        
+        assert len(calls) == 1 and client.retries == 0
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_callers_keep_own_budgets(self):
+        """Test a shared request is not bound by the budget of the caller that started it"""
+        calls = []
+        client = make_client(self.timed_handler(0.2, calls))
+        
+        async def fetch(seconds):
+            with client.budget(seconds):
+                return await client.get_lyrics("A/B/Yekebere")
+        
+        short, long = await asyncio.gather(fetch(0.05), fetch(5.0), return_exceptions=True)
+        
+        assert isinstance(short, DeadlineExceededError) and short.budget == 0.05
+        assert long["title"] == "Yekebere"
+        assert len(calls) == 1 and client.coalesced_requests == 1
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_repeated_calls_against_hung_api(self):
+        """Test every call joining a request that outlived an earlier caller gets its own full budget"""
+        client = make_client(self.timed_handler(10.0, []), retry_policy=RetryPolicy(attempts=1))
+        
+        for _ in range(3):
+            started = time.monotonic()
+            with client.budget(0.1):
+                with pytest.raises(DeadlineExceededError):
+                    await client.get_lyrics("A/B/Yekebere")
+            assert time.monotonic() - started >= 0.09
+        
+        assert client.breaker_stats()["deadlines_exceeded"] == 3
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_transport_timeout_is_typed(self):
+        """Test an httpx timeout capped by the deadline raises DeadlineExceededError, not the fetcher's wrapper"""
+        client = make_client(self.timed_handler(1.0, []), retry_policy=RetryPolicy(attempts=1))
+        
+        with client.budget(0.1):
+            with pytest.raises(DeadlineExceededError):
+                await client.get_lyrics("A/B/Yekebere")
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_transport_timeout_with_budget_left(self):
+        """Test an httpx timeout firing before the deadline is not reported as the budget running out"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ReadTimeout("timed out", request=request)
+        
+        client = make_client(handler, retry_policy=RetryPolicy(attempts=1))
+        
+        with client.budget(5.0):
+            with pytest.raises(Exception, match="timed out") as raised:
+                await client.get_lyrics("A/B/Yekebere")
+        
+        assert not isinstance(raised.value, DeadlineExceededError)
+        assert client.breaker_stats()["deadlines_exceeded"] == 0
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_shared_request_bound_by_waiters(self):
+        """Test a coalesced request's attempts are capped by the latest deadline among its waiters"""
+        timeouts = []
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            timeouts.append(request.extensions["timeout"]["read"])
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": "..."})
+        
+        client = make_client(handler)
+        
+        async def fetch(seconds):
+            with client.budget(seconds):
+                return await client.get_lyrics("A/B/Yekebere")
+        
+        await asyncio.gather(fetch(0.5), fetch(1.0))
+        
+        assert len(timeouts) == 1 and 0.5 < timeouts[0] <= 1.0
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_abandoned_request_is_cancelled(self):
+        """Test the upstream request is cancelled once every caller waiting for it has gone"""
+        started, finished = [], []
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            started.append(1)
+            await asyncio.sleep(0.5)
+            finished.append(1)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": "..."})
+        
+        client = make_client(handler, retry_policy=RetryPolicy(attempts=1))
+        
+        with client.budget(0.1):
+            with pytest.raises(DeadlineExceededError):
+                await client.get_lyrics("A/B/Yekebere")
+        task = asyncio.create_task(client.get_lyrics("A/B/Yekebere"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.sleep(0.6)
+        
+        assert len(started) == 2 and not finished
+        assert not client._inflight and client.abandoned_requests == 2
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_without_budget(self):
+        """Test calls outside a budget block use the transport timeouts only"""
+        client = make_client(self.slow_handler(0.05))
+        
+        assert (await client.get_lyrics("A/B/Yekebere"))["title"] == "Yekebere"
+        assert client.breaker_stats()["deadlines_exceeded"] == 0
+        await client.close()
+
+
+class TestHedging:
+    """Test cases for hedged lyrics requests"""
+    
+    @staticmethod
+    def make_hedged_client(delays, **policy):
+        """Client whose nth request answers after delays[n] seconds, with 20 fast latencies already seen"""
+        calls = []
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            delay = delays[len(calls)]
+            calls.append(delay)
+            await asyncio.sleep(delay)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": f"after {delay}s"})
+        
+        client = make_client(handler, hedge_policy=HedgePolicy(**{"budget": 1.0, **policy}))
+        for hedger in client.hedgers.values():
+            for _ in range(20):
+                hedger.observe(0.01)
+        return client, calls
+    
+    @pytest.mark.asyncio
+    async def test_slow_request_hedged(self):
+        """Test a duplicate is sent once the first attempt is slower than usual, and the faster answer wins"""
+        client, calls = self.make_hedged_client([1.0, 0.0])
+        
+        started = time.monotonic()
+        result = await client.get_lyrics("A/B/Yekebere")
+        
+        assert time.monotonic() - started < 0.5
+        assert result["lyrics"] == "after 0.0s"
+        assert client.hedge_stats()["lyrics"]["wins"] == 1
+        assert calls == [1.0, 0.0]
+        assert 'mezmur_api_hedge_wins_total{endpoint="lyrics"} 1' in client.prometheus_metrics()
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_first_attempt_latency_tracked(self):
+        """Test the hedge delay learns from first attempts, not from the hedges that beat them"""
+        client, calls = self.make_hedged_client([0.3, 0.0, 0.05, 1.0])
+        hedger = client.hedgers["lyrics"]
+        
+        await client.get_lyrics("A/B/One")
+        assert hedger.latency.count == 21
+        assert hedger.latency.recent[-1] >= hedger.policy.min_delay
+        
+        await client.get_lyrics("A/B/Two")
+        assert hedger.latency.count == 22
+        assert 0.05 <= hedger.latency.recent[-1] < 0.3
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_first_answer_still_used(self):
+        """Test the first attempt is used when it answers before the hedge"""
+        client, calls = self.make_hedged_client([0.05, 1.0])
+        
+        result = await client.get_lyrics("A/B/Yekebere")
+        
+        assert result["lyrics"] == "after 0.05s"
+        stats = client.hedge_stats()["lyrics"]
+        assert (stats["hedges"], stats["wins"], stats["losses"]) == (1, 0, 1)
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_hedge_budget(self):
+        """Test hedges stop once the budget is spent, and nothing is hedged before enough samples"""
+        client, calls = self.make_hedged_client([0.03] * 4, budget=0.5)
+        
+        for _ in range(2):
+            await client.get_lyrics("A/B/Yekebere")
+        
+        stats = client.hedge_stats()["lyrics"]
+        assert (stats["requests"], stats["hedges"], stats["throttled"]) == (2, 1, 1)
+        
+        cold = make_client(lambda request: httpx.Response(200, json={"lyrics": "..."}), hedge_policy=HedgePolicy())
+        await cold.get_lyrics("A/B/Yekebere")
+        assert cold.hedge_stats()["lyrics"]["hedges"] == 0
+        assert make_client(lambda request: None).hedgers == {}
+        await client.close()
+        await cold.close()
+
+
+class TestDecoding:
+    """Test cases for the shared decode path"""
+    
+    def test_models_are_slotted(self):
+        """Test result models do not carry a per-instance __dict__"""
+        for model in (SearchResult("A", 1), Artist("A", 1, 0), Album("A/B", 2, 0), Song("A/B/C", 3, 0),
+                      RichLyrics("C", "<p>...</p>")):
+            assert not hasattr(model, "__dict__")
+    
+    def test_titles_parsed_once(self):
+        """Test results parse their kind, artist, album and display name on first use, not at decode"""
+        song = SearchResult.from_dict({"title": "Aster Abebe/Amlakie/Selam", "pageid": 5})
+        assert song._parsed is None
+        
+        assert (song.kind, song.artist, song.album, song.name) == ("song", "Aster Abebe", "Amlakie", "Selam")
+        assert parse_title("Aster Abebe/Amlakie") == ("album", "Aster Abebe", "Amlakie", "Amlakie")
+        assert parse_title("Aster Abebe") == ("artist", "Aster Abebe", None, "Aster Abebe")
+        assert Album("Aster Abebe/Amlakie", 2, 0).name == "Amlakie"
+        assert Song.from_dict({"title": "A/B/C", "pageid": 3, "namespace": 0}).name == "C"
+        assert song == SearchResult("Aster Abebe/Amlakie/Selam", 5)
+    
+    def test_categorize_and_format(self):
+        """Test results are grouped by kind and listed by display name"""
+        client = MezmurAPIClient("http://test.api")
+        results = [SearchResult(title, i) for i, title in enumerate(["A/B/C", "A", "A/B", "A/D/E"])]
+        
+        categorized = client.categorize_search_results(results)
+        formatted = client.format_search_results(results)
+        
+        assert {kind: [r.title for r in found] for kind, found in categorized.items()} == {
+            "artists": ["A"], "albums": ["A/B"], "songs": ["A/B/C", "A/D/E"]
+        }
+        assert formatted.splitlines() == ["👤 **ARTISTS**", "• A", "", "💿 **ALBUMS**", "• B", "", "🎵 **SONGS**", "• C", "• E"]
+    
+    def test_decode_page(self):
+        """Test a paginated payload is decoded with the given item factory"""
+        payload = {
+            "data": [{"title": "A/B/C", "pageid": 3, "namespace": 0, "artist": "A"}],
+            "total": 1, "page": 1, "limit": 10, "has_next": False, "has_prev": False
+        }
+        page = decode_page(payload, Song.from_dict)
+        
+        assert page.data == [Song("A/B/C", 3, 0, artist="A")]
+        assert page.total == 1
+        assert page.next_token is None
+    
+    @pytest.mark.asyncio
+    async def test_custom_json_backend(self):
+        """Test the client decodes bodies with the configured JSON backend"""
+        decoded = []
+        
+        def loads(body):
+            decoded.append(body)
+            return json.loads(body)
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"data": [{"title": "A", "pageid": 1, "namespace": 0}],
+                                             "total": 1, "page": 1, "limit": 20,
+                                             "has_next": False, "has_prev": False})
+        
+        client = make_client(handler, json_loads=loads)
+        result = await client.get_artists()
+        
+        assert result.data == [Artist("A", 1, 0)]
+        assert len(decoded) == 1
+        await client.close()
+
+
+class TestStreamedDecoding:
+    """Test cases for decoding large rich lyrics bodies as they stream in"""
+    
+    PAYLOAD = {
+        "title": "ቅዱስ",
+        "html_content": "<p>ሃሌ ሉያ \"ቅዱስ\" ቅዱስ</p>\n" * 20000,
+        "artist": "Aster Abebe",
+        "album": None,
+        "page_id": 7,
+    }
+    
+    @pytest.mark.asyncio
+    async def test_large_gzip_body_streamed(self):
+        """Test a large compressed body is decoded incrementally, without the whole-body JSON decoder"""
+        body = json.dumps(self.PAYLOAD, ensure_ascii=False).encode()
+        assert len(body) > STREAM_CHUNK_BYTES
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=gzip.compress(body), headers={"Content-Encoding": "gzip"})
+        
+        client = make_client(handler, json_loads=MagicMock(side_effect=AssertionError("body read whole")))
+        lyrics = await client.get_rich_lyrics("Aster Abebe/Album/ቅዱስ")
+        
+        assert lyrics == RichLyrics("ቅዱስ", self.PAYLOAD["html_content"], "Aster Abebe", None, 7)
+        assert client.metrics.snapshot()["rich_lyrics"]["bytes_received"] == len(body)
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_small_body_read_whole(self):
+        """Test a body below the streaming threshold goes through the configured JSON backend"""
+        loads = MagicMock(side_effect=json.loads)
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"title": "C", "html_content": "<p>...</p>"})
+        
+        client = make_client(handler, json_loads=loads)
+        lyrics = await client.get_rich_lyrics("A/B/C")
+        
+        assert lyrics.html_content == "<p>...</p>"
+        assert loads.call_count == 1
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_truncated_body_fails_and_closes(self):
+        """Test a body that ends mid-value raises and the response is still closed"""
+        responses = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            response = httpx.Response(200, content=b'{"title": "C", "html_content": "<p>' + b"x" * 100000)
+            responses.append(response)
+            return response
+        
+        client = make_client(handler)
+        with pytest.raises(Exception, match="Get rich lyrics failed"):
+            await client.get_rich_lyrics("A/B/C")
+        
+        assert responses[0].is_closed
+        await client.close()
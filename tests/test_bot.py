@@ -1,9 +1,17 @@
 """
 Tests for the main MezmurBot class
 """
+import asyncio
+import time
+import httpx
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from bot import MezmurBot
+from bot import MezmurBot, decode_inline_offset, encode_inline_offset
+from utils.api_client import MezmurAPIClient, PaginatedResponse, SearchResult
+from utils.catalog import CatalogMirror
+from utils.metrics import APIMetrics
+from utils.prefix_index import PrefixIndex
+from utils.resilience import current_budget
 
 
 class TestMezmurBot:
@@ -342,3 +350,345 @@ class TestMezmurBot:
             result = await bot.health_check()
             
             assert result is False
+    
+    @pytest.mark.asyncio
+    async def test_fetch_inline_lyrics_concurrent(self, mock_api_client, mock_search_results):
+        """Test inline lyrics for a page are fetched concurrently"""
+        async def slow_lyrics(title):
+            await asyncio.sleep(0.05)
+            return {"title": title.split("/")[-1], "lyrics": "..."}
+        
+        mock_api_client.get_lyrics.side_effect = slow_lyrics
+        songs = mock_search_results * 3
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            started = time.monotonic()
+            page_lyrics = await bot._fetch_inline_lyrics(songs)
+            elapsed = time.monotonic() - started
+            
+            assert len(page_lyrics) == len(songs)
+            assert all(lyrics is not None for lyrics in page_lyrics)
+            assert elapsed < 0.05 * len(songs)
+    
+    @pytest.mark.asyncio
+    async def test_inline_query_deadline_fallback(self, mock_api_client, mock_search_results, mock_inline_query):
+        """Test songs missing the page deadline fall back to the placeholder"""
+        async def lyrics(title):
+            if title.endswith("Yekebere"):
+                await asyncio.sleep(1)
+            return {"title": title.split("/")[-1], "lyrics": "Beautiful lyrics"}
+        
+        mock_api_client.search_prefix.return_value = MagicMock(data=mock_search_results, has_next=False)
+        mock_api_client.get_lyrics.side_effect = lyrics
+        mock_inline_query.query = "samuel"
+        mock_update = MagicMock()
+        mock_update.inline_query = mock_inline_query
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'), \
+             patch('bot.INLINE_PAGE_DEADLINE', 0.1):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            await bot.handle_inline_query(mock_update, None)
+            
+            mock_inline_query.answer.assert_called_once()
+            results = mock_inline_query.answer.call_args[0][0]
+            assert len(results) == 2
+            assert "Lyrics temporarily unavailable" in results[0].input_message_content.message_text
+            assert "Beautiful lyrics" in results[1].input_message_content.message_text
+    
+    @pytest.mark.asyncio
+    async def test_inline_query_extends_complete_result(self, mock_api_client, mock_search_results, mock_inline_query):
+        """Test a query extending a cached complete search is answered by filtering it"""
+        mock_api_client.search_prefix.return_value = MagicMock(data=mock_search_results, has_next=False)
+        mock_api_client.get_lyrics.return_value = {"title": "Yekebere", "lyrics": "Beautiful lyrics"}
+        mock_update = MagicMock()
+        mock_update.inline_query = mock_inline_query
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            for query in ("sam", "Samuel Tes", "samuel tesfamichael/misale yeleleh/mis", "samuel tes", "samx"):
+                mock_inline_query.query = query
+                await bot.handle_inline_query(mock_update, None)
+            
+            mock_api_client.search_prefix.assert_called_once_with("sam", page=1, limit=20, continue_token=None)
+            answered = [call.args[0] for call in mock_inline_query.answer.call_args_list]
+            assert [len(results) for results in answered] == [2, 2, 1, 2]
+            assert answered[2][0].title == "🎵 Misale Yeleleh"
+            stats = bot.inline_search_stats()
+            assert (stats["searches"], stats["prefix_hits"], stats["exact_hits"]) == (1, 3, 1)
+            
+            mock_api_client.metrics = APIMetrics()
+            mock_api_client.prometheus_metrics = MagicMock(return_value="")
+            assert 'mezmur_api_inline_queries_total{source="prefix_cache"} 3' in bot.prometheus_metrics()
+    
+    @pytest.mark.asyncio
+    async def test_inline_query_spellings_follow_source(self, mock_api_client, mock_inline_query):
+        """Test cached API results are reused only for the spelling typed, mirror results for any spelling"""
+        titles = ["ሰላም/Album/ሰላም ሁሉ", "ሠላም/Album/ሠላም ለኪ"]
+        mock_api_client.search_prefix.side_effect = lambda query, **kwargs: MagicMock(
+            data=[SearchResult(title, i) for i, title in enumerate(titles) if title.startswith(query)], has_next=False
+        )
+        mock_api_client.get_lyrics.return_value = {"title": "Selam", "lyrics": "Beautiful lyrics"}
+        mock_update = MagicMock()
+        mock_update.inline_query = mock_inline_query
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            for query in ("ሰላ", "ሰላም", "ሠላም"):
+                mock_inline_query.query = query
+                await bot.handle_inline_query(mock_update, None)
+            assert [call.args[0] for call in mock_api_client.search_prefix.call_args_list] == ["ሰላ", "ሠላም"]
+            
+            bot._search_cache.clear()
+            bot.catalog = MagicMock(spec=CatalogMirror)
+            bot.catalog.search_prefix.side_effect = PrefixIndex([(title, i) for i, title in enumerate(titles)]).search_prefix
+            for query in ("ሰላ", "ሰላም"):
+                mock_inline_query.query = query
+                await bot.handle_inline_query(mock_update, None)
+            
+            assert bot.catalog.search_prefix.call_count == 1
+            assert len(mock_inline_query.answer.call_args.args[0]) == 2
+            assert mock_api_client.search_prefix.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_inline_query_truncated_result_not_reused(self, mock_api_client, mock_search_results, mock_inline_query):
+        """Test a search cut off at the limit is not filtered for longer queries"""
+        mock_api_client.search_prefix.return_value = MagicMock(data=mock_search_results, has_next=True)
+        mock_api_client.get_lyrics.return_value = {"title": "Yekebere", "lyrics": "Beautiful lyrics"}
+        mock_update = MagicMock()
+        mock_update.inline_query = mock_inline_query
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            for query in ("sam", "samu"):
+                mock_inline_query.query = query
+                await bot.handle_inline_query(mock_update, None)
+            
+            first_pages = [call.args[0] for call in mock_api_client.search_prefix.call_args_list if call.kwargs["page"] == 1]
+            assert first_pages == ["sam", "samu"]
+            assert bot.inline_search_stats()["prefix_hits"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_inline_pages_fetched_on_demand(self, mock_api_client, mock_inline_query):
+        """Test inline pages follow a cursor through small search pages, fetching each only when scrolled to"""
+        titles = [f"Samuel/Album {i // 10}" if i % 10 == 0 else f"Samuel/Album {i // 10}/Song {i}" for i in range(45)]
+        
+        async def search_prefix(query, page=1, limit=10, continue_token=None):
+            start = int(continue_token) if continue_token else (page - 1) * limit
+            end = min(start + limit, len(titles))
+            return PaginatedResponse(
+                [SearchResult(title, i) for i, title in enumerate(titles[start:end], start)], len(titles), page, limit,
+                has_next=end < len(titles), has_prev=start > 0, next_token=str(end) if end < len(titles) else None
+            )
+        
+        mock_api_client.search_prefix.side_effect = search_prefix
+        mock_api_client.get_lyrics.return_value = {"title": "Song", "lyrics": "Beautiful lyrics"}
+        mock_inline_query.query = "samuel"
+        mock_inline_query.offset = ""
+        mock_update = MagicMock()
+        mock_update.inline_query = mock_inline_query
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            shown, offsets = [], []
+            while mock_inline_query.offset is not None:
+                await bot.handle_inline_query(mock_update, None)
+                answer = mock_inline_query.answer.call_args
+                shown += [result.title for result in answer.args[0] if result.id != "loading"]
+                mock_inline_query.offset = answer.kwargs["next_offset"]
+                offsets.append(mock_inline_query.offset)
+                if len(offsets) == 1:
+                    assert mock_api_client.search_prefix.call_count == 1
+            
+            assert shown == [f"🎵 Song {i}" for i in range(45) if i % 10]
+            assert offsets[:4] == ["1:5:api:", "1:10:api:", "1:15:api:", "2:2:api:20"]
+            assert mock_api_client.search_prefix.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_inline_api_pages_stay_on_api(self, mock_api_client, mock_inline_query):
+        """Test later pages of API results go back to the API even when the synced mirror is searched first"""
+        pages = {
+            None: PaginatedResponse([SearchResult(f"Samuel/Album/Song {i}", i) for i in range(5)], 10, 1, 5,
+                                    has_next=True, has_prev=False, next_token="opaque-api-token"),
+            "opaque-api-token": PaginatedResponse([SearchResult(f"Samuel/Album/Song {i}", i) for i in range(5, 10)],
+                                                  10, 2, 5, has_next=False, has_prev=True),
+        }
+        mock_api_client.search_prefix.side_effect = lambda query, page, limit, continue_token: pages[continue_token]
+        mock_api_client.get_lyrics.return_value = {"title": "Song", "lyrics": "Beautiful lyrics"}
+        mock_inline_query.query = "samuel"
+        mock_inline_query.offset = ""
+        mock_update = MagicMock()
+        mock_update.inline_query = mock_inline_query
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            bot.catalog = MagicMock(spec=CatalogMirror)
+            bot.catalog.search_prefix.side_effect = PrefixIndex([("Other Artist/Album/Song", 1)]).search_prefix
+            
+            await bot.handle_inline_query(mock_update, None)
+            mock_inline_query.offset = mock_inline_query.answer.call_args.kwargs["next_offset"]
+            assert mock_inline_query.offset == "2:0:api:opaque-api-token"
+            await bot.handle_inline_query(mock_update, None)
+            
+            answer = mock_inline_query.answer.call_args
+            assert [result.title for result in answer.args[0]] == [f"🎵 Song {i}" for i in range(5, 10)]
+            assert bot.catalog.search_prefix.call_count == 1
+            mock_api_client.search_prefix.assert_called_with(
+                "samuel", page=2, limit=20, continue_token="opaque-api-token"
+            )
+    
+    def test_inline_offset_cursor(self):
+        """Test inline offsets round-trip, drop over-long tokens and accept plain indexes"""
+        assert decode_inline_offset(encode_inline_offset(3, 2, "api", "abc:def")) == (3, 2, "api", "abc:def")
+        assert encode_inline_offset(2, 0, "local", "x" * 80) == "2:0:local:"
+        assert decode_inline_offset("") == (1, 0, None, None)
+        assert decode_inline_offset("5") == (1, 5, None, None)
+        assert decode_inline_offset("2:0:20") == (2, 0, None, None)
+    
+    @pytest.mark.asyncio
+    async def test_newer_inline_query_cancels_previous(self, mock_api_client, mock_search_results):
+        """Test a user's newer inline query cancels their previous one, but not other users' queries"""
+        async def lyrics(title):
+            await asyncio.sleep(0.1)
+            return {"title": title.split("/")[-1], "lyrics": "Beautiful lyrics"}
+        
+        mock_api_client.search_prefix.return_value = MagicMock(data=mock_search_results, has_next=False)
+        mock_api_client.get_lyrics.side_effect = lyrics
+        
+        def update(user_id, query):
+            inline_query = MagicMock(query=query, offset="0", answer=AsyncMock())
+            inline_query.from_user.id = user_id
+            return MagicMock(inline_query=inline_query)
+        
+        with patch('bot.MezmurAPIClient', return_value=mock_api_client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            handler = bot._latest_per_user(bot.handle_inline_query)
+            stale, other, latest = update(1, "sam"), update(2, "sam"), update(1, "samu")
+            
+            first = asyncio.create_task(handler(stale, None))
+            second = asyncio.create_task(handler(other, None))
+            await asyncio.sleep(0.02)
+            await handler(latest, None)
+            await second
+            
+            assert first.cancelled()
+            stale.inline_query.answer.assert_not_called()
+            other.inline_query.answer.assert_called_once()
+            latest.inline_query.answer.assert_called_once()
+            assert bot.superseded_stats() == {"superseded_queries": 1, "lyrics_fetches_cancelled": 2, "in_flight": 0}
+    
+    @pytest.mark.asyncio
+    async def test_superseded_query_cancels_upstream_requests(self):
+        """Test a superseded inline query's search and lyrics requests are cancelled at the API, not just ignored"""
+        started, finished = [], []
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/search/prefix":
+                query = request.url.params["q"]
+                path = f"{path}?q={query}"
+            started.append(path)
+            if "?" in path:
+                await asyncio.sleep(0.2 if query == "xa" else 0)
+                data = [{"title": f"Samuel/Album/{query} {i}", "pageid": i} for i in range(3)]
+                payload = {"data": data, "total": 3, "page": 1, "limit": 20, "has_next": False, "has_prev": False}
+            else:
+                await asyncio.sleep(0.2 if path.startswith("/lyrics/Samuel/Album/ya ") else 0)
+                payload = {"title": path.rsplit("/", 1)[-1], "lyrics": "Beautiful lyrics"}
+            finished.append(path)
+            return httpx.Response(200, json=payload)
+        
+        client = MezmurAPIClient("http://test.api")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        
+        def update(query):
+            inline_query = MagicMock(query=query, offset="", answer=AsyncMock())
+            inline_query.from_user.id = 1
+            return MagicMock(inline_query=inline_query)
+        
+        with patch('bot.MezmurAPIClient', return_value=client), \
+             patch('bot.SearchHandler'), \
+             patch('bot.LyricsHandler'), \
+             patch('bot.AlbumsHandler'), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            bot.catalog = None
+            wrapped = bot._latest_per_user(bot.handle_inline_query)
+            
+            # Superseded while searching, then while fetching lyrics
+            first = asyncio.create_task(wrapped(update("xa"), None))
+            await asyncio.sleep(0.05)
+            second = asyncio.create_task(wrapped(update("ya"), None))
+            await asyncio.sleep(0.05)
+            latest = update("za")
+            await wrapped(latest, None)
+            await asyncio.sleep(0.3)
+            
+            assert first.cancelled() and second.cancelled()
+            latest.inline_query.answer.assert_called_once()
+            abandoned = [path for path in started if path not in finished]
+            assert abandoned == ["/search/prefix?q=xa", *(f"/lyrics/Samuel/Album/ya {i}" for i in range(3))]
+            assert client.abandoned_requests == 4
+            assert bot.superseded_stats()["lyrics_fetches_cancelled"] == 3
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_handlers_run_under_budget(self):
+        """Test wrapped handlers give their API calls one shared deadline"""
+        seen = []
+        
+        async def callback(update, context):
+            seen.append(current_budget())
+            return "done"
+        
+        with patch('bot.MezmurAPIClient', return_value=MezmurAPIClient("http://test.api")), \
+             patch('bot.Application'):
+            
+            bot = MezmurBot("test_token", "http://test.api")
+            handler = bot._with_budget(callback, 5.0)
+            
+            assert await handler(MagicMock(), None) == "done"
+            assert seen[0].seconds == 5.0 and seen[0].expires_at is not None
+            assert current_budget() is None
+            await bot.api_client.close()
@@ -0,0 +1,127 @@
+"""
+Tests for the TTLCache class
+"""
+import pytest
+from utils.cache import TTLCache, normalize_query, query_key
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Test cases for TTLCache class"""
+    
+    def test_get_and_set(self):
+        """Test basic get/set with hit and miss counters"""
+        cache = TTLCache(max_entries=10)
+        
+        assert cache.get("missing") is None
+        cache.set("samuel", ["song"])
+        
+        assert cache.get("samuel") == ["song"]
+        assert cache.hits == 1
+        assert cache.misses == 1
+    
+    def test_normalized_keys_share_entry(self):
+        """Test case- and whitespace-normalized keys share an entry"""
+        cache = TTLCache(max_entries=10, key_func=normalize_query)
+        cache.set("Samuel ", ["song"])
+        
+        assert cache.get("samuel") == ["song"]
+        assert cache.get("  SAMUEL") == ["song"]
+        assert normalize_query("Samuel   Tesfa ") == "samuel tesfa"
+        assert len(cache) == 1
+    
+    def test_geez_spellings_share_entry(self):
+        """Test interchangeable Ge'ez letters spell one key"""
+        cache = TTLCache(max_entries=10, key_func=normalize_query)
+        cache.set("ሠላም ሐዋርያ", ["song"])
+        
+        assert cache.get("ሰላም ኀዋርያ") == ["song"]
+        assert normalize_query("ዐይን ፀሐይ ኣምላክ") == normalize_query("አይን ጸሀይ አምላክ") == "አይን ጸሀይ አምላክ"
+        assert normalize_query("ሰላም") != normalize_query("ሸላም")
+        assert query_key(" ሠላም  Samuel") == "ሠላም samuel" != query_key("ሰላም samuel")
+    
+    def test_ttl_expiry(self):
+        """Test entries expire after their TTL"""
+        clock = FakeClock()
+        cache = TTLCache(max_entries=10, ttl=10, clock=clock)
+        cache.set("default", 1)
+        cache.set("short", 2, ttl=1)
+        
+        clock.now = 5
+        assert cache.get("short") is None
+        assert cache.get("default") == 1
+        
+        clock.now = 11
+        assert "default" not in cache
+        assert cache.get("default") is None
+        assert cache.expirations == 2
+    
+    def test_peek(self):
+        """Test peek returns fresh entries without touching counters"""
+        clock = FakeClock()
+        cache = TTLCache(max_entries=10, ttl=10, clock=clock, key_func=normalize_query)
+        cache.set("Samuel", ["song"], meta=True)
+        
+        assert cache.peek("samuel").meta is True
+        assert cache.peek("sam") is None
+        clock.now = 11
+        assert cache.peek("samuel") is None
+        assert (cache.hits, cache.misses, cache.expirations) == (0, 0, 0)
+    
+    def test_lru_eviction_by_entries(self):
+        """Test least recently used entry is evicted at the entry limit"""
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+        assert cache.evictions == 1
+    
+    def test_eviction_by_bytes(self):
+        """Test entries are evicted to stay within the byte budget"""
+        cache = TTLCache(max_entries=100, max_bytes=250, sizeof=lambda value: 100)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        
+        assert len(cache) == 2
+        assert cache.current_bytes == 200
+        assert "a" not in cache
+    
+    def test_oversized_value_not_cached(self):
+        """Test a value larger than the whole budget is not stored"""
+        cache = TTLCache(max_entries=10, max_bytes=10)
+        cache.set("big", "x" * 1000)
+        
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+    
+    def test_stats(self):
+        """Test stats snapshot"""
+        cache = TTLCache(max_entries=10)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        
+        stats = cache.stats()
+        assert stats["entries"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.5)
+    
+    def test_invalid_max_entries(self):
+        """Test max_entries must be positive"""
+        with pytest.raises(ValueError):
+            TTLCache(max_entries=0)
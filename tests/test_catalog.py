@@ -0,0 +1,167 @@
+"""
+Tests for the in-memory catalog mirror
+"""
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from benchmarks.stub_api import StubAPI, build_catalog
+from handlers.albums import AlbumsHandler
+from utils.api_client import Album, Artist, MezmurAPIClient, Song
+from utils.catalog import CatalogMirror
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+def small_stub() -> StubAPI:
+    return StubAPI(titles=build_catalog(artists=3, albums_per_artist=2, songs_per_album=3))
+
+
+def add_title(stub: StubAPI, title: str):
+    stub.pageids[title] = max(stub.pageids.values()) + 1
+    stub.titles.append(title)
+
+
+class TestCatalogMirror:
+    """Test cases for CatalogMirror"""
+    
+    @pytest.mark.asyncio
+    async def test_sync_builds_tree(self):
+        """Test a sync mirrors every artist, album and song keyed by pageid"""
+        with small_stub() as stub:
+            client = MezmurAPIClient(stub.url)
+            mirror = CatalogMirror(client, page_size=2)
+            snapshot = await mirror.sync()
+            
+            assert snapshot.stats()["artists"] == 3
+            assert snapshot.stats()["albums"] == 6
+            assert snapshot.stats()["songs"] == 18
+            
+            song_id = stub.pageids["Artist 001/Album 01/Song 002"]
+            song = snapshot.get(song_id)
+            assert isinstance(song.item, Song)
+            album = snapshot.get(song.parent)
+            assert album.item.title == "Artist 001/Album 01"
+            assert isinstance(snapshot.get(album.parent).item, Artist)
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_reads_match_api_shape(self):
+        """Test mirrored pages look like the API's paginated responses"""
+        with small_stub() as stub:
+            client = MezmurAPIClient(stub.url)
+            mirror = CatalogMirror(client)
+            await mirror.sync()
+            
+            local = mirror.artist_albums("artist 000", limit=1)
+            remote = await client.get_artist_albums("Artist 000", limit=1)
+            assert [album.title for album in local.data] == [album.title for album in remote.data]
+            assert (local.total, local.has_next, local.has_prev) == (remote.total, remote.has_next, remote.has_prev)
+            assert isinstance(local.data[0], Album)
+            
+            songs = mirror.album_songs("Artist 002/Album 00", page=2, limit=2)
+            assert [song.title for song in songs.data] == ["Artist 002/Album 00/Song 002"]
+            assert songs.has_prev and not songs.has_next
+            
+            assert mirror.artist_albums("Unknown Artist") is None
+            assert mirror.album_songs("Artist 000") is None
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_incremental_sync(self):
+        """Test later syncs only walk new and due artists and drop removed ones"""
+        with small_stub() as stub:
+            client = MezmurAPIClient(stub.url)
+            clock = FakeClock()
+            mirror = CatalogMirror(client, resync_interval=100, max_artists_per_run=1, clock=clock)
+            first = await mirror.sync()
+            
+            # Nothing due: only the artist list is fetched
+            requests = stub.requests
+            assert await mirror.sync() is not first
+            assert stub.requests == requests + 1
+            assert mirror.artists_walked == 3
+            
+            # New artist is walked; a removed artist is dropped
+            add_title(stub, "Artist 100")
+            add_title(stub, "Artist 100/Album 00")
+            stub.titles.remove("Artist 002")
+            snapshot = await mirror.sync()
+            assert mirror.artists_walked == 4
+            assert mirror.artist_albums("Artist 100").total == 1
+            assert mirror.artist_albums("Artist 002") is None
+            assert snapshot.find("Artist 002/Album 00/Song 000") is None
+            
+            # Once subtrees age, at most max_artists_per_run are re-walked per sync
+            clock.now += 200
+            await mirror.sync()
+            assert mirror.artists_walked == 5
+            await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_failed_sync_keeps_snapshot(self):
+        """Test a failing sync leaves the previous snapshot in place"""
+        with small_stub() as stub:
+            client = MezmurAPIClient(stub.url)
+            mirror = CatalogMirror(client)
+            await mirror.sync_job()
+            snapshot = mirror.snapshot
+            
+            await client.client.aclose()
+            client.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+            await mirror.sync_job()
+            
+            assert mirror.snapshot is snapshot
+            assert mirror.sync_failures == 1
+            await client.close()
+    
+    def test_schedule_uses_job_queue(self):
+        """Test the sync is registered as a repeating JobQueue job"""
+        job_queue = MagicMock()
+        mirror = CatalogMirror(AsyncMock(spec=MezmurAPIClient))
+        
+        mirror.schedule(job_queue, interval=900)
+        
+        job_queue.run_repeating.assert_called_once_with(
+            mirror.sync_job, interval=900, first=0.0, name="catalog_sync"
+        )
+
+
+class TestAlbumsHandlerCatalog:
+    """Test cases for AlbumsHandler reading from the catalog mirror"""
+    
+    @pytest.mark.asyncio
+    async def test_artist_albums_from_mirror(self, mock_update, mock_context, mock_api_client):
+        """Test artist albums are answered from the mirror without an API call"""
+        catalog = MagicMock(spec=CatalogMirror)
+        catalog.artist_albums.return_value = MagicMock(data=[Album("Samuel Tesfamichael/Misale Yeleleh", 2, 0)])
+        catalog.resolve.return_value = []
+        handler = AlbumsHandler(mock_api_client, catalog=catalog)
+        mock_context.bot = AsyncMock()
+        
+        await handler._get_artist_albums(mock_update, mock_context, "Samuel Tesfamichael")
+        
+        catalog.artist_albums.assert_called_once_with("Samuel Tesfamichael", limit=20)
+        mock_api_client.get_artist_albums.assert_not_called()
+        assert "Misale Yeleleh" in mock_update.effective_message.reply_text.call_args[0][0]
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_api(self, mock_update, mock_context, mock_api_client):
+        """Test artists missing from the mirror are looked up through the API"""
+        catalog = MagicMock(spec=CatalogMirror)
+        catalog.artist_albums.return_value = None
+        catalog.resolve.return_value = []
+        mock_api_client.get_artist_albums.return_value = MagicMock(data=[])
+        handler = AlbumsHandler(mock_api_client, catalog=catalog)
+        mock_context.bot = AsyncMock()
+        
+        await handler._get_artist_albums(mock_update, mock_context, "New Artist")
+        
+        mock_api_client.get_artist_albums.assert_called_once_with("New Artist", limit=20)
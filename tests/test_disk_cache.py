@@ -0,0 +1,219 @@
+"""
+Tests for the persistent disk cache tier
+"""
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from utils.api_client import MezmurAPIClient, RichLyrics
+from utils.disk_cache import DiskCache
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+class TestDiskCache:
+    """Test cases for DiskCache"""
+    
+    def test_get_and_set(self, tmp_path):
+        """Test entries round-trip with their metadata"""
+        cache = DiskCache(str(tmp_path / "cache.db"))
+        assert cache.get("lyrics", "A/B/C") is None
+        
+        cache.set("lyrics", "A/B/C", b'{"lyrics": "..."}', meta='["etag", null]')
+        entry = cache.get("lyrics", "A/B/C")
+        
+        assert entry.value == b'{"lyrics": "..."}'
+        assert entry.meta == '["etag", null]'
+        assert cache.get("rich_lyrics", "A/B/C") is None
+        assert cache.hits == 1
+        assert cache.misses == 2
+        cache.close()
+    
+    def test_survives_reopen(self, tmp_path):
+        """Test entries and their byte total persist across connections"""
+        path = str(tmp_path / "cache.db")
+        cache = DiskCache(path)
+        cache.set("lyrics", "song", b"x" * 100)
+        size = cache.current_bytes
+        cache.close()
+        
+        reopened = DiskCache(path)
+        assert reopened.get("lyrics", "song").value == b"x" * 100
+        assert reopened.current_bytes == size
+        reopened.close()
+    
+    def test_max_age(self, tmp_path):
+        """Test entries older than max_age are treated as missing and report their age"""
+        clock = FakeClock()
+        cache = DiskCache(str(tmp_path / "cache.db"), clock=clock)
+        cache.set("lyrics", "song", b"x")
+        
+        clock.now += 50
+        assert cache.get("lyrics", "song", max_age=60).age == 50
+        clock.now += 20
+        assert cache.get("lyrics", "song", max_age=60) is None
+        cache.close()
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted to stay within the byte budget"""
+        clock = FakeClock()
+        cache = DiskCache(str(tmp_path / "cache.db"), max_bytes=300, clock=clock)
+        for name in ("a", "b", "c"):
+            clock.now += 1
+            cache.set("lyrics", name, b"x" * 99)
+        
+        clock.now += 1
+        cache.get("lyrics", "a")
+        clock.now += 1
+        cache.set("lyrics", "d", b"x" * 99)
+        
+        assert cache.get("lyrics", "b") is None
+        assert cache.get("lyrics", "a") is not None
+        assert cache.current_bytes <= 300
+        assert cache.evictions == 1
+        cache.close()
+    
+    def test_replace_keeps_byte_total(self, tmp_path):
+        """Test overwriting an entry replaces its size in the byte total"""
+        cache = DiskCache(str(tmp_path / "cache.db"))
+        cache.set("lyrics", "song", b"x" * 100)
+        cache.set("lyrics", "song", b"x" * 10)
+        
+        assert cache.current_bytes == 10 + len("song")
+        assert len(cache) == 1
+        cache.close()
+    
+    def test_entry_count_tracked(self, tmp_path):
+        """Test the entry count follows writes, deletes and evictions without counting rows"""
+        path = str(tmp_path / "cache.db")
+        cache = DiskCache(path, max_bytes=1000)
+        for i in range(20):
+            cache.set("lyrics", f"song {i}", b"x" * 100)
+        cache.set("lyrics", "song 19", b"x" * 50)
+        cache.delete("lyrics", "song 19")
+        cache.delete("lyrics", "missing")
+        
+        rows = cache._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        assert len(cache) == cache.stats()["entries"] == rows == 8
+        cache.close()
+        
+        reopened = DiskCache(path)
+        assert len(reopened) == rows
+        reopened.close()
+    
+    def test_compact(self, tmp_path):
+        """Test compaction drops old entries and reclaims free pages"""
+        clock = FakeClock()
+        path = tmp_path / "cache.db"
+        cache = DiskCache(str(path), clock=clock)
+        for i in range(200):
+            cache.set("lyrics", f"old {i}", b"x" * 2000)
+        clock.now += 100
+        cache.set("lyrics", "new", b"x" * 2000)
+        cache.compact()
+        size_before = path.stat().st_size
+        
+        removed = cache.compact(max_age=50)
+        
+        assert removed == 200
+        assert len(cache) == 1
+        assert cache.current_bytes == 2000 + len("new")
+        assert path.stat().st_size < size_before
+        cache.close()
+
+
+class TestClientDiskTier:
+    """Test cases for the disk tier behind the MezmurAPIClient memory cache"""
+    
+    @staticmethod
+    def make_client(path, calls, **kwargs) -> MezmurAPIClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if "/lyrics/rich/" in request.url.path:
+                return httpx.Response(200, json={"title": "Yekebere", "html_content": "<p>...</p>"},
+                                      headers={"ETag": '"v1"'})
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": "..."}, headers={"ETag": '"v1"'})
+        
+        client = MezmurAPIClient("http://test.api", enable_cache=True, disk_cache_path=str(path), **kwargs)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+    
+    @pytest.mark.asyncio
+    async def test_restart_comes_up_warm(self, tmp_path):
+        """Test a new client serves lyrics persisted by a previous one"""
+        calls = []
+        first = self.make_client(tmp_path / "cache.db", calls)
+        lyrics = await first.get_lyrics("A/B/Yekebere")
+        rich = await first.get_rich_lyrics("A/B/Yekebere")
+        await first.close()
+        
+        second = self.make_client(tmp_path / "cache.db", calls)
+        assert await second.get_lyrics("A/B/Yekebere") == lyrics
+        assert await second.get_rich_lyrics("A/B/Yekebere") == rich
+        assert isinstance(rich, RichLyrics)
+        
+        assert len(calls) == 2
+        assert second.cache_stats()["disk"]["hits"] == 2
+        await second.close()
+    
+    @pytest.mark.asyncio
+    async def test_stale_disk_entry_is_revalidated(self, tmp_path):
+        """Test a persisted entry past its TTL is served and revalidated with its stored validators"""
+        calls = []
+        first = self.make_client(tmp_path / "cache.db", calls, cache_ttls={"lyrics": 10})
+        await first.get_lyrics("A/B/Yekebere")
+        await first.close()
+        
+        second = self.make_client(tmp_path / "cache.db", calls, cache_ttls={"lyrics": 10})
+        second.disk_cache.clock = lambda: time.time() + 60
+        await second.get_lyrics("A/B/Yekebere")
+        await asyncio.gather(*second._refresh_tasks.values())
+        
+        assert calls[-1].headers["if-none-match"] == '"v1"'
+        assert second.cache_stats()["not_modified"] == 1
+        await second.close()
+    
+    @pytest.mark.asyncio
+    async def test_disk_io_off_event_loop(self, tmp_path):
+        """Test disk tier reads and writes run off the event loop thread"""
+        calls, threads = [], []
+        first = self.make_client(tmp_path / "cache.db", calls)
+        await first.get_lyrics("A/B/Yekebere")
+        await first.close()
+        
+        second = self.make_client(tmp_path / "cache.db", calls)
+        for name in ("get", "set"):
+            method = getattr(second.disk_cache, name)
+            
+            def traced(*args, _method=method, **kwargs):
+                threads.append(threading.current_thread())
+                return _method(*args, **kwargs)
+            
+            setattr(second.disk_cache, name, traced)
+        await second.get_lyrics("A/B/Yekebere")
+        await second.get_rich_lyrics("A/B/Yekebere")
+        await second.close()
+        
+        assert len(threads) == 3
+        assert threading.current_thread() not in threads
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_disk_tier_needs_memory_cache(self, tmp_path):
+        """Test the disk tier is only used together with the memory cache"""
+        client = MezmurAPIClient("http://test.api", enable_cache=False, disk_cache_path=str(tmp_path / "cache.db"))
+        
+        assert client.disk_cache is None
+        assert not (tmp_path / "cache.db").exists()
+        await client.close()
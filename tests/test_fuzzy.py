@@ -0,0 +1,162 @@
+"""
+Tests for fuzzy artist, album and song name matching
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from handlers.albums import AlbumsHandler
+from utils.api_client import Album, Artist, PaginatedResponse, Song
+from utils.catalog import CatalogMirror
+from utils.fuzzy import NameMatch, NameResolver, confident_match, name_key
+
+
+ARTISTS = [
+    ("Samuel Tesfamichael", 1),
+    ("Aster Abebe", 2),
+    ("Tesfaye Chala", 3),
+    ("Mikael Tesfaye", 4),
+]
+
+
+def snapshot():
+    artist = Artist("Samuel Tesfamichael", 1, 0)
+    album = Album("Samuel Tesfamichael/Misale Yeleleh", 2, 0)
+    song = Song("Samuel Tesfamichael/Misale Yeleleh/Yekebere", 3, 0)
+    return CatalogMirror._build([artist], {1: [(album, [song])]}, None, 0.0)
+
+
+class TestNameResolver:
+    """Test cases for NameResolver"""
+    
+    def test_name_key(self):
+        """Test keys ignore case, spacing and transliteration variants"""
+        assert name_key("Tesfa  Mikael") == name_key("tesfamikael")
+        assert name_key("Tesfaa Mikaél") == name_key("tesfa mikael")
+    
+    def test_typos_and_transliterations(self):
+        """Test misspelled and differently transliterated names find the artist"""
+        resolver = NameResolver(ARTISTS)
+        
+        for query in ("samuel tesfamikael", "samual tesfamicheal", "SAMUEL TESFAMICHAEL"):
+            assert resolver.resolve(query)[0].title == "Samuel Tesfamichael"
+        assert resolver.resolve("astr abebe")[0].pageid == 2
+        assert resolver.resolve("Aster Abebe")[0].score == 1.0
+    
+    def test_ranked_candidates(self):
+        """Test ambiguous names return several candidates, best first"""
+        resolver = NameResolver(ARTISTS)
+        
+        matches = resolver.resolve("tesfaye", limit=3)
+        
+        assert {match.pageid for match in matches[:2]} == {3, 4}
+        assert matches == sorted(matches, key=lambda match: -match.score)
+        assert resolver.resolve("zzzz") == []
+        assert resolver.resolve("") == []
+    
+    def test_last_segment(self):
+        """Test albums and songs match on their own name without the artist"""
+        resolver = NameResolver([("Samuel Tesfamichael/Misale Yeleleh", 5), ("Aster Abebe/Yekebere", 6)])
+        
+        assert resolver.resolve("misale yelele")[0].pageid == 5
+        assert resolver.resolve("samuel tesfamichael/misale yeleleh")[0].score == 1.0
+    
+    def test_confident_match(self):
+        """Test only a good match clearly ahead of the runner-up is taken"""
+        assert confident_match([NameMatch("A", 1, 0.8), NameMatch("B", 2, 0.5)]).pageid == 1
+        assert confident_match([NameMatch("A", 1, 0.8), NameMatch("B", 2, 0.75)]) is None
+        assert confident_match([NameMatch("A", 1, 1.0), NameMatch("B", 2, 0.95)]).pageid == 1
+        assert confident_match([NameMatch("A", 1, 0.45)]) is None
+        assert confident_match([]) is None
+
+
+class TestCatalogResolve:
+    """Test cases for resolving names against the catalog mirror"""
+    
+    def test_resolve_by_kind(self):
+        """Test each kind only matches names of that kind, exact titles first"""
+        catalog = snapshot()
+        
+        assert [match.pageid for match in catalog.resolve("samuel tesfamikael", "artist")] == [1]
+        assert catalog.resolve("misale yelele", "album")[0].pageid == 2
+        assert catalog.resolve("yekebre", "song")[0].pageid == 3
+        assert catalog.resolve("samuel tesfamichael", "artist")[0].score == 1.0
+    
+    def test_mirror_before_sync(self):
+        """Test nothing resolves before the first sync"""
+        mirror = CatalogMirror(AsyncMock())
+        
+        assert mirror.resolve("samuel", "artist") == []
+
+
+class TestAlbumsHandlerResolve:
+    """Test cases for AlbumsHandler resolving names before looking them up"""
+    
+    @pytest.mark.asyncio
+    async def test_artist_resolved(self, mock_update, mock_context, mock_api_client):
+        """Test a misspelled artist unknown to the API is looked up under the matched name"""
+        mirror = CatalogMirror(mock_api_client)
+        mirror.snapshot = snapshot()
+        mock_api_client.get_artist_albums.return_value = PaginatedResponse(
+            data=[], total=0, page=1, limit=20, has_next=False, has_prev=False
+        )
+        handler = AlbumsHandler(mock_api_client, catalog=mirror)
+        mock_context.bot = AsyncMock()
+        
+        await handler._get_artist_albums(mock_update, mock_context, "samuel tesfamikael")
+        
+        text = mock_update.effective_message.reply_text.call_args[0][0]
+        assert "Samuel Tesfamichael" in text and "Misale Yeleleh" in text
+        mock_api_client.get_artist_albums.assert_called_once_with("samuel tesfamikael", limit=20)
+    
+    @pytest.mark.asyncio
+    async def test_exact_name_tried_first(self, mock_update, mock_context, mock_api_client):
+        """Test an artist missing from the mirror but known to the API is not rewritten to a similar mirrored one"""
+        mirror = CatalogMirror(mock_api_client)
+        mirror.snapshot = snapshot()
+        mock_api_client.get_artist_albums.return_value = PaginatedResponse(
+            data=[Album("Samuel Tesfaye/Tewodros", 9, 0)], total=1, page=1, limit=20, has_next=False, has_prev=False
+        )
+        handler = AlbumsHandler(mock_api_client, catalog=mirror)
+        mock_context.bot = AsyncMock()
+        
+        await handler._get_artist_albums(mock_update, mock_context, "Samuel Tesfaye")
+        await handler._get_artist_albums(mock_update, mock_context, "Samuel Tesfamichael")
+        
+        first, second = [call[0][0] for call in mock_update.effective_message.reply_text.call_args_list]
+        assert "Samuel Tesfaye" in first and "Tewodros" in first
+        assert "Misale Yeleleh" in second
+        mock_api_client.get_artist_albums.assert_called_once_with("Samuel Tesfaye", limit=20)
+    
+    @pytest.mark.asyncio
+    async def test_album_resolved_from_own_name(self, mock_update, mock_context, mock_api_client):
+        """Test /album accepts the album name alone"""
+        mirror = CatalogMirror(mock_api_client)
+        mirror.snapshot = snapshot()
+        mock_api_client.get_album_songs.return_value = PaginatedResponse(
+            data=[], total=0, page=1, limit=20, has_next=False, has_prev=False
+        )
+        handler = AlbumsHandler(mock_api_client, catalog=mirror)
+        mock_context.bot = AsyncMock()
+        
+        await handler._get_album_songs(mock_update, mock_context, "misale yelele")
+        
+        assert "Yekebere" in mock_update.effective_message.reply_text.call_args[0][0]
+    
+    @pytest.mark.asyncio
+    async def test_suggestions_when_ambiguous(self, mock_update, mock_context, mock_api_client):
+        """Test close candidates are offered as buttons when no single match is clear"""
+        catalog = MagicMock(spec=CatalogMirror)
+        catalog.resolve.return_value = [NameMatch("Tesfaye Chala", 3, 0.74), NameMatch("Mikael Tesfaye", 4, 0.73)]
+        catalog.artist_albums.return_value = None
+        mock_api_client.get_artist_albums.return_value = PaginatedResponse(
+            data=[], total=0, page=1, limit=20, has_next=False, has_prev=False
+        )
+        handler = AlbumsHandler(mock_api_client, catalog=catalog)
+        mock_context.bot = AsyncMock()
+        
+        await handler._get_artist_albums(mock_update, mock_context, "tesfaye")
+        
+        mock_api_client.get_artist_albums.assert_called_once_with("tesfaye", limit=20)
+        call = mock_update.effective_message.reply_text.call_args
+        assert "Did you mean" in call[0][0]
+        buttons = [row[0].callback_data for row in call[1]["reply_markup"].inline_keyboard]
+        assert buttons[:2] == ["artist:Tesfaye Chala", "artist:Mikael Tesfaye"]
@@ -119,7 +119,7 @@ class TestBotIntegration:
             await bot.handle_inline_query(mock_inline_query, None)
             
             # Verify search API was called
-            mock_api_client.search_prefix.assert_called_once_with("samuel tesfa", limit=80)
+            mock_api_client.search_prefix.assert_called_once_with("samuel tesfa", page=1, limit=20, continue_token=None)
             
             # Verify inline query was answered
             mock_inline_query.answer.assert_called_once()
@@ -0,0 +1,66 @@
+"""
+Tests for incremental JSON object decoding
+"""
+import json
+import random
+import pytest
+from utils.json_stream import JSONObjectStream
+
+
+def decode_in_chunks(text: str, sizes) -> dict:
+    stream = JSONObjectStream()
+    pos = 0
+    for size in sizes:
+        stream.feed(text[pos:pos + size])
+        pos += size
+    stream.feed(text[pos:])
+    return stream.close()
+
+
+class TestJSONObjectStream:
+    """Test cases for JSONObjectStream"""
+    
+    PAYLOAD = {
+        "title": "ሰላም \"ቅዱስ\"",
+        "html_content": "<p>ሃሌ ሉያ \\ 😀\t</p>\n" * 200,
+        "artist": "Aster Abebe",
+        "album": None,
+        "page_id": 12,
+        "tags": {"kind": ["hymn", "}\\\"", {"nested": "]"}]},
+        "score": -1.5e3,
+        "live": True,
+    }
+    
+    @pytest.mark.parametrize("ensure_ascii", [True, False])
+    def test_matches_json_loads_at_any_split(self, ensure_ascii):
+        """Test every way of chunking the document decodes to what json.loads returns"""
+        text = json.dumps(self.PAYLOAD, ensure_ascii=ensure_ascii, indent=1)
+        rng = random.Random(3)
+        
+        for _ in range(100):
+            sizes = [rng.randint(1, 50) for _ in range(len(text) // 25)]
+            assert decode_in_chunks(text, sizes) == self.PAYLOAD
+    
+    def test_split_inside_escapes(self):
+        """Test escapes and surrogate pairs cut across chunks are decoded whole"""
+        text = json.dumps({"a": 'x\\"yሴ😀z'})
+        
+        for split in range(1, len(text)):
+            assert decode_in_chunks(text, [split]) == {"a": 'x\\"yሴ😀z'}
+    
+    def test_empty_object(self):
+        """Test an empty object decodes"""
+        assert decode_in_chunks(" { } ", [2]) == {}
+    
+    @pytest.mark.parametrize("text", [
+        '{"a": 1',
+        '{"a": "unterminated',
+        '{"a" 1}',
+        '[1, 2]',
+        '{"a": "\\x"}',
+        '{"a": 1} trailing',
+    ])
+    def test_malformed(self, text):
+        """Test truncated or malformed documents raise ValueError"""
+        with pytest.raises(ValueError):
+            decode_in_chunks(text, [3])
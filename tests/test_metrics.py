@@ -0,0 +1,157 @@
+"""
+Tests for per-endpoint API metrics
+"""
+import asyncio
+import httpx
+import pytest
+from utils.api_client import MezmurAPIClient, RetryPolicy
+from utils.metrics import APIMetrics, LatencyHistogram, error_class, start_metrics_server
+
+
+def make_client(handler, **kwargs) -> MezmurAPIClient:
+    """Build a client whose HTTP transport is served by a local handler function"""
+    client = MezmurAPIClient("http://test.api", **kwargs)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+class TestLatencyHistogram:
+    """Test cases for LatencyHistogram"""
+    
+    def test_percentiles(self):
+        """Test percentiles over the recent window"""
+        histogram = LatencyHistogram()
+        assert histogram.percentile(50) is None
+        
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000)
+        
+        assert histogram.percentile(50) == pytest.approx(0.050)
+        assert histogram.percentile(90) == pytest.approx(0.090)
+        assert histogram.percentile(99) == pytest.approx(0.099)
+        assert histogram.count == 100
+    
+    def test_cumulative_buckets(self):
+        """Test bucket counts are cumulative and end with the total"""
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(seconds)
+        
+        assert histogram.cumulative() == [1, 3, 4]
+    
+    def test_window_is_bounded(self):
+        """Test only the most recent samples feed the percentiles"""
+        histogram = LatencyHistogram(window=10)
+        for _ in range(100):
+            histogram.observe(5.0)
+        for _ in range(10):
+            histogram.observe(0.01)
+        
+        assert histogram.percentile(99) == 0.01
+        assert histogram.count == 110
+
+
+class TestAPIMetrics:
+    """Test cases for APIMetrics"""
+    
+    def test_error_class_unwraps_cause(self):
+        """Test the root error class is reported through wrapper exceptions"""
+        try:
+            try:
+                raise httpx.ConnectError("refused")
+            except Exception as e:
+                raise Exception(f"Lyrics fetch failed: {e}")
+        except Exception as wrapped:
+            assert error_class(wrapped) == "ConnectError"
+    
+    def test_snapshot(self):
+        """Test snapshot counts calls, errors and bytes per endpoint"""
+        metrics = APIMetrics()
+        metrics.observe("lyrics", 0.1)
+        metrics.observe("lyrics", 0.2, error=ValueError("bad"))
+        metrics.observe_upstream("lyrics", 512)
+        
+        snapshot = metrics.snapshot()["lyrics"]
+        assert snapshot["requests"] == 2
+        assert snapshot["errors"] == {"ValueError": 1}
+        assert snapshot["bytes_received"] == 512
+        assert snapshot["latency"]["p99"] == 0.2
+    
+    def test_prometheus_text(self):
+        """Test Prometheus export includes counters and histogram series"""
+        metrics = APIMetrics()
+        metrics.observe("search_prefix", 0.02)
+        metrics.observe_upstream("search_prefix", 100)
+        
+        text = metrics.to_prometheus()
+        assert '# TYPE mezmur_api_requests_total counter' in text
+        assert 'mezmur_api_requests_total{endpoint="search_prefix"} 1' in text
+        assert 'mezmur_api_received_bytes_total{endpoint="search_prefix"} 100' in text
+        assert 'mezmur_api_request_duration_seconds_bucket{endpoint="search_prefix",le="+Inf"} 1' in text
+    
+    @pytest.mark.asyncio
+    async def test_metrics_server(self):
+        """Test the metrics endpoint serves the rendered text"""
+        server = await start_metrics_server(lambda: "mezmur_api_up 1\n", host="127.0.0.1", port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with httpx.AsyncClient() as http:
+                response = await http.get(f"http://127.0.0.1:{port}/metrics")
+                missing = await http.get(f"http://127.0.0.1:{port}/other")
+        finally:
+            server.close()
+            await server.wait_closed()
+        
+        assert response.status_code == 200
+        assert response.text == "mezmur_api_up 1\n"
+        assert missing.status_code == 404
+
+
+class TestClientInstrumentation:
+    """Test cases for MezmurAPIClient metrics"""
+    
+    @pytest.mark.asyncio
+    async def test_successful_calls_are_recorded(self):
+        """Test calls, upstream requests and bytes are counted per endpoint"""
+        body = b'{"title": "Song", "lyrics": "Line"}'
+        client = make_client(lambda request: httpx.Response(200, content=body))
+        
+        await client.get_lyrics("Song")
+        await client.get_lyrics("Song")
+        
+        snapshot = client.metrics_snapshot()["endpoints"]["lyrics"]
+        assert snapshot["requests"] == 2
+        assert snapshot["upstream_requests"] == 2
+        assert snapshot["bytes_received"] == 2 * len(body)
+        assert snapshot["errors"] == {}
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_errors_are_recorded_by_class(self):
+        """Test failures are counted under their underlying error class"""
+        client = make_client(
+            lambda request: httpx.Response(404, json={"detail": "Not found"}),
+            retry_policy=RetryPolicy(attempts=1)
+        )
+        
+        with pytest.raises(Exception):
+            await client.get_lyrics("Missing")
+        
+        assert client.metrics.snapshot()["lyrics"]["errors"] == {"HTTPStatusError": 1}
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_calls_count_once_upstream(self):
+        """Test coalesced callers are counted as calls but not as upstream requests"""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"title": "Song", "lyrics": "Line"})
+        
+        client = make_client(handler)
+        await asyncio.gather(*(client.get_lyrics("Song") for _ in range(5)))
+        
+        snapshot = client.metrics.snapshot()["lyrics"]
+        assert snapshot["requests"] == 5
+        assert snapshot["upstream_requests"] == 1
+        assert 'mezmur_api_coalesced_requests_total 4' in client.prometheus_metrics()
+        await client.close()
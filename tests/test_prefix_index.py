@@ -0,0 +1,153 @@
+"""
+Tests for the in-process prefix index
+"""
+import random
+import pytest
+from unittest.mock import MagicMock
+from handlers.search import SearchHandler
+from utils.api_client import PaginatedResponse, SearchResult
+from utils.catalog import CatalogMirror
+from utils.prefix_index import PrefixIndex
+
+
+TITLES = [
+    ("Samuel Tesfamichael", 1),
+    ("Samuel Tesfamichael/Misale Yeleleh", 2),
+    ("Samuel Tesfamichael/Misale Yeleleh/Yekebere", 3),
+    ("Samuel Tesfamichael/Misale Yeleleh/Yene Geta", 4),
+    ("Aster Abebe/Yekebere/Yekebere", 5),
+    ("Aster Abebe", 6),
+]
+
+
+def naive_prefix(titles, query):
+    """Titles with any path segment starting with query"""
+    q = " ".join(query.split()).casefold()
+    matches = []
+    for title, pageid in titles:
+        key = " ".join(title.split()).casefold()
+        segments = key.split("/")
+        if q and any("/".join(segments[i:]).startswith(q) for i in range(len(segments))):
+            matches.append(pageid)
+    return matches
+
+
+class TestPrefixIndex:
+    """Test cases for PrefixIndex"""
+    
+    def test_matches_every_segment(self):
+        """Test a query matches from the start of any path segment"""
+        index = PrefixIndex(TITLES)
+        
+        result = index.search_prefix("yekebere")
+        
+        assert sorted(r.title for r in result.data) == [
+            "Aster Abebe/Yekebere/Yekebere",
+            "Samuel Tesfamichael/Misale Yeleleh/Yekebere",
+        ]
+        assert result.total == 2
+        assert all(isinstance(r, SearchResult) for r in result.data)
+    
+    def test_full_path_and_case(self):
+        """Test multi-segment queries and case/whitespace insensitivity"""
+        index = PrefixIndex(TITLES)
+        
+        result = index.search_prefix("  SAMUEL tesfamichael/misale yeleleh/y")
+        
+        assert [r.pageid for r in result.data] == [3, 4]
+        assert index.search_prefix("misale yeleleh/yene").data[0].pageid == 4
+        assert index.search_prefix("").total == 0
+        assert index.search_prefix("nothing").data == []
+    
+    def test_pages_and_tokens_agree(self):
+        """Test page numbers and next_token walk the same unique results"""
+        index = PrefixIndex(TITLES)
+        
+        by_page = [index.search_prefix("y", page=p, limit=2) for p in (1, 2)]
+        by_token, token = [], None
+        while True:
+            result = index.search_prefix("y", limit=2, continue_token=token)
+            by_token.append(result)
+            token = result.next_token
+            if not result.has_next:
+                break
+        
+        assert [[r.title for r in p.data] for p in by_page] == [[r.title for r in p.data] for p in by_token]
+        assert by_page[0].has_next and not by_page[0].has_prev
+        assert by_page[-1].has_prev and not by_page[-1].has_next
+        assert sum(len(p.data) for p in by_page) == by_page[0].total == 3
+    
+    def test_foreign_token_falls_back_to_page(self):
+        """Test a continue token that is not a position (e.g. the API's) resumes by page number"""
+        index = PrefixIndex(TITLES)
+        
+        result = index.search_prefix("y", page=2, limit=2, continue_token="opaque-api-token")
+        
+        assert [r.title for r in result.data] == [r.title for r in index.search_prefix("y", page=2, limit=2).data]
+    
+    def test_geez_spellings(self):
+        """Test a title matches whichever letter series the query is spelled with"""
+        index = PrefixIndex([("ሀይሉ ሰይፉ/ሰላም ለኪ", 1), ("ጸጋዬ/ፀሐይ ወጣ", 2)])
+        
+        assert [r.pageid for r in index.search_prefix("ሠላም").data] == [1]
+        assert [r.pageid for r in index.search_prefix("ኀይሉ").data] == [1]
+        assert [r.pageid for r in index.search_prefix("ጸሀይ").data] == [2]
+        assert index.search_prefix("ፀሐይ").data[0].title == "ጸጋዬ/ፀሐይ ወጣ"
+    
+    def test_matches_naive_search(self):
+        """Test results agree with a brute-force segment scan on a random catalog"""
+        rng = random.Random(7)
+        syllables = ["ye", "ke", "be", "re", "sa", "mu", "el", "ge", "ta", "me"]
+        word = lambda: "".join(rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+        titles = []
+        for a in range(30):
+            artist = word().title()
+            titles.append((artist, len(titles) + 1))
+            for b in range(3):
+                album = f"{artist}/{word()} {word()}"
+                titles.append((album, len(titles) + 1))
+                for c in range(4):
+                    titles.append((f"{album}/{word()}", len(titles) + 1))
+        index = PrefixIndex(titles)
+        
+        for query in ["y", "ye", "yek", "sa", "re/", "ke be", "mu", "x"]:
+            found, token = [], None
+            while True:
+                result = index.search_prefix(query, limit=7, continue_token=token)
+                found += [r.pageid for r in result.data]
+                token = result.next_token
+                if not result.has_next:
+                    break
+            expected = naive_prefix(titles, query)
+            assert sorted(found) == sorted(expected), query
+            assert len(found) == len(set(found)) == result.total
+
+
+class TestLocalPrefixSearch:
+    """Test cases for answering prefix searches from the catalog mirror"""
+    
+    @pytest.mark.asyncio
+    async def test_mirror_answers_search(self, mock_api_client):
+        """Test SearchHandler uses the mirror's results when it has matches"""
+        catalog = MagicMock(spec=CatalogMirror)
+        catalog.search_prefix.return_value = PrefixIndex(TITLES).search_prefix("yene", limit=10)
+        handler = SearchHandler(mock_api_client, catalog=catalog)
+        
+        results = await handler._search_prefix("yene", limit=10)
+        
+        assert [r.pageid for r in results.data] == [4]
+        mock_api_client.search_prefix.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_api_fallback_on_local_miss(self, mock_api_client):
+        """Test the API is asked when the mirror is empty or has no match"""
+        empty = PaginatedResponse(data=[], total=0, page=1, limit=10, has_next=False, has_prev=False)
+        catalog = MagicMock(spec=CatalogMirror)
+        mock_api_client.search_prefix.return_value = empty
+        handler = SearchHandler(mock_api_client, catalog=catalog)
+        
+        for local in (None, empty):
+            catalog.search_prefix.return_value = local
+            await handler._search_prefix("yene", limit=10)
+        
+        assert mock_api_client.search_prefix.call_count == 2
@@ -0,0 +1,124 @@
+"""
+Tests for the retry policy and circuit breaker
+"""
+import time
+import pytest
+from utils.resilience import CircuitBreaker, RetryPolicy, call_budget, current_budget
+
+
+class FakeClock:
+    """Manually advanced clock for breaker tests"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestRetryPolicy:
+    """Test cases for RetryPolicy"""
+    
+    def test_backoff_is_jittered_and_capped(self):
+        """Test backoff stays within the exponential envelope and the cap"""
+        policy = RetryPolicy(base_delay=0.1, max_delay=0.5)
+        
+        for attempt in range(6):
+            delay = policy.backoff(attempt)
+            assert 0 <= delay <= min(0.5, 0.1 * 2 ** attempt)
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker"""
+    
+    def test_opens_after_threshold(self):
+        """Test the breaker opens after consecutive failures and rejects calls"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=FakeClock())
+        
+        for _ in range(3):
+            assert breaker.allow_request()
+            breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+        assert breaker.stats()["rejected"] == 1
+        assert breaker.stats()["times_opened"] == 1
+    
+    def test_success_resets_failures(self):
+        """Test a success clears the consecutive failure count"""
+        breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_half_open_single_probe(self):
+        """Test only one probe goes through after the reset timeout"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        
+        clock.now = 5
+        assert not breaker.allow_request()
+        assert breaker.retry_in() == pytest.approx(5)
+        
+        clock.now = 11
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow_request()
+        
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+    
+    def test_failed_probe_reopens(self):
+        """Test a failed probe opens the breaker for another timeout"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        
+        clock.now = 11
+        assert breaker.allow_request()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+        assert breaker.stats()["times_opened"] == 2
+    
+    def test_release_frees_probe(self):
+        """Test a cancelled probe lets the next call probe"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 11
+        
+        assert breaker.allow_request()
+        breaker.release()
+        assert breaker.allow_request()
+
+
+class TestCallBudget:
+    """Test cases for call_budget blocks"""
+    
+    def test_shared_deadline(self):
+        """Test a block gives its calls one deadline, and nested blocks can only shorten it"""
+        with call_budget(5.0) as outer:
+            assert current_budget() is outer
+            assert outer.expires_at == pytest.approx(time.monotonic() + 5.0, abs=0.1)
+            with call_budget(60.0) as inner:
+                assert inner.seconds == 5.0 and inner.expires_at == outer.expires_at
+            with call_budget(1.0) as inner:
+                assert inner.expires_at < outer.expires_at
+        assert current_budget() is None
+    
+    def test_per_call(self):
+        """Test per_call budgets start at each call, within any enclosing deadline"""
+        with call_budget(60.0, per_call=True) as budget:
+            assert budget.expires_at is None
+            assert budget.deadline(100.0) == 160.0
+            with call_budget(None) as unchanged:
+                assert unchanged is budget
+        with call_budget(2.0):
+            with call_budget(60.0, per_call=True) as budget:
+                assert budget.seconds == 2.0 and budget.expires_at is not None
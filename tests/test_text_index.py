@@ -0,0 +1,261 @@
+"""
+Tests for the local full text index
+"""
+import httpx
+import pytest
+from unittest.mock import MagicMock
+from handlers.search import SearchHandler
+from utils.api_client import Album, Artist, MezmurAPIClient, PaginatedResponse, SearchResult, Song
+from utils.catalog import CatalogMirror
+from utils.text_index import SearchIndexer, TextIndex, index_terms, tokenize
+
+
+DOCUMENTS = [
+    ("Samuel Tesfamichael", 1, None),
+    ("Samuel Tesfamichael/Misale Yeleleh", 2, None),
+    ("Samuel Tesfamichael/Misale Yeleleh/Yekebere", 3, "ክብር ለእግዚአብሔር ይሁን\nYekebere yekebere\nስሙ ይመስገን"),
+    ("Aster Abebe/Amlakie/Amlakie", 4, "የአምላኬ ፍቅር፡ ዘላለም ነው።\nAmlakie"),
+    ("Aster Abebe/Amlakie/Selam", 5, "ሰላም ሰላም\nYekebere"),
+]
+
+
+def catalog_snapshot():
+    artist = Artist("Samuel Tesfamichael", 1, 0)
+    album = Album("Samuel Tesfamichael/Misale Yeleleh", 2, 0)
+    song = Song("Samuel Tesfamichael/Misale Yeleleh/Yekebere", 3, 0)
+    return CatalogMirror._build([artist], {1: [(album, [song])]}, None, 0.0)
+
+
+class TestTokenize:
+    """Test cases for Ge'ez and Latin tokenization"""
+    
+    def test_geez_words(self):
+        """Test Ge'ez text splits on spaces and Ethiopic punctuation"""
+        assert tokenize("ክብር፡ለእግዚአብሄር። ይሁን፣ ሰላም") == ["ክብር", "ለእግዚአብሄር", "ይሁን", "ሰላም"]
+    
+    def test_transliterations(self):
+        """Test case, apostrophes, diacritics and doubled letters are folded"""
+        assert tokenize("Ge'ez GEʿEZ") == ["gez", "gez"]
+        assert tokenize("Tesfaa Yelelleh") == tokenize("tesfa yeleleh")
+        assert tokenize("Mäsqäl/Song") == ["masqal", "song"]
+    
+    def test_geez_spelling_variants(self):
+        """Test homophone letter series fold to one spelling in every vowel order"""
+        assert tokenize("ሐዋርያ ሠላም ዐይን ፀሐይ ኀይል") == ["ሀዋርያ", "ሰላም", "አይን", "ጸሀይ", "ሀይል"]
+        assert tokenize("ሥላሴ ሡ ሖ ዑ ፆ") == tokenize("ስላሴ ሱ ሆ ኡ ጾ")
+        assert tokenize("ሃሌ ኣሜን") == ["ሀሌ", "አሜን"]
+    
+    def test_proclitics_indexed_bare(self):
+        """Test Ge'ez words with a proclitic are also indexed without it"""
+        assert list(index_terms("የአምላኬ ለእግዚአብሄር እንደ")) == ["የአምላኬ", "አምላኬ", "ለእግዚአብሄር", "እግዚአብሄር", "እንደ"]
+
+
+class TestTextIndex:
+    """Test cases for TextIndex"""
+    
+    def test_lyrics_match_with_snippet(self):
+        """Test lyrics words find songs, with the matching line as snippet"""
+        index = TextIndex(DOCUMENTS)
+        
+        result = index.search("እግዚአብሔር")
+        
+        assert [r.pageid for r in result.data] == [3]
+        assert result.data[0].snippet == "ክብር ለእግዚአብሔር ይሁን"
+    
+    def test_title_matches_rank_first(self):
+        """Test title words outweigh the same word in lyrics"""
+        index = TextIndex(DOCUMENTS)
+        
+        result = index.search("yekebere")
+        
+        assert [r.pageid for r in result.data] == [3, 5]
+        assert result.data[1].snippet == "Yekebere"
+    
+    def test_all_words_rank_before_some(self):
+        """Test documents matching every query word come before partial matches"""
+        index = TextIndex(DOCUMENTS)
+        
+        result = index.search("aster selam")
+        
+        assert result.data[0].pageid == 5
+        assert {r.pageid for r in result.data} == {4, 5}
+    
+    def test_last_word_is_prefix(self):
+        """Test the last query word also matches longer words"""
+        index = TextIndex(DOCUMENTS)
+        
+        assert [r.pageid for r in index.search("misale yel").data][:1] == [2]
+        assert index.search("ዘላ").data[0].pageid == 4
+        assert index.search("").total == 0
+        assert index.search("nothing").data == []
+    
+    def test_any_spelling_matches(self):
+        """Test lyrics and queries match whichever letter series each is spelled with"""
+        index = TextIndex(DOCUMENTS)
+        
+        assert [r.pageid for r in index.search("ሠላም").data] == [5]
+        assert [r.pageid for r in index.search("እግዚዐብሔር").data] == [3]
+    
+    def test_pagination(self):
+        """Test page numbers and next_token walk the same ranked results"""
+        index = TextIndex(DOCUMENTS)
+        everything = [r.pageid for r in index.search("samuel", limit=10).data]
+        
+        first = index.search("samuel", limit=2)
+        second = index.search("samuel", limit=2, continue_token=first.next_token)
+        
+        assert first.total == 3 and first.has_next and not first.has_prev
+        assert [r.pageid for r in first.data + second.data] == everything
+        assert second.has_prev and not second.has_next
+        assert [r.pageid for r in index.search("samuel", page=2, limit=2).data] == everything[2:]
+
+
+class TestSearchIndexer:
+    """Test cases for building the index from the catalog and lyrics caches"""
+    
+    @staticmethod
+    def make_client(path=None) -> MezmurAPIClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            if "/lyrics/rich/" in request.url.path:
+                return httpx.Response(200, json={"title": "Selam", "html_content": "<p>ሰላም &amp; ፍቅር</p>"})
+            return httpx.Response(200, json={"title": "Yekebere", "lyrics": "ክብር ለእግዚአብሔር"})
+        
+        client = MezmurAPIClient("http://test.api", enable_cache=True, disk_cache_path=path)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+    
+    @pytest.mark.asyncio
+    async def test_indexes_catalog_and_cached_lyrics(self):
+        """Test mirrored titles and memory-cached plain and rich lyrics are searchable"""
+        client = self.make_client()
+        catalog = MagicMock(spec=CatalogMirror)
+        catalog.snapshot = catalog_snapshot()
+        indexer = SearchIndexer(client, catalog)
+        await client.get_lyrics("Samuel Tesfamichael/Misale Yeleleh/Yekebere")
+        await client.get_rich_lyrics("Aster Abebe/Amlakie/Selam")
+        
+        await indexer.refresh()
+        
+        assert indexer.search("misale").total == 2
+        assert [r.pageid for r in indexer.search("እግዚአብሔር").data] == [3]
+        assert indexer.search("ፍቅር").data[0].title == "Aster Abebe/Amlakie/Selam"
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_rebuilds_only_on_change(self):
+        """Test refreshes skip the rebuild until new lyrics or a new snapshot arrive"""
+        client = self.make_client()
+        catalog = MagicMock(spec=CatalogMirror)
+        catalog.snapshot = catalog_snapshot()
+        indexer = SearchIndexer(client, catalog)
+        
+        first = await indexer.refresh()
+        assert await indexer.refresh() is first
+        await client.get_lyrics("Samuel Tesfamichael/Misale Yeleleh/Yekebere")
+        second = await indexer.refresh()
+        catalog.snapshot = catalog_snapshot()
+        await indexer.refresh()
+        
+        assert second is not first
+        assert (indexer.builds, indexer.skipped) == (3, 1)
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_extracts_only_new_entries(self):
+        """Test each cached lyrics entry has its text extracted once, and again only when it is stored anew"""
+        client = self.make_client()
+        indexer = SearchIndexer(client)
+        await client.get_lyrics("Samuel Tesfamichael/Misale Yeleleh/Yekebere")
+        await client.get_rich_lyrics("Aster Abebe/Amlakie/Selam")
+        extracted = []
+        merge_entries = indexer._merge_entries
+        indexer._merge_entries = lambda entries: extracted.append(sorted(entries)) or merge_entries(entries)
+        
+        await indexer.refresh()
+        await indexer.refresh()
+        client.cache.delete(("lyrics", "Samuel Tesfamichael/Misale Yeleleh/Yekebere"))
+        await client.get_lyrics("Samuel Tesfamichael/Misale Yeleleh/Yekebere")
+        await indexer.refresh()
+        
+        assert extracted == [
+            [("lyrics", "Samuel Tesfamichael/Misale Yeleleh/Yekebere"), ("rich_lyrics", "Aster Abebe/Amlakie/Selam")],
+            [("lyrics", "Samuel Tesfamichael/Misale Yeleleh/Yekebere")],
+        ]
+        assert indexer.search("ፍቅር").total == 1
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_loads_disk_tier(self, tmp_path):
+        """Test lyrics persisted by an earlier run are indexed on the first refresh"""
+        first = self.make_client(str(tmp_path / "cache.db"))
+        await first.get_lyrics("Samuel Tesfamichael/Misale Yeleleh/Yekebere")
+        await first.close()
+        
+        client = self.make_client(str(tmp_path / "cache.db"))
+        indexer = SearchIndexer(client)
+        await indexer.refresh()
+        
+        assert indexer.search("ክብር").data[0].title == "Samuel Tesfamichael/Misale Yeleleh/Yekebere"
+        assert client.cache_stats()["disk"]["hits"] == 0
+        await client.close()
+
+
+class TestLocalFullSearch:
+    """Test cases for answering /search_full from the local index"""
+    
+    @pytest.mark.asyncio
+    async def test_index_answers_search(self, mock_api_client):
+        """Test the local index alone answers when it fills the page"""
+        search_index = MagicMock(spec=SearchIndexer)
+        search_index.search.return_value = TextIndex(DOCUMENTS).search("ሰላም", limit=1)
+        handler = SearchHandler(mock_api_client, search_index=search_index)
+        
+        results = await handler._search_full("ሰላም", limit=1)
+        
+        assert [r.pageid for r in results.data] == [5]
+        mock_api_client.search_full.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_api_tops_up_short_page(self, mock_api_client):
+        """Test lyrics matches the index has not seen still come from the API, after the local ones"""
+        search_index = MagicMock(spec=SearchIndexer)
+        search_index.search.return_value = TextIndex(DOCUMENTS).search("ሰላም")
+        local_title = search_index.search.return_value.data[0].title
+        mock_api_client.search_full.return_value = PaginatedResponse(
+            data=[SearchResult(local_title, 5), SearchResult("Other Artist/Album/Selam Lehulu", 77)],
+            total=2, page=1, limit=10, has_next=False, has_prev=False
+        )
+        handler = SearchHandler(mock_api_client, search_index=search_index)
+        
+        results = await handler._search_full("ሰላም", limit=10)
+        
+        assert [r.pageid for r in results.data] == [5, 77]
+        assert results.total == 2 and not results.has_next
+        
+        mock_api_client.search_full.side_effect = Exception("Full search failed")
+        assert [r.pageid for r in (await handler._search_full("ሰላም", limit=10)).data] == [5]
+    
+    @pytest.mark.asyncio
+    async def test_api_fallback_on_local_miss(self, mock_api_client):
+        """Test the API is asked before the first build or when nothing matches locally"""
+        empty = PaginatedResponse(data=[], total=0, page=1, limit=10, has_next=False, has_prev=False)
+        search_index = MagicMock(spec=SearchIndexer)
+        mock_api_client.search_full.return_value = empty
+        handler = SearchHandler(mock_api_client, search_index=search_index)
+        
+        for local in (None, empty):
+            search_index.search.return_value = local
+            await handler._search_full("ሰላም", limit=10)
+        
+        assert mock_api_client.search_full.call_count == 2
+    
+    def test_snippets_in_formatted_results(self):
+        """Test snippets are shown under songs as plain, Markdown-safe text"""
+        client = MezmurAPIClient("http://test.api")
+        results = TextIndex(DOCUMENTS).search("yekebere").data
+        results[1].snippet = "<span class=\"searchmatch\">Yekebere</span> *bold* &amp; more"
+        
+        formatted = client.format_search_results(results, show_snippets=True)
+        
+        assert "↳ Yekebere bold & more" in formatted
+        assert "↳" not in client.format_search_results(results)
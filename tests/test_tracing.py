@@ -0,0 +1,100 @@
+"""
+Tests for sampled structured tracing
+"""
+import logging
+import httpx
+import pytest
+from utils import api_client
+from utils.api_client import MezmurAPIClient
+from utils.tracing import Tracer
+
+
+class TestTracer:
+    """Test cases for Tracer"""
+    
+    def test_disabled_by_sample_rate(self, caplog):
+        """Test nothing is emitted, and lazy fields never run, with a zero sample rate"""
+        tracer = Tracer("test.trace.off", sample_rate=0)
+        calls = []
+        
+        with caplog.at_level(logging.DEBUG, logger="test.trace.off"):
+            tracer.event("event", value=lambda: calls.append(1))
+            assert tracer.span("span") is None
+        
+        assert caplog.records == []
+        assert calls == []
+    
+    def test_gated_by_logger_level(self, caplog):
+        """Test events below the logger's level are dropped before sampling"""
+        rolls = []
+        tracer = Tracer("test.trace.level", sample_rate=0.5, rng=lambda: rolls.append(1) or 0.0)
+        
+        with caplog.at_level(logging.INFO, logger="test.trace.level"):
+            tracer.event("event")
+        
+        assert caplog.records == []
+        assert rolls == []
+    
+    def test_sampling(self, caplog):
+        """Test only rolls below the sample rate are emitted"""
+        rolls = iter([0.05, 0.5, 0.09, 0.99])
+        tracer = Tracer("test.trace.sampled", sample_rate=0.1, rng=lambda: next(rolls))
+        
+        with caplog.at_level(logging.DEBUG, logger="test.trace.sampled"):
+            for i in range(4):
+                tracer.event("event", i=i)
+        
+        assert [record.trace.fields()["i"] for record in caplog.records] == [0, 2]
+    
+    def test_structured_fields_and_lazy_values(self, caplog):
+        """Test records carry the event fields, resolving callables once"""
+        tracer = Tracer("test.trace.fields", sample_rate=1)
+        calls = []
+        
+        def preview():
+            calls.append(1)
+            return "body"
+        
+        with caplog.at_level(logging.DEBUG, logger="test.trace.fields"):
+            tracer.event("lyrics.response", status=200, preview=preview)
+        
+        record = caplog.records[0]
+        assert record.trace.event == "lyrics.response"
+        assert record.trace.fields() == {"status": 200, "preview": "body"}
+        assert record.getMessage() == "lyrics.response status=200 preview='body'"
+        assert calls == [1]
+    
+    def test_span_events_share_trace_id(self, caplog):
+        """Test span events are prefixed with the span name and share a trace id"""
+        tracer = Tracer("test.trace.span", sample_rate=1)
+        
+        with caplog.at_level(logging.DEBUG, logger="test.trace.span"):
+            span = tracer.span("lyrics", url="/lyrics/x")
+            span.event("response", status=200)
+        
+        first, second = (record.trace for record in caplog.records)
+        assert (first.event, second.event) == ("lyrics.start", "lyrics.response")
+        assert first.fields()["trace_id"] == second.fields()["trace_id"]
+        assert second.fields()["elapsed_ms"] >= 0
+
+
+class TestClientTracing:
+    """Test cases for tracing in MezmurAPIClient.get_lyrics"""
+    
+    @pytest.mark.asyncio
+    async def test_get_lyrics_traces_request(self, caplog, monkeypatch, capsys):
+        """Test get_lyrics traces the request and response instead of printing"""
+        monkeypatch.setattr(api_client, "tracer", Tracer(api_client.__name__, sample_rate=1))
+        client = MezmurAPIClient("http://test.api")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"title": "Song", "lyrics": "Line"})
+        ))
+        
+        with caplog.at_level(logging.DEBUG, logger=api_client.__name__):
+            await client.get_lyrics("Song")
+        
+        events = [record.trace for record in caplog.records if hasattr(record, "trace")]
+        assert [event.event for event in events] == ["lyrics.start", "lyrics.response"]
+        assert events[1].fields()["status"] == 200
+        assert capsys.readouterr().out == ""
+        await client.close()
@@ -2,53 +2,280 @@
 API Client for communicating with the Mezmur FastAPI service
 """
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Hashable, AsyncIterator, Tuple, TypeVar
 import asyncio
-from dataclasses import dataclass
+import codecs
+import html
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from utils.cache import CacheEntry, TTLCache, query_key
+from utils.disk_cache import DiskCache, DiskEntry
+from utils.json_stream import JSONObjectStream
+from utils.metrics import APIMetrics, format_samples
+from utils.tracing import Tracer
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceededError, HedgePolicy, Hedger, RetryPolicy, RETRYABLE_STATUSES,
+    call_budget, current_budget
+)
+
+logger = logging.getLogger(__name__)
+tracer = Tracer(__name__)
+
+T = TypeVar("T")
+
+# Default freshness (seconds) for each cacheable endpoint
+DEFAULT_CACHE_TTLS = {
+    "lyrics": 3600.0,
+    "rich_lyrics": 3600.0,
+    "artist_albums": 1800.0,
+    "album_songs": 1800.0,
+}
+
+# Endpoints whose slow requests may be hedged with a duplicate request
+HEDGED_ENDPOINTS = ("lyrics", "rich_lyrics")
+
+# Size of the decompressed chunks a streamed body is decoded in; smaller bodies are decoded whole
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
 
 
 @dataclass
+class TransportConfig:
+    """Connection pool, keep-alive and timeout settings for the API transport"""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 5.0
+    http2: bool = False
+    connect_timeout: float = 30.0
+    read_timeout: float = 30.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 30.0
+    uds: Optional[str] = None
+    compression: bool = True
+    
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """Build a config from API_* environment variables, falling back to the defaults"""
+        default = cls()
+        return cls(
+            max_connections=_env_int("API_MAX_CONNECTIONS", default.max_connections),
+            max_keepalive_connections=_env_int("API_MAX_KEEPALIVE_CONNECTIONS", default.max_keepalive_connections),
+            keepalive_expiry=_env_float("API_KEEPALIVE_EXPIRY", default.keepalive_expiry),
+            http2=_env_flag("API_HTTP2", default.http2),
+            connect_timeout=_env_float("API_CONNECT_TIMEOUT", default.connect_timeout),
+            read_timeout=_env_float("API_READ_TIMEOUT", default.read_timeout),
+            write_timeout=_env_float("API_WRITE_TIMEOUT", default.write_timeout),
+            pool_timeout=_env_float("API_POOL_TIMEOUT", default.pool_timeout),
+            uds=os.getenv("API_UDS") or None,
+            compression=_env_flag("API_COMPRESSION", default.compression),
+        )
+    
+    def limits(self) -> httpx.Limits:
+        """httpx pool limits for this config"""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+    
+    def timeout(self) -> httpx.Timeout:
+        """httpx timeouts for this config"""
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout
+        )
+    
+    def accept_encoding(self) -> str:
+        """Accept-Encoding to send: brotli when a decoder for it is installed, then gzip"""
+        if not self.compression:
+            return "identity"
+        for module in ("brotli", "brotlicffi"):
+            try:
+                __import__(module)
+                return "br, gzip"
+            except ImportError:
+                pass
+        return "gzip"
+
+
+def build_http_client(config: TransportConfig, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Create the httpx client for a transport config"""
+    http2 = config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("API_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+    
+    limits = config.limits()
+    if transport is None and config.uds:
+        transport = httpx.AsyncHTTPTransport(uds=config.uds, limits=limits, http2=http2)
+    
+    return httpx.AsyncClient(
+        timeout=config.timeout(), limits=limits, http2=http2, transport=transport,
+        headers={"Accept-Encoding": config.accept_encoding()}
+    )
+
+
+def parse_title(title: str) -> Tuple[str, str, Optional[str], str]:
+    """Kind, artist, album and display name of an "Artist/Album/Song" title"""
+    parts = title.split("/")
+    if len(parts) == 1:
+        return "artist", title, None, title
+    if len(parts) == 2:
+        return "album", parts[0], parts[1], parts[1]
+    return "song", parts[0], parts[1], parts[-1]
+
+
+@dataclass(slots=True)
 class SearchResult:
     title: str
     pageid: int
     snippet: Optional[str] = None
     size: Optional[int] = None
     wordcount: Optional[int] = None
+    # Parsed from the title on first use, so decoding a page stays as cheap as before
+    _parsed: Optional[Tuple[str, str, Optional[str], str]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def _parse(self) -> Tuple[str, str, Optional[str], str]:
+        self._parsed = parse_title(self.title)
+        return self._parsed
+    
+    @property
+    def kind(self) -> str:
+        """artist, album or song"""
+        return (self._parsed or self._parse())[0]
+    
+    @property
+    def artist(self) -> str:
+        return (self._parsed or self._parse())[1]
+    
+    @property
+    def album(self) -> Optional[str]:
+        return (self._parsed or self._parse())[2]
+    
+    @property
+    def name(self) -> str:
+        """Display name, the last part of the title"""
+        return (self._parsed or self._parse())[3]
+    
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> "SearchResult":
+        get = item.get
+        return cls(item["title"], item["pageid"], get("snippet"), get("size"), get("wordcount"))
 
 
-@dataclass
+@dataclass(slots=True)
 class Artist:
     title: str
     pageid: int
     namespace: int
+    
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> "Artist":
+        return cls(item["title"], item["pageid"], item["namespace"])
 
 
-@dataclass
+@dataclass(slots=True)
 class Album:
     title: str
     pageid: int
     namespace: int
+    _name: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def name(self) -> str:
+        """Display name, the last part of the title (split on first use)"""
+        if self._name is None:
+            self._name = self.title.rsplit("/", 1)[-1]
+        return self._name
+    
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> "Album":
+        return cls(item["title"], item["pageid"], item["namespace"])
 
 
-@dataclass
+@dataclass(slots=True)
 class Song:
     title: str
     pageid: int
     namespace: int
     artist: Optional[str] = None
     album: Optional[str] = None
+    _name: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def name(self) -> str:
+        """Display name, the last part of the title (split on first use)"""
+        if self._name is None:
+            self._name = self.title.rsplit("/", 1)[-1]
+        return self._name
+    
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> "Song":
+        get = item.get
+        return cls(item["title"], item["pageid"], item["namespace"], get("artist"), get("album"))
 
 
-@dataclass
+@dataclass(slots=True)
 class RichLyrics:
     title: str
     html_content: str
     artist: Optional[str] = None
     album: Optional[str] = None
     page_id: Optional[int] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RichLyrics":
+        return cls(
+            title=data["title"],
+            html_content=data["html_content"],
+            artist=data.get("artist"),
+            album=data.get("album"),
+            page_id=data.get("page_id")
+        )
 
 
-@dataclass
+@dataclass(slots=True)
+class LyricsResult:
+    title: str
+    lyrics: Optional[Dict[str, Any]] = None
+    error: Optional[Exception] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(slots=True)
 class PaginatedResponse:
     data: List[Any]
     total: int
@@ -59,21 +286,669 @@ class PaginatedResponse:
     next_token: Optional[str] = None
 
 
+def default_json_loads() -> Callable[[bytes], Any]:
+    """Fastest available JSON decoder: orjson when installed, else the standard library"""
+    try:
+        import orjson
+        return orjson.loads
+    except ImportError:
+        return json.loads
+
+
+def decode_page(payload: Dict[str, Any], item_factory: Callable[[Dict[str, Any]], T]) -> PaginatedResponse:
+    """Decode a paginated API payload, converting each item with item_factory"""
+    return PaginatedResponse(
+        data=[item_factory(item) for item in payload["data"]],
+        total=payload["total"],
+        page=payload["page"],
+        limit=payload["limit"],
+        has_next=payload["has_next"],
+        has_prev=payload["has_prev"],
+        next_token=payload.get("next_token")
+    )
+
+
+@dataclass
+class Validators:
+    """HTTP cache validators of a stored response"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> Optional["Validators"]:
+        """Validators sent with a response, or None if the API sent none"""
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if not etag and not last_modified:
+            return None
+        return cls(etag, last_modified)
+    
+    def request_headers(self) -> Dict[str, str]:
+        """Headers that make a GET conditional on these validators"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class ConditionalRequest:
+    """Validator exchange between the response cache and _get for one cached fetch"""
+    sent: Optional[Validators] = None
+    received: Optional[Validators] = None
+    not_modified: bool = False
+
+
+class NotModifiedError(Exception):
+    """The API answered 304: the cached copy being revalidated is still current"""
+
+
+# Set while a cacheable endpoint is being fetched, so _get can send and record validators
+_conditional_request: ContextVar[Optional[ConditionalRequest]] = ContextVar("conditional_request", default=None)
+
+# Deadline (time.monotonic) of the call being made under a budget, so _get can fit its attempts into it
+_call_deadline: ContextVar[Optional[float]] = ContextVar("call_deadline", default=None)
+
+# Shared request the current task is making for its waiters, whose deadlines bound it instead
+_flight: ContextVar[Optional["_Flight"]] = ContextVar("flight", default=None)
+
+# Endpoints kept in the on-disk cache tier, with how their values are encoded and decoded
+DISK_CACHE_CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "lyrics": (lambda value: json.dumps(value).encode(), json.loads),
+    "rich_lyrics": (lambda value: json.dumps(asdict(value)).encode(), lambda data: RichLyrics.from_dict(json.loads(data))),
+}
+
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+_MARKDOWN_SPECIALS = str.maketrans("", "", "*_`[]")
+
+
+def plain_snippet(snippet: Optional[str], max_length: int = 120) -> Optional[str]:
+    """A search snippet as one line of text that is safe inside a Markdown message"""
+    if not snippet:
+        return None
+    text = " ".join(html.unescape(_HTML_TAG.sub("", snippet)).split())
+    text = text.translate(_MARKDOWN_SPECIALS)
+    return text if len(text) <= max_length else text[:max_length - 1] + "…"
+
+
+def lyrics_text(value: Any) -> Optional[str]:
+    """Plain lyrics text of a cached lyrics or rich_lyrics value"""
+    if isinstance(value, RichLyrics):
+        return html.unescape(_HTML_TAG.sub(" ", value.html_content))
+    if isinstance(value, dict) and isinstance(value.get("lyrics"), str):
+        return value["lyrics"]
+    return None
+
+
+def _caused_by(error: BaseException, kind: type) -> bool:
+    """Whether error or an exception it was raised from or while handling is of the given kind"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, kind):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class _Flight:
+    """A request shared by the concurrent callers waiting for it"""
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Future] = None
+        self.waiters: List[Optional[float]] = []
+    
+    def deadline(self) -> Optional[float]:
+        """Latest deadline among the waiters; None if one of them has none"""
+        if not self.waiters or None in self.waiters:
+            return None
+        return max(self.waiters)
+
+
+def _current_deadline() -> Optional[float]:
+    """Deadline the request being made has to fit in: its caller's, or its waiters' if it is shared"""
+    flight = _flight.get()
+    return flight.deadline() if flight is not None else _call_deadline.get()
+
+
 class MezmurAPIClient:
     """Client for interacting with the Mezmur FastAPI service"""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", enable_cache: Optional[bool] = None,
+                 cache_ttls: Optional[Dict[str, float]] = None, stale_ttl: float = 86400.0,
+                 cache_max_entries: int = 4096, cache_max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 coalesce_requests: bool = True, transport_config: Optional[TransportConfig] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None, bulk_concurrency: int = 8,
+                 retry_policy: Optional[RetryPolicy] = None, breaker_threshold: int = 5,
+                 breaker_reset_timeout: float = 30.0, json_loads: Optional[Callable[[bytes], Any]] = None,
+                 disk_cache_path: Optional[str] = None, disk_cache_max_bytes: Optional[int] = None,
+                 hedge_policy: Optional[HedgePolicy] = None):
         self.base_url = base_url.rstrip('/')
-        self.client = httpx.AsyncClient(timeout=30.0)
+        
+        # Pool size, keep-alive, HTTP/2, timeouts and UDS come from API_* env vars unless given
+        self.transport_config = transport_config or TransportConfig.from_env()
+        self.client = build_http_client(self.transport_config, transport)
+        self.json_loads = json_loads or default_json_loads()
+        
+        # Per-endpoint request counts, errors, bytes and latency
+        self.metrics = APIMetrics()
+        
+        # Optional response cache: entries are fresh for cache_ttls[endpoint] seconds and
+        # are then served stale for up to stale_ttl more seconds while being refreshed
+        self.cache: Optional[TTLCache] = None
+        self.cache_ttls = dict(DEFAULT_CACHE_TTLS)
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+        self.stale_ttl = stale_ttl
+        if enable_cache is None:
+            enable_cache = _env_flag("API_CACHE_ENABLED")
+        if enable_cache:
+            self.cache = TTLCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes)
+        
+        # Optional persistent second tier for lyrics, so a restart comes up warm
+        self.disk_cache: Optional[DiskCache] = None
+        disk_cache_path = disk_cache_path or os.getenv("API_DISK_CACHE_PATH")
+        if self.cache is not None and disk_cache_path:
+            self.disk_cache = DiskCache(
+                disk_cache_path,
+                max_bytes=disk_cache_max_bytes or _env_int("API_DISK_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+            )
+            # SQLite calls (and encoding/decoding the values) run on one worker thread, in submission order
+            self._disk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+            self._disk_executor.submit(self._compact_disk, max(self.cache_ttls.values()) + self.stale_ttl)
+        self._refresh_tasks: Dict[Hashable, asyncio.Task] = {}
+        self.stale_served = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        
+        # Single-flight: concurrent identical calls share one request
+        self.coalesce_requests = coalesce_requests
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.coalesced_requests = 0
+        self.abandoned_requests = 0
+        
+        # Shared cap on requests made by bulk helpers so they leave room for interactive calls
+        self._bulk_limiter = asyncio.Semaphore(bulk_concurrency)
+        
+        # Resilience: retries for transient failures and a circuit breaker per endpoint
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.deadlines_exceeded = 0
+        
+        # Optional hedging of slow lyrics requests, enabled by API_HEDGE_PERCENTILE unless a policy is given
+        if hedge_policy is None and os.getenv("API_HEDGE_PERCENTILE"):
+            hedge_policy = HedgePolicy(
+                percentile=_env_float("API_HEDGE_PERCENTILE", 95.0),
+                budget=_env_float("API_HEDGE_BUDGET", 0.1)
+            )
+        self.hedgers: Dict[str, Hedger] = (
+            {endpoint: Hedger(hedge_policy) for endpoint in HEDGED_ENDPOINTS} if hedge_policy else {}
+        )
     
     async def close(self):
-        """Close the HTTP client"""
+        """Close the HTTP client and the disk cache"""
+        # Shared requests may be bound by a waiter with no budget, so they may still be running
+        for task in [*self._refresh_tasks.values(), *(flight.task for flight in self._inflight.values())]:
+            task.cancel()
         await self.client.aclose()
+        if self.disk_cache is not None:
+            # Queued behind any pending writes, so they are flushed first
+            await asyncio.get_running_loop().run_in_executor(self._disk_executor, self.disk_cache.close)
+            self._disk_executor.shutdown()
+    
+    # Time budgets: every method is bounded by the call_budget block it is called in
+    budget = staticmethod(call_budget)
+    
+    # Request helpers
+    async def _call(self, endpoint: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Route an endpoint call through metrics, its time budget, the response cache and request coalescing"""
+        started = time.perf_counter()
+        try:
+            result = await self._call_within_budget(endpoint, key, fetch)
+        except Exception as e:
+            self.metrics.observe(endpoint, time.perf_counter() - started, error=e)
+            raise
+        self.metrics.observe(endpoint, time.perf_counter() - started)
+        return result
+    
+    async def _call_within_budget(self, endpoint: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Give up with DeadlineExceededError once the caller's budget runs out
+        
+        Cached values are returned even past the deadline, since they cost nothing.
+        """
+        budget = current_budget()
+        if budget is None:
+            return await self._call_uninstrumented(endpoint, key, fetch)
+        
+        deadline = budget.deadline(time.monotonic())
+        token = _call_deadline.set(deadline)
+        try:
+            async with asyncio.timeout(deadline - time.monotonic()):
+                return await self._call_uninstrumented(endpoint, key, fetch)
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            # Either our own timeout expired, or an httpx timeout capped by the deadline was
+            # wrapped by the fetcher; a timeout that fired with budget left is reported as it is
+            if time.monotonic() < deadline:
+                raise
+            if not isinstance(e, TimeoutError) and not _caused_by(e, httpx.TimeoutException):
+                raise
+            self.deadlines_exceeded += 1
+            raise DeadlineExceededError(endpoint, budget.seconds) from None
+        finally:
+            _call_deadline.reset(token)
+    
+    async def _call_uninstrumented(self, endpoint: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        cache_key = (endpoint, key)
+        ttl = self.cache_ttls.get(endpoint)
+        if self.cache is None or not ttl:
+            return await self._single_flight(cache_key, fetch)
+        
+        entry = self.cache.get_entry(cache_key)
+        if entry is None and self.disk_cache is not None:
+            entry = await self._load_from_disk(endpoint, key, ttl)
+        if entry is not None:
+            if self.cache.clock() - entry.stored_at >= ttl:
+                self.stale_served += 1
+                self._schedule_refresh(endpoint, cache_key, fetch, entry)
+            return entry.value
+        
+        value, validators = await self._single_flight(cache_key, lambda: self._fetch_validated(fetch))
+        self._store(endpoint, key, value, validators)
+        return value
+    
+    def _store(self, endpoint: str, key: Hashable, value: Any, validators: Optional[Validators]):
+        """Write a fetched value to the memory cache and, for lyrics endpoints, queue it for the disk tier"""
+        self.cache.set((endpoint, key), value, ttl=self.cache_ttls[endpoint] + self.stale_ttl, meta=validators)
+        codec = DISK_CACHE_CODECS.get(endpoint)
+        if self.disk_cache is None or codec is None or not isinstance(key, str):
+            return
+        meta = json.dumps([validators.etag, validators.last_modified]) if validators else None
+        
+        def write():
+            try:
+                self.disk_cache.set(endpoint, key, codec[0](value), meta)
+            except Exception as e:
+                logger.warning(f"Disk cache write failed for {endpoint} '{key}': {e}")
+        
+        self._disk_executor.submit(write)
+    
+    async def _load_from_disk(self, endpoint: str, key: Hashable, ttl: float) -> Optional[CacheEntry]:
+        """Promote a disk tier entry into the memory cache, keeping its age"""
+        codec = DISK_CACHE_CODECS.get(endpoint)
+        if codec is None or not isinstance(key, str):
+            return None
+        
+        def read() -> Optional[Tuple[DiskEntry, Any]]:
+            stored = self.disk_cache.get(endpoint, key, max_age=ttl + self.stale_ttl)
+            return None if stored is None else (stored, codec[1](stored.value))
+        
+        try:
+            loaded = await asyncio.get_running_loop().run_in_executor(self._disk_executor, read)
+        except Exception as e:
+            logger.warning(f"Disk cache read failed for {endpoint} '{key}': {e}")
+            return None
+        if loaded is None:
+            return None
+        stored, value = loaded
+        validators = Validators(*json.loads(stored.meta)) if stored.meta else None
+        return self.cache.set(
+            (endpoint, key), value, ttl=ttl + self.stale_ttl - stored.age, meta=validators, age=stored.age
+        )
+    
+    def _compact_disk(self, max_age: float):
+        """Drop expired disk tier entries (VACUUM included), on the disk worker at startup"""
+        try:
+            self.disk_cache.compact(max_age=max_age)
+        except Exception as e:
+            logger.warning(f"Disk cache compaction failed: {e}")
+    
+    async def _fetch_validated(self, fetch: Callable[[], Awaitable[Any]],
+                               entry: Optional[CacheEntry] = None) -> Tuple[Any, Optional[Validators]]:
+        """Fetch a cacheable value and its validators, revalidating entry with a conditional GET if it has any"""
+        conditional = ConditionalRequest(sent=entry.meta if entry is not None else None)
+        token = _conditional_request.set(conditional)
+        try:
+            return await fetch(), conditional.received
+        except Exception:
+            # The fetcher wraps errors, so check the flag rather than the exception type
+            if conditional.not_modified and entry is not None:
+                return entry.value, conditional.received
+            raise
+        finally:
+            _conditional_request.reset(token)
+    
+    async def _single_flight(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one in-flight request between concurrent callers asking for the same thing
+        
+        The request is bound by the latest deadline among the callers still waiting,
+        and cancelled once none of them is.
+        """
+        if not self.coalesce_requests:
+            return await fetch()
+        
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced_requests += 1
+        else:
+            flight = _Flight()
+            
+            async def shared_fetch():
+                _flight.set(flight)
+                return await fetch()
+            
+            flight.task = asyncio.ensure_future(shared_fetch())
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda done: self._finish_flight(key, flight))
+        
+        waiter = _current_deadline()
+        flight.waiters.append(waiter)
+        try:
+            # Shield so one caller giving up does not cancel the request for everyone else
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters.remove(waiter)
+            if not flight.waiters and not flight.task.done():
+                # Nobody is left to use the answer: free the connection, and let a new caller start afresh
+                flight.task.cancel()
+                self.abandoned_requests += 1
+                self._finish_flight(key, flight)
+    
+    def _finish_flight(self, key: Hashable, flight: _Flight):
+        """Forget a finished or abandoned in-flight request"""
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        task = flight.task
+        if task.done() and not task.cancelled():
+            # Mark the exception as retrieved in case every waiter went away
+            task.exception()
+    
+    def _schedule_refresh(self, endpoint: str, cache_key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                          entry: CacheEntry):
+        """Start a background refresh for a stale entry unless one is already running"""
+        if cache_key in self._refresh_tasks:
+            return
+        
+        async def refresh():
+            # The refresh outlives the call that started it, so it is not bound by that call's deadline
+            _call_deadline.set(None)
+            _flight.set(None)
+            try:
+                value, validators = await self._single_flight(cache_key, lambda: self._fetch_validated(fetch, entry))
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.warning(f"Background refresh failed for {cache_key}: {e}")
+                return
+            if self.cache is not None:
+                self._store(endpoint, cache_key[1], value, validators)
+                self.refreshes += 1
+        
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks[cache_key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(cache_key, None))
+    
+    async def _hedged(self, endpoint: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Send a duplicate request if the first is slower than usual, and take whichever answers first"""
+        hedger = self.hedgers.get(endpoint)
+        if hedger is None:
+            return await fetch()
+        
+        delay = hedger.start()
+        started = time.monotonic()
+        
+        async def first_attempt() -> T:
+            # The hedge delay is a percentile of first attempts, whichever answer ends up used
+            result = await fetch()
+            hedger.observe(time.monotonic() - started)
+            return result
+        
+        first = asyncio.ensure_future(first_attempt())
+        tasks = [first]
+        try:
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+            if first.done() or delay is None or not hedger.allow_hedge():
+                return await first
+            
+            tasks.append(asyncio.ensure_future(fetch()))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the first attempt if both finished together
+                for task in sorted(done, key=tasks.index):
+                    if task.exception() is None:
+                        hedger.record(hedge_won=task is not first)
+                        if not first.done():
+                            # The first attempt is cancelled below: it took at least as long as it has run
+                            hedger.observe(time.monotonic() - started)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(self.breaker_threshold, self.breaker_reset_timeout)
+            self.breakers[endpoint] = breaker
+        return breaker
+    
+    async def _get(self, endpoint: str, url: str, params: Optional[Dict[str, Any]] = None,
+                   stream: bool = False) -> httpx.Response:
+        """GET with jittered retries for transient failures, guarded by the endpoint's circuit breaker
+        
+        With stream=True the body is left unread: the caller reads it and must close the response.
+        """
+        breaker = self._breaker(endpoint)
+        if not breaker.allow_request():
+            raise CircuitOpenError(endpoint, breaker.retry_in())
+        is_probe = breaker.state == CircuitBreaker.HALF_OPEN
+        
+        conditional = _conditional_request.get()
+        headers = conditional.sent.request_headers() if conditional and conditional.sent else None
+        if headers:
+            self.revalidations += 1
+        
+        try:
+            attempt = 0
+            while True:
+                delay = self.retry_policy.backoff(attempt)
+                # Read per attempt: the waiters of a shared request, and so its deadline, change as it runs
+                timeout = self._attempt_timeout(_current_deadline())
+                try:
+                    if stream:
+                        request = self.client.build_request(
+                            "GET", url, params=params, headers=headers, timeout=timeout
+                        )
+                        response = await self.client.send(request, stream=True)
+                        # Body bytes are counted by the caller as it reads them
+                        self.metrics.observe_upstream(endpoint, 0)
+                    else:
+                        response = await self.client.get(
+                            url, params=params, headers=headers, timeout=timeout
+                        )
+                        self.metrics.observe_upstream(endpoint, len(response.content))
+                except httpx.TransportError:
+                    if self._last_attempt(attempt, delay, _current_deadline()):
+                        breaker.record_failure()
+                        raise
+                else:
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        breaker.record_success()
+                        if conditional is not None:
+                            try:
+                                self._record_validators(conditional, response)
+                            except NotModifiedError:
+                                await response.aclose()
+                                raise
+                        return response
+                    if self._last_attempt(attempt, delay, _current_deadline()):
+                        breaker.record_failure()
+                        return response
+                    await response.aclose()
+                
+                self.retries += 1
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            if is_probe:
+                breaker.release()
+    
+    def _last_attempt(self, attempt: int, delay: float, deadline: Optional[float]) -> bool:
+        """Whether to stop after this attempt: retries are used up, or the next one would start past the deadline"""
+        if attempt + 1 >= self.retry_policy.attempts:
+            return True
+        return deadline is not None and time.monotonic() + delay >= deadline
+    
+    def _attempt_timeout(self, deadline: Optional[float]) -> Any:
+        """httpx timeouts for one attempt, each phase capped at the time left before the deadline"""
+        if deadline is None:
+            return httpx.USE_CLIENT_DEFAULT
+        remaining = max(deadline - time.monotonic(), 0.001)
+        config = self.transport_config
+        return httpx.Timeout(
+            connect=min(config.connect_timeout, remaining),
+            read=min(config.read_timeout, remaining),
+            write=min(config.write_timeout, remaining),
+            pool=min(config.pool_timeout, remaining)
+        )
+    
+    def _record_validators(self, conditional: ConditionalRequest, response: httpx.Response):
+        """Keep the validators of a cacheable response; a 304 ends the fetch with NotModifiedError"""
+        if response.status_code == 304 and conditional.sent is not None:
+            self.not_modified += 1
+            conditional.not_modified = True
+            # A 304 may carry updated validators; otherwise the ones sent still apply
+            conditional.received = Validators.from_response(response) or conditional.sent
+            raise NotModifiedError(f"{response.request.url} not modified")
+        conditional.received = Validators.from_response(response)
+    
+    def _decode_page(self, response: httpx.Response, item_factory: Callable[[Dict[str, Any]], T]) -> PaginatedResponse:
+        """Shared decode path for every paginated endpoint"""
+        return decode_page(self.json_loads(response.content), item_factory)
+    
+    def breaker_stats(self) -> Dict[str, Any]:
+        """Circuit breaker state per endpoint, plus the total retry and deadline counts"""
+        return {
+            "retries": self.retries,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "endpoints": {endpoint: breaker.stats() for endpoint, breaker in self.breakers.items()},
+        }
+    
+    def hedge_stats(self) -> Dict[str, Any]:
+        """Hedging counters per hedged endpoint (empty when hedging is off)"""
+        return {endpoint: hedger.stats() for endpoint, hedger in self.hedgers.items()}
+    
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """All client metrics as a plain dict"""
+        return {
+            "endpoints": self.metrics.snapshot(),
+            "coalesced_requests": self.coalesced_requests,
+            "abandoned_requests": self.abandoned_requests,
+            "resilience": self.breaker_stats(),
+            "hedging": self.hedge_stats(),
+            "cache": self.cache_stats(),
+        }
+    
+    def prometheus_metrics(self) -> str:
+        """All client metrics in the Prometheus text exposition format"""
+        ns = self.metrics.namespace
+        samples = [
+            ("coalesced_requests_total", {}, self.coalesced_requests),
+            ("abandoned_requests_total", {}, self.abandoned_requests),
+            ("retries_total", {}, self.retries),
+            ("deadlines_exceeded_total", {}, self.deadlines_exceeded),
+        ]
+        states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+        for endpoint, breaker in sorted(self.breakers.items()):
+            samples.append(("circuit_state", {"endpoint": endpoint}, states[breaker.state]))
+            samples.append(("circuit_rejected_total", {"endpoint": endpoint}, breaker.rejected))
+        for endpoint, hedger in sorted(self.hedgers.items()):
+            samples.append(("hedges_total", {"endpoint": endpoint}, hedger.hedges))
+            samples.append(("hedge_wins_total", {"endpoint": endpoint}, hedger.wins))
+            samples.append(("hedge_losses_total", {"endpoint": endpoint}, hedger.losses))
+            samples.append(("hedges_throttled_total", {"endpoint": endpoint}, hedger.throttled))
+        cache_stats = self.cache_stats()
+        for prefix, stats in (("cache", cache_stats), ("disk_cache", cache_stats.get("disk", {}))):
+            for name, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    samples.append((f"{prefix}_{name}", {}, value))
+        return self.metrics.to_prometheus() + format_samples(ns, samples)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Response cache counters (empty when caching is disabled)"""
+        if self.cache is None:
+            return {}
+        stats = self.cache.stats()
+        stats.update({
+            "stale_served": self.stale_served,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified,
+        })
+        if self.disk_cache is not None:
+            stats["disk"] = self.disk_cache.stats()
+        return stats
+    
+    def cached_lyrics_entries(self) -> Dict[Tuple[str, str], CacheEntry]:
+        """Memory cache entries of the lyrics endpoints, keyed by (endpoint, title)
+        
+        Cheap enough for the event loop: no text is extracted here.
+        """
+        if self.cache is None:
+            return {}
+        return {
+            key: entry for key, entry in self.cache.peek_items()
+            if isinstance(key, tuple) and key[0] in DISK_CACHE_CODECS
+        }
+    
+    def cached_lyrics(self) -> Dict[str, str]:
+        """Lyrics text of every song in the memory cache, keyed by title"""
+        texts = {}
+        for (_, title), entry in self.cached_lyrics_entries().items():
+            text = lyrics_text(entry.value)
+            if text:
+                texts[title] = text
+        return texts
+    
+    def stored_lyrics(self) -> Dict[str, str]:
+        """Lyrics text of every song in the disk tier, keyed by title
+        
+        Uses its own database connection, so it may run in a worker thread.
+        """
+        texts = {}
+        if self.disk_cache is None:
+            return texts
+        for endpoint, (_, decode) in DISK_CACHE_CODECS.items():
+            for key, value in self.disk_cache.scan(endpoint):
+                try:
+                    text = lyrics_text(decode(value))
+                except Exception:
+                    continue
+                if text:
+                    texts[key] = text
+        return texts
     
     async def health_check(self) -> Dict[str, Any]:
         """Check if the API is healthy"""
+        return await self._call("health", None, self._fetch_health)
+    
+    async def _fetch_health(self) -> Dict[str, Any]:
         try:
-            response = await self.client.get(f"{self.base_url}/health")
+            response = await self._get("health", f"{self.base_url}/health")
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -82,6 +957,12 @@ class MezmurAPIClient:
     # Search methods
     async def search_prefix(self, query: str, page: int = 1, limit: int = 10, continue_token: Any = None) -> PaginatedResponse:
         """Prefix search - fast search for titles starting with query"""
+        return await self._call(
+            "search_prefix", (query_key(query), page, limit, continue_token),
+            lambda: self._fetch_search_prefix(query, page, limit, continue_token)
+        )
+    
+    async def _fetch_search_prefix(self, query: str, page: int, limit: int, continue_token: Any) -> PaginatedResponse:
         params = {
             "q": query,
             "page": page,
@@ -91,36 +972,20 @@ class MezmurAPIClient:
             params["continue_token"] = continue_token
         
         try:
-            response = await self.client.get(f"{self.base_url}/search/prefix", params=params)
+            response = await self._get("search_prefix", f"{self.base_url}/search/prefix", params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            # Convert to SearchResult objects
-            search_results = [
-                SearchResult(
-                    title=item["title"],
-                    pageid=item["pageid"],
-                    snippet=item.get("snippet"),
-                    size=item.get("size"),
-                    wordcount=item.get("wordcount")
-                )
-                for item in data["data"]
-            ]
-            
-            return PaginatedResponse(
-                data=search_results,
-                total=data["total"],
-                page=data["page"],
-                limit=data["limit"],
-                has_next=data["has_next"],
-                has_prev=data["has_prev"],
-                next_token=data.get("next_token")
-            )
+            return self._decode_page(response, SearchResult.from_dict)
         except Exception as e:
             raise Exception(f"Prefix search failed: {str(e)}")
     
     async def search_full(self, query: str, page: int = 1, limit: int = 10, continue_token: Any = None) -> PaginatedResponse:
         """Full text search - searches anywhere in content"""
+        return await self._call(
+            "search_full", (query_key(query), page, limit, continue_token),
+            lambda: self._fetch_search_full(query, page, limit, continue_token)
+        )
+    
+    async def _fetch_search_full(self, query: str, page: int, limit: int, continue_token: Any) -> PaginatedResponse:
         params = {
             "q": query,
             "page": page,
@@ -130,37 +995,21 @@ class MezmurAPIClient:
             params["continue_token"] = continue_token
         
         try:
-            response = await self.client.get(f"{self.base_url}/search", params=params)
+            response = await self._get("search_full", f"{self.base_url}/search", params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            # Convert to SearchResult objects
-            search_results = [
-                SearchResult(
-                    title=item["title"],
-                    pageid=item["pageid"],
-                    snippet=item.get("snippet"),
-                    size=item.get("size"),
-                    wordcount=item.get("wordcount")
-                )
-                for item in data["data"]
-            ]
-            
-            return PaginatedResponse(
-                data=search_results,
-                total=data["total"],
-                page=data["page"],
-                limit=data["limit"],
-                has_next=data["has_next"],
-                has_prev=data["has_prev"],
-                next_token=data.get("next_token")
-            )
+            return self._decode_page(response, SearchResult.from_dict)
         except Exception as e:
             raise Exception(f"Full search failed: {str(e)}")
     
     # Artist methods
     async def get_artists(self, page: int = 1, limit: int = 20, continue_token: Any = None) -> PaginatedResponse:
         """Get all artists with pagination"""
+        return await self._call(
+            "artists", (page, limit, continue_token),
+            lambda: self._fetch_artists(page, limit, continue_token)
+        )
+    
+    async def _fetch_artists(self, page: int, limit: int, continue_token: Any) -> PaginatedResponse:
         params = {
             "page": page,
             "limit": limit
@@ -169,34 +1018,20 @@ class MezmurAPIClient:
             params["continue_token"] = continue_token
         
         try:
-            response = await self.client.get(f"{self.base_url}/artists", params=params)
+            response = await self._get("artists", f"{self.base_url}/artists", params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            # Convert to Artist objects
-            artists = [
-                Artist(
-                    title=item["title"],
-                    pageid=item["pageid"],
-                    namespace=item["namespace"]
-                )
-                for item in data["data"]
-            ]
-            
-            return PaginatedResponse(
-                data=artists,
-                total=data["total"],
-                page=data["page"],
-                limit=data["limit"],
-                has_next=data["has_next"],
-                has_prev=data["has_prev"],
-                next_token=data.get("next_token")
-            )
+            return self._decode_page(response, Artist.from_dict)
         except Exception as e:
             raise Exception(f"Get artists failed: {str(e)}")
     
     async def get_artist_albums(self, artist_name: str, page: int = 1, limit: int = 20, continue_token: Optional[Any] = None) -> PaginatedResponse:
         """Get albums by a specific artist"""
+        return await self._call(
+            "artist_albums", (artist_name, page, limit, continue_token),
+            lambda: self._fetch_artist_albums(artist_name, page, limit, continue_token)
+        )
+    
+    async def _fetch_artist_albums(self, artist_name: str, page: int, limit: int, continue_token: Optional[Any]) -> PaginatedResponse:
         params = {
             "page": page,
             "limit": limit
@@ -205,35 +1040,21 @@ class MezmurAPIClient:
             params["continue_token"] = continue_token
         
         try:
-            response = await self.client.get(f"{self.base_url}/artists/{artist_name}/albums", params=params)
+            response = await self._get("artist_albums", f"{self.base_url}/artists/{artist_name}/albums", params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            # Convert to Album objects
-            albums = [
-                Album(
-                    title=item["title"],
-                    pageid=item["pageid"],
-                    namespace=item["namespace"]
-                )
-                for item in data["data"]
-            ]
-            
-            return PaginatedResponse(
-                data=albums,
-                total=data["total"],
-                page=data["page"],
-                limit=data["limit"],
-                has_next=data["has_next"],
-                has_prev=data["has_prev"],
-                next_token=data.get("next_token")
-            )
+            return self._decode_page(response, Album.from_dict)
         except Exception as e:
             raise Exception(f"Get artist albums failed: {str(e)}")
     
     # Album methods
     async def get_album_songs(self, album_title: str, page: int = 1, limit: int = 20) -> PaginatedResponse:
         """Get songs in a specific album"""
+        return await self._call(
+            "album_songs", (album_title, page, limit),
+            lambda: self._fetch_album_songs(album_title, page, limit)
+        )
+    
+    async def _fetch_album_songs(self, album_title: str, page: int, limit: int) -> PaginatedResponse:
         params = {
             "album_title": album_title,
             "page": page,
@@ -241,69 +1062,167 @@ class MezmurAPIClient:
         }
         
         try:
-            response = await self.client.get(f"{self.base_url}/albums/songs", params=params)
+            response = await self._get("album_songs", f"{self.base_url}/albums/songs", params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            # Convert to Song objects
-            songs = [
-                Song(
-                    title=item["title"],
-                    pageid=item["pageid"],
-                    namespace=item["namespace"],
-                    artist=item.get("artist"),
-                    album=item.get("album")
-                )
-                for item in data["data"]
-            ]
-            
-            return PaginatedResponse(
-                data=songs,
-                total=data["total"],
-                page=data["page"],
-                limit=data["limit"],
-                has_next=data["has_next"],
-                has_prev=data["has_prev"],
-                next_token=data.get("next_token")
-            )
+            return self._decode_page(response, Song.from_dict)
         except Exception as e:
             raise Exception(f"Get album songs failed: {str(e)}")
     
+    # Iterators
+    async def _iter_pages(self, fetch_page: Callable[[int, Optional[Any]], Awaitable[PaginatedResponse]],
+                          prefetch: bool = True) -> AsyncIterator[Any]:
+        """Walk every page of an endpoint, fetching page N+1 while page N is consumed"""
+        page, token = 1, None
+        pending: Optional[asyncio.Future] = asyncio.ensure_future(fetch_page(page, token))
+        try:
+            while pending is not None:
+                response = await pending
+                pending = None
+                
+                next_page = None
+                if response.data and (response.has_next or response.next_token):
+                    page, token = page + 1, response.next_token
+                    next_page = (page, token)
+                    if prefetch:
+                        pending = asyncio.ensure_future(fetch_page(*next_page))
+                
+                for item in response.data:
+                    yield item
+                
+                if next_page is not None and pending is None:
+                    pending = asyncio.ensure_future(fetch_page(*next_page))
+        finally:
+            # The consumer stopped early: drop the prefetched page, and retrieve its outcome
+            # so a failed prefetch is not logged as an exception that was never retrieved
+            if pending is not None:
+                pending.cancel()
+                pending.add_done_callback(lambda task: task.cancelled() or task.exception())
+    
+    def iter_artists(self, page_size: int = 50, prefetch: bool = True) -> AsyncIterator[Artist]:
+        """Iterate over all artists, following next_token/has_next"""
+        return self._iter_pages(
+            lambda page, token: self.get_artists(page=page, limit=page_size, continue_token=token),
+            prefetch=prefetch
+        )
+    
+    def iter_artist_albums(self, artist_name: str, page_size: int = 50, prefetch: bool = True) -> AsyncIterator[Album]:
+        """Iterate over all albums of an artist, following next_token/has_next"""
+        return self._iter_pages(
+            lambda page, token: self.get_artist_albums(artist_name, page=page, limit=page_size, continue_token=token),
+            prefetch=prefetch
+        )
+    
+    def iter_album_songs(self, album_title: str, page_size: int = 50, prefetch: bool = True) -> AsyncIterator[Song]:
+        """Iterate over all songs of an album, following has_next"""
+        return self._iter_pages(
+            lambda page, token: self.get_album_songs(album_title, page=page, limit=page_size),
+            prefetch=prefetch
+        )
+    
     # Lyrics methods
     async def get_lyrics(self, song_title: str) -> Dict[str, Any]:
         """Get plain text lyrics for a song"""
+        return await self._call("lyrics", song_title, lambda: self._hedged("lyrics", lambda: self._fetch_lyrics(song_title)))
+    
+    async def _fetch_lyrics(self, song_title: str) -> Dict[str, Any]:
         try:
             url = f"{self.base_url}/lyrics/{song_title}"
-            print(f"Making request to: {url}")  # Debug print
-            response = await self.client.get(url)
-            print(f"Response status: {response.status_code}")  # Debug print
-            print(f"Response text: {response.text[:200]}...")  # Debug print
+            span = tracer.span("lyrics", url=url)
+            response = await self._get("lyrics", url)
+            if span:
+                span.event(
+                    "response",
+                    status=response.status_code,
+                    bytes=len(response.content),
+                    preview=lambda: response.content[:200].decode("utf-8", "replace")
+                )
             
             if response.status_code == 500:
                 raise Exception(f"API server error (500) for song: {song_title}")
             
             response.raise_for_status()
-            return response.json()
+            return self.json_loads(response.content)
         except Exception as e:
             raise Exception(f"Get lyrics failed for '{song_title}': {str(e)}")
     
     async def get_rich_lyrics(self, song_title: str) -> RichLyrics:
         """Get rich HTML lyrics for a song"""
+        return await self._call(
+            "rich_lyrics", song_title, lambda: self._hedged("rich_lyrics", lambda: self._fetch_rich_lyrics(song_title))
+        )
+    
+    async def _fetch_rich_lyrics(self, song_title: str) -> RichLyrics:
         try:
-            response = await self.client.get(f"{self.base_url}/lyrics/rich/{song_title}")
-            response.raise_for_status()
-            data = response.json()
-            
-            return RichLyrics(
-                title=data["title"],
-                html_content=data["html_content"],
-                artist=data.get("artist"),
-                album=data.get("album"),
-                page_id=data.get("page_id")
-            )
+            response = await self._get("rich_lyrics", f"{self.base_url}/lyrics/rich/{song_title}", stream=True)
+            try:
+                response.raise_for_status()
+                return RichLyrics.from_dict(await self._read_json("rich_lyrics", response))
+            finally:
+                await response.aclose()
         except Exception as e:
             raise Exception(f"Get rich lyrics failed: {str(e)}")
     
+    async def _read_json(self, endpoint: str, response: httpx.Response) -> Dict[str, Any]:
+        """Decode a streamed JSON object body; large ones are decoded chunk by chunk as they arrive
+        
+        Long liturgical songs run to megabytes of HTML. Reading such a body whole
+        holds the compressed chunks, the decompressed bytes and the decoded text at
+        once, per concurrent request; here only one chunk of each is alive at a time,
+        next to the decoded text.
+        """
+        # A compressed body's Content-Length says nothing of its decoded size, so look at
+        # the first chunk: a body that fits in it goes to the faster whole-body decoder
+        chunks = response.aiter_bytes(STREAM_CHUNK_BYTES)
+        first = b""
+        async for first in chunks:
+            break
+        if len(first) < STREAM_CHUNK_BYTES:
+            self.metrics.observe_bytes(endpoint, len(first))
+            return self.json_loads(first)
+        
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parser = JSONObjectStream()
+        parser.feed(decoder.decode(first))
+        received = len(first)
+        del first
+        async for chunk in chunks:
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+        parser.feed(decoder.decode(b"", final=True))
+        self.metrics.observe_bytes(endpoint, received)
+        return parser.close()
+    
+    async def iter_lyrics_many(self, titles: List[str], concurrency: int = 4) -> AsyncIterator[LyricsResult]:
+        """Fetch lyrics for many songs, yielding results as they complete.
+        
+        Errors are captured per title instead of raised. At most `concurrency`
+        requests run for this call, and all bulk calls together share the
+        client's bulk limiter.
+        """
+        local_limiter = asyncio.Semaphore(max(1, concurrency))
+        
+        async def fetch(title: str) -> LyricsResult:
+            async with local_limiter, self._bulk_limiter:
+                try:
+                    return LyricsResult(title=title, lyrics=await self.get_lyrics(title))
+                except Exception as e:
+                    return LyricsResult(title=title, error=e)
+        
+        tasks = [asyncio.ensure_future(fetch(title)) for title in dict.fromkeys(titles)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def get_lyrics_many(self, titles: List[str], concurrency: int = 4) -> Dict[str, LyricsResult]:
+        """Fetch lyrics for many songs and return them keyed by title"""
+        results = {}
+        async for result in self.iter_lyrics_many(titles, concurrency=concurrency):
+            results[result.title] = result
+        return results
+    
     # Utility methods
     def categorize_search_results(self, results: List[SearchResult]) -> Dict[str, List[SearchResult]]:
         """Categorize search results by type (artist, album, song)"""
@@ -314,18 +1233,13 @@ class MezmurAPIClient:
         }
         
         for result in results:
-            slash_count = result.title.count("/")
-            if slash_count == 0:
-                categorized["artists"].append(result)
-            elif slash_count == 1:
-                categorized["albums"].append(result)
-            else:
-                categorized["songs"].append(result)
+            categorized[result.kind + "s"].append(result)
         
         return categorized
     
-    def format_search_results(self, results: List[SearchResult], max_results: int = 10) -> str:
-        """Format search results for Telegram display"""
+    def format_search_results(self, results: List[SearchResult], max_results: int = 10,
+                              show_snippets: bool = False) -> str:
+        """Format search results for Telegram display, optionally with a matching lyrics line under each song"""
         if not results:
             return "No results found."
         
@@ -341,14 +1255,15 @@ class MezmurAPIClient:
         if categorized["albums"]:
             formatted.append("💿 **ALBUMS**")
             for album in categorized["albums"]:
-                album_name = album.title.split("/")[-1] if "/" in album.title else album.title
-                formatted.append(f"• {album_name}")
+                formatted.append(f"• {album.name}")
             formatted.append("")
         
         if categorized["songs"]:
             formatted.append("🎵 **SONGS**")
             for song in categorized["songs"]:
-                song_name = song.title.split("/")[-1] if "/" in song.title else song.title
-                formatted.append(f"• {song_name}")
+                formatted.append(f"• {song.name}")
+                snippet = plain_snippet(song.snippet) if show_snippets else None
+                if snippet:
+                    formatted.append(f"   ↳ {snippet}")
         
         return "\n".join(formatted)
@@ -0,0 +1,185 @@
+"""
+In-memory LRU cache with per-entry TTL and size limits
+"""
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.text import normalize_geez
+
+
+def query_key(query: str) -> str:
+    """Cache key of a query answered by the API, which matches Ge'ez spellings as typed (case and whitespace insensitive)"""
+    return " ".join(query.split()).casefold()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query for the local indexes (case, whitespace and Ge'ez spelling insensitive)"""
+    return normalize_geez(query_key(query))
+
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """Roughly estimate the memory footprint of a cached value in bytes"""
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(approx_size(item, _depth + 1) for item in value)
+    if hasattr(value, "__dict__"):
+        return size + approx_size(vars(value), _depth + 1)
+    if hasattr(value, "__slots__"):
+        return size + sum(approx_size(getattr(value, slot, None), _depth + 1) for slot in value.__slots__)
+    return size
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    stored_at: float
+    expires_at: float
+    meta: Any = None
+
+
+class TTLCache:
+    """Bounded LRU cache with per-entry TTL, an entry limit and a byte budget"""
+    
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None, ttl: float = 300.0,
+                 key_func: Optional[Callable[[Any], Hashable]] = None,
+                 sizeof: Callable[[Any], int] = approx_size,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.key_func = key_func
+        self.sizeof = sizeof
+        self.clock = clock
+        
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def _key(self, key: Any) -> Hashable:
+        return self.key_func(key) if self.key_func else key
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Any) -> bool:
+        entry = self._entries.get(self._key(key))
+        return entry is not None and entry.expires_at > self.clock()
+    
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return a fresh cached value, or default on a miss or expired entry"""
+        entry = self.get_entry(key)
+        return default if entry is None else entry.value
+    
+    def get_entry(self, key: Any) -> Optional[CacheEntry]:
+        """Like get(), but return the whole entry so callers can inspect its age"""
+        k = self._key(key)
+        entry = self._entries.get(k)
+        if entry is None or entry.expires_at <= self.clock():
+            if entry is not None:
+                self._remove(k)
+                self.expirations += 1
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(k)
+        self.hits += 1
+        return entry
+    
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None, meta: Any = None,
+            age: float = 0.0) -> Optional[CacheEntry]:
+        """Store a value (plus optional caller metadata), evicting least recently used entries to stay within limits
+        
+        age backdates the entry for values that were already that many seconds
+        old, e.g. when loaded from a slower cache tier. Returns the new entry,
+        or None if the value is too large to cache.
+        """
+        k = self._key(key)
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never cache something that could not fit on its own
+            self._remove(k)
+            return None
+        
+        now = self.clock()
+        self._remove(k)
+        entry = self._entries[k] = CacheEntry(
+            value=value,
+            size=size,
+            stored_at=now - age,
+            expires_at=now + (self.ttl if ttl is None else ttl),
+            meta=meta
+        )
+        self._bytes += size
+        self._evict()
+        return entry
+    
+    def peek(self, key: Any) -> Optional[CacheEntry]:
+        """The unexpired entry for a key, without updating recency or counters"""
+        entry = self._entries.get(self._key(key))
+        return entry if entry is not None and entry.expires_at > self.clock() else None
+    
+    def peek_items(self) -> List[Tuple[Hashable, CacheEntry]]:
+        """Unexpired (key, entry) pairs, without updating recency or counters"""
+        now = self.clock()
+        return [(k, entry) for k, entry in self._entries.items() if entry.expires_at > now]
+    
+    def delete(self, key: Any) -> bool:
+        """Remove an entry; returns True if it was present"""
+        return self._remove(self._key(key))
+    
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        self._entries.clear()
+        self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache size and hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+    
+    def _remove(self, k: Hashable) -> bool:
+        entry = self._entries.pop(k, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        return True
+    
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
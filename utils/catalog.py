@@ -0,0 +1,292 @@
+"""
+In-memory mirror of the Mezmur catalog (artists, albums and songs)
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.api_client import Album, Artist, MezmurAPIClient, PaginatedResponse, Song
+from utils.cache import normalize_query
+from utils.fuzzy import NameMatch, NameResolver
+from utils.prefix_index import PrefixIndex
+
+logger = logging.getLogger(__name__)
+
+CatalogItem = Union[Artist, Album, Song]
+
+# Name kinds accepted by CatalogSnapshot.resolve
+KINDS = {"artist": Artist, "album": Album, "song": Song}
+
+
+@dataclass(slots=True)
+class CatalogNode:
+    item: CatalogItem
+    parent: Optional[int] = None
+    children: Tuple[int, ...] = ()
+
+
+class CatalogSnapshot:
+    """Immutable catalog tree keyed by pageid, with lookups by normalized title"""
+    
+    def __init__(self, nodes: Dict[int, CatalogNode], artists: Tuple[int, ...],
+                 synced_at: Dict[int, float], built_at: float):
+        self.nodes = nodes
+        self.artists = artists
+        self.synced_at = synced_at
+        self.built_at = built_at
+        self._by_title = {normalize_query(node.item.title): pageid for pageid, node in nodes.items()}
+        self.prefix_index = PrefixIndex((node.item.title, pageid) for pageid, node in nodes.items())
+        self.names = {
+            kind: NameResolver((node.item.title, pageid) for pageid, node in nodes.items() if isinstance(node.item, cls))
+            for kind, cls in KINDS.items()
+        }
+    
+    def __len__(self) -> int:
+        return len(self.nodes)
+    
+    def get(self, pageid: int) -> Optional[CatalogNode]:
+        """Node for a pageid"""
+        return self.nodes.get(pageid)
+    
+    def find(self, title: str) -> Optional[CatalogNode]:
+        """Node for a full title path (case and whitespace insensitive)"""
+        pageid = self._by_title.get(normalize_query(title))
+        return None if pageid is None else self.nodes[pageid]
+    
+    def children(self, pageid: int) -> List[CatalogItem]:
+        """Items directly below a node, in API order"""
+        node = self.nodes.get(pageid)
+        return [] if node is None else [self.nodes[child].item for child in node.children]
+    
+    def artist_albums(self, artist_name: str, page: int = 1, limit: int = 20) -> Optional[PaginatedResponse]:
+        """Albums of an artist shaped like get_artist_albums, or None if the artist is not mirrored"""
+        node = self.find(artist_name)
+        if node is None or not isinstance(node.item, Artist):
+            return None
+        return paginate(self.children(node.item.pageid), page, limit)
+    
+    def album_songs(self, album_title: str, page: int = 1, limit: int = 20) -> Optional[PaginatedResponse]:
+        """Songs of an album shaped like get_album_songs, or None if the album is not mirrored"""
+        node = self.find(album_title)
+        if node is None or not isinstance(node.item, Album):
+            return None
+        return paginate(self.children(node.item.pageid), page, limit)
+    
+    def resolve(self, name: str, kind: str, limit: int = 5) -> List[NameMatch]:
+        """Mirrored names of one kind ("artist", "album" or "song") closest to name, best first
+        
+        An exact (case and whitespace insensitive) title match always comes
+        first with score 1.0.
+        """
+        matches = self.names[kind].resolve(name, limit=limit)
+        node = self.find(name)
+        if node is not None and isinstance(node.item, KINDS[kind]):
+            exact = NameMatch(node.item.title, node.item.pageid, 1.0)
+            matches = [exact] + [match for match in matches if match.pageid != exact.pageid][:limit - 1]
+        return matches
+    
+    def stats(self) -> Dict[str, Any]:
+        """Node counts and snapshot age"""
+        albums = sum(len(self.nodes[artist].children) for artist in self.artists)
+        return {
+            "artists": len(self.artists),
+            "albums": albums,
+            "songs": len(self.nodes) - len(self.artists) - albums,
+            "built_at": self.built_at,
+        }
+
+
+def paginate(items: List[Any], page: int, limit: int) -> PaginatedResponse:
+    """Page-number pagination over a local list, in the API's response shape"""
+    start = (page - 1) * limit
+    return PaginatedResponse(
+        data=items[start:start + limit],
+        total=len(items),
+        page=page,
+        limit=limit,
+        has_next=start + limit < len(items),
+        has_prev=page > 1
+    )
+
+
+class CatalogMirror:
+    """Keeps a CatalogSnapshot in sync with the API
+    
+    Each sync lists all artists, walks the albums and songs of new artists,
+    and re-walks at most max_artists_per_run artists whose subtree is older
+    than resync_interval. Other artists keep their previous subtree, and
+    artists that disappeared from the list are dropped. The finished snapshot
+    replaces the current one in a single assignment, so readers never see a
+    half-built tree.
+    """
+    
+    def __init__(self, api_client: MezmurAPIClient, resync_interval: float = 6 * 3600.0,
+                 max_artists_per_run: int = 50, concurrency: int = 4, page_size: int = 50,
+                 call_budget: Optional[float] = None, clock: Callable[[], float] = time.time):
+        self.api_client = api_client
+        self.resync_interval = resync_interval
+        self.max_artists_per_run = max_artists_per_run
+        self.concurrency = concurrency
+        self.page_size = page_size
+        # Seconds each API call of a background sync may take (None: the transport timeouts)
+        self.call_budget = call_budget
+        self.clock = clock
+        
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._sync_lock = asyncio.Lock()
+        
+        # Counters
+        self.syncs = 0
+        self.sync_failures = 0
+        self.artists_walked = 0
+        self.walk_failures = 0
+        self.last_sync_seconds = 0.0
+    
+    # Reads, answered from the current snapshot
+    def search_prefix(self, query: str, page: int = 1, limit: int = 10,
+                      continue_token: Any = None) -> Optional[PaginatedResponse]:
+        """Local search_prefix over mirrored titles, or None before the first sync"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        return snapshot.prefix_index.search_prefix(query, page=page, limit=limit, continue_token=continue_token)
+    
+    def resolve(self, name: str, kind: str, limit: int = 5) -> List[NameMatch]:
+        """Fuzzy-matched mirrored names of one kind, best first (empty before the first sync)"""
+        snapshot = self.snapshot
+        return [] if snapshot is None else snapshot.resolve(name, kind, limit)
+    
+    def artist_albums(self, artist_name: str, page: int = 1, limit: int = 20) -> Optional[PaginatedResponse]:
+        """Mirrored albums of an artist, or None when the API must be asked"""
+        snapshot = self.snapshot
+        return None if snapshot is None else snapshot.artist_albums(artist_name, page, limit)
+    
+    def album_songs(self, album_title: str, page: int = 1, limit: int = 20) -> Optional[PaginatedResponse]:
+        """Mirrored songs of an album, or None when the API must be asked"""
+        snapshot = self.snapshot
+        return None if snapshot is None else snapshot.album_songs(album_title, page, limit)
+    
+    # Sync
+    async def sync(self) -> CatalogSnapshot:
+        """Run one incremental sync and swap in the resulting snapshot"""
+        async with self._sync_lock:
+            started = time.perf_counter()
+            previous = self.snapshot
+            artists = [artist async for artist in self.api_client.iter_artists(page_size=self.page_size)]
+            now = self.clock()
+            
+            synced = previous.synced_at if previous is not None else {}
+            new = [artist for artist in artists if artist.pageid not in synced]
+            due = sorted(
+                (artist for artist in artists
+                 if artist.pageid in synced and now - synced[artist.pageid] >= self.resync_interval),
+                key=lambda artist: synced[artist.pageid]
+            )[:self.max_artists_per_run]
+            walked = await self._walk_artists(new + due)
+            
+            # Building the lookup tables and prefix index is CPU-bound; keep it off the event loop
+            snapshot = await asyncio.to_thread(self._build, artists, walked, previous, now)
+            self.snapshot = snapshot
+            self.syncs += 1
+            self.last_sync_seconds = time.perf_counter() - started
+            logger.info(
+                f"Catalog sync: {len(artists)} artists, {len(walked)} walked, "
+                f"{len(snapshot)} nodes in {self.last_sync_seconds:.1f}s"
+            )
+            return snapshot
+    
+    async def sync_job(self, context: Any = None) -> None:
+        """JobQueue callback: sync under the background call budget, logging instead of raising on failure"""
+        try:
+            with self.api_client.budget(self.call_budget, per_call=True):
+                await self.sync()
+        except Exception as e:
+            self.sync_failures += 1
+            logger.warning(f"Catalog sync failed, keeping the previous snapshot: {e}")
+    
+    def schedule(self, job_queue: Any, interval: float, first: float = 0.0) -> Any:
+        """Run sync_job every interval seconds on a PTB JobQueue"""
+        return job_queue.run_repeating(self.sync_job, interval=interval, first=first, name="catalog_sync")
+    
+    async def run_periodically(self, interval: float) -> None:
+        """Plain asyncio loop equivalent of schedule(), for when no JobQueue is available"""
+        while True:
+            await self.sync_job()
+            await asyncio.sleep(interval)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot contents and sync counters"""
+        stats = self.snapshot.stats() if self.snapshot is not None else {}
+        stats.update({
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+            "artists_walked": self.artists_walked,
+            "walk_failures": self.walk_failures,
+            "last_sync_seconds": self.last_sync_seconds,
+        })
+        return stats
+    
+    async def _walk_artists(self, artists: List[Artist]) -> Dict[int, List[Tuple[Album, List[Song]]]]:
+        """Albums and songs of each artist; artists whose walk fails are left out"""
+        limiter = asyncio.Semaphore(max(1, self.concurrency))
+        
+        async def songs_of(album: Album) -> List[Song]:
+            async with limiter:
+                return [song async for song in self.api_client.iter_album_songs(album.title, page_size=self.page_size)]
+        
+        async def walk(artist: Artist) -> List[Tuple[Album, List[Song]]]:
+            async with limiter:
+                albums = [
+                    album async for album in
+                    self.api_client.iter_artist_albums(artist.title, page_size=self.page_size)
+                ]
+            songs = await asyncio.gather(*(songs_of(album) for album in albums))
+            return list(zip(albums, songs))
+        
+        results = await asyncio.gather(*(walk(artist) for artist in artists), return_exceptions=True)
+        walked = {}
+        for artist, result in zip(artists, results):
+            if isinstance(result, BaseException):
+                self.walk_failures += 1
+                logger.warning(f"Catalog walk failed for artist '{artist.title}': {result}")
+                continue
+            walked[artist.pageid] = result
+            self.artists_walked += 1
+        return walked
+    
+    @staticmethod
+    def _build(artists: Iterable[Artist], walked: Dict[int, List[Tuple[Album, List[Song]]]],
+               previous: Optional[CatalogSnapshot], now: float) -> CatalogSnapshot:
+        """New snapshot from freshly walked subtrees plus unchanged ones carried over from previous"""
+        nodes: Dict[int, CatalogNode] = {}
+        synced_at: Dict[int, float] = {}
+        artist_ids = []
+        
+        for artist in artists:
+            if artist.pageid in walked:
+                album_ids = []
+                for album, songs in walked[artist.pageid]:
+                    song_ids = tuple(song.pageid for song in songs)
+                    for song in songs:
+                        nodes[song.pageid] = CatalogNode(song, album.pageid)
+                    nodes[album.pageid] = CatalogNode(album, artist.pageid, song_ids)
+                    album_ids.append(album.pageid)
+                children = tuple(album_ids)
+                synced_at[artist.pageid] = now
+            elif previous is not None and artist.pageid in previous.synced_at:
+                # Unchanged subtree: share the previous snapshot's (immutable) album and song nodes
+                children = previous.nodes[artist.pageid].children
+                for album_id in children:
+                    album_node = previous.nodes[album_id]
+                    nodes[album_id] = album_node
+                    for song_id in album_node.children:
+                        nodes[song_id] = previous.nodes[song_id]
+                synced_at[artist.pageid] = previous.synced_at[artist.pageid]
+            else:
+                continue
+            nodes[artist.pageid] = CatalogNode(artist, None, children)
+            artist_ids.append(artist.pageid)
+        
+        return CatalogSnapshot(nodes, tuple(artist_ids), synced_at, now)
@@ -0,0 +1,200 @@
+"""
+Persistent SQLite cache used as a second tier behind the in-memory response cache
+"""
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    meta TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+"""
+
+# Rows removed per statement while evicting down to the byte budget
+EVICTION_BATCH = 64
+
+
+@dataclass
+class DiskEntry:
+    value: bytes
+    meta: Optional[str]
+    stored_at: float
+    age: float
+
+
+class DiskCache:
+    """SQLite (WAL mode) key/value store with a byte budget, LRU eviction and compaction
+    
+    Entries are namespaced (one namespace per API endpoint) and hold encoded
+    bytes plus an optional metadata string; encoding is up to the caller.
+    Timestamps use wall-clock time so entry ages survive restarts.
+    """
+    
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024,
+                 clock: Callable[[], float] = time.time):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.clock = clock
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # The owner may hand all calls to one worker thread other than the one opening the cache
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        # Entry count and size are tracked here, so stats() never has to query the database
+        self._recount()
+        
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.compactions = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+    
+    def get(self, namespace: str, key: str, max_age: Optional[float] = None) -> Optional[DiskEntry]:
+        """Return a stored entry no older than max_age seconds, or None"""
+        row = self._db.execute(
+            "SELECT value, meta, stored_at FROM entries WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        now = self.clock()
+        if row is None or (max_age is not None and now - row[2] > max_age):
+            self.misses += 1
+            return None
+        
+        self._db.execute(
+            "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, namespace, key)
+        )
+        self.hits += 1
+        return DiskEntry(value=row[0], meta=row[1], stored_at=row[2], age=max(0.0, now - row[2]))
+    
+    def set(self, namespace: str, key: str, value: bytes, meta: Optional[str] = None) -> None:
+        """Store an entry, evicting least recently used entries to stay within the byte budget"""
+        size = len(value) + len(key) + (len(meta) if meta else 0)
+        if size > self.max_bytes:
+            self.delete(namespace, key)
+            return
+        
+        now = self.clock()
+        self._db.execute("BEGIN")
+        try:
+            replaced = self._size_of(namespace, key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, value, meta, size, now, now)
+            )
+            self._bytes += size - replaced
+            self._count += 0 if replaced else 1
+            self._evict()
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            self._recount()
+            raise
+        self.writes += 1
+    
+    def scan(self, namespace: str) -> Iterator[Tuple[str, bytes]]:
+        """Iterate over the (key, value) pairs of a namespace without touching access times
+        
+        Reads through a separate connection, so it can run in a worker thread
+        while the owning thread keeps using the cache.
+        """
+        db = sqlite3.connect(self.path)
+        try:
+            yield from db.execute("SELECT key, value FROM entries WHERE namespace = ?", (namespace,))
+        finally:
+            db.close()
+    
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove an entry; returns True if it was present"""
+        size = self._size_of(namespace, key)
+        if not size:
+            return False
+        self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        self._bytes -= size
+        self._count -= 1
+        return True
+    
+    def compact(self, max_age: Optional[float] = None, vacuum_ratio: float = 0.25) -> int:
+        """Drop entries older than max_age, fold the WAL back into the database and
+        VACUUM once free pages exceed vacuum_ratio of the file; returns the entries dropped"""
+        removed = 0
+        if max_age is not None:
+            removed = self._db.execute(
+                "DELETE FROM entries WHERE stored_at < ?", (self.clock() - max_age,)
+            ).rowcount
+            self._recount()
+        
+        free_pages = self._db.execute("PRAGMA freelist_count").fetchone()[0]
+        total_pages = self._db.execute("PRAGMA page_count").fetchone()[0]
+        if total_pages and free_pages / total_pages > vacuum_ratio:
+            self._db.execute("VACUUM")
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.compactions += 1
+        return removed
+    
+    def close(self) -> None:
+        """Checkpoint the WAL and close the database"""
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._db.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of store size and hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "compactions": self.compactions,
+        }
+    
+    def _recount(self) -> None:
+        self._count, self._bytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+    
+    def _size_of(self, namespace: str, key: str) -> int:
+        row = self._db.execute(
+            "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes:
+            victims = self._db.execute(
+                "SELECT namespace, key, size FROM entries ORDER BY accessed_at LIMIT ?", (EVICTION_BATCH,)
+            ).fetchall()
+            for namespace, key, size in victims:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._bytes -= size
+                self._count -= 1
+                self.evictions += 1
@@ -0,0 +1,115 @@
+"""
+Typo- and transliteration-tolerant matching of artist, album and song names
+"""
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.text import tokenize
+
+# Candidates whose trigram overlap is counted exactly before the final ranking
+CANDIDATE_POOL = 32
+
+# Trigrams in more than this share of names are too common to pick candidates with
+# (they still count towards the score)
+COMMON_GRAM_RATIO = 0.01
+
+
+def name_key(name: str) -> str:
+    """Folded name without word breaks, so "tesfa mikael" and "tesfamikael" compare equal"""
+    return "".join(tokenize(name))
+
+
+def trigrams(key: str) -> FrozenSet[str]:
+    """Character trigrams of a key, padded so short keys and word edges still count"""
+    padded = f"^{key}$"
+    return frozenset(map("".join, zip(padded, padded[1:], padded[2:])))
+
+
+@dataclass(slots=True)
+class NameMatch:
+    title: str
+    pageid: int
+    score: float
+
+
+class NameResolver:
+    """Character trigram index over names, ranked by trigram similarity
+    
+    Albums and songs are matched on their own name (the last path segment),
+    so "Misale Yeleleh" finds the album; a query spelling out the full path
+    exactly scores 1.0. A candidate's score is the mean of the Dice
+    coefficient and the share of the query's trigrams it contains, so a
+    partial name ("tesfamikael") still ranks its full form high.
+    """
+    
+    def __init__(self, names: Iterable[Tuple[str, int]]):
+        self.titles: List[str] = []
+        self.pageids: List[int] = []
+        self._keys: List[Tuple[int, FrozenSet[str]]] = []
+        self._exact: Dict[str, List[int]] = {}
+        postings: Dict[str, List[int]] = {}
+        
+        for title, pageid in names:
+            index = len(self.titles)
+            self.titles.append(title)
+            self.pageids.append(pageid)
+            key = name_key(title.rsplit("/", 1)[-1])
+            if not key:
+                continue
+            entry = len(self._keys)
+            grams = trigrams(key)
+            self._keys.append((index, grams))
+            self._exact.setdefault(key, []).append(entry)
+            if "/" in title:
+                self._exact.setdefault(name_key(title), []).append(entry)
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+        self._postings = postings
+        self._max_postings = max(64, int(len(self._keys) * COMMON_GRAM_RATIO))
+    
+    def __len__(self) -> int:
+        return len(self.titles)
+    
+    def resolve(self, query: str, limit: int = 5, min_score: float = 0.4) -> List[NameMatch]:
+        """Best matching names, best first"""
+        key = name_key(query.rsplit("/", 1)[-1])
+        if not key:
+            return []
+        grams = trigrams(key)
+        
+        # Count shared trigrams using the selective ones only; if every trigram is common, the
+        # rarest few still have to do
+        selective = [gram for gram in grams if len(self._postings.get(gram, ())) <= self._max_postings]
+        if not selective:
+            selective = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))[:2]
+        shared = Counter()
+        for gram in selective:
+            entries = self._postings.get(gram)
+            if entries:
+                shared.update(entries)
+        candidates = [entry for entry, _ in shared.most_common(CANDIDATE_POOL)]
+        exact = self._exact.get(name_key(query), ())
+        candidates += exact
+        
+        best: Dict[int, float] = {}
+        for entry in candidates:
+            index, entry_grams = self._keys[entry]
+            count = len(grams & entry_grams)
+            score = (2 * count / (len(grams) + len(entry_grams)) + count / len(grams)) / 2
+            if entry in exact:
+                score = 1.0
+            if score >= min_score and score > best.get(index, 0.0):
+                best[index] = score
+        
+        ranked = sorted(best.items(), key=lambda item: (-item[1], self.titles[item[0]]))[:limit]
+        return [NameMatch(self.titles[index], self.pageids[index], round(score, 3)) for index, score in ranked]
+
+
+def confident_match(matches: List[NameMatch], min_score: float = 0.55, margin: float = 0.1) -> Optional[NameMatch]:
+    """The top match if it is good enough and clearly ahead of the runner-up"""
+    if not matches or matches[0].score < min_score:
+        return None
+    if len(matches) > 1 and matches[0].score - matches[1].score < margin and matches[0].score < 1.0:
+        return None
+    return matches[0]
@@ -0,0 +1,180 @@
+"""
+Incremental decoding of a JSON object whose string values can be large
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Complete units of a JSON string body: plain runs, escapes, and surrogate pairs kept together
+_STRING_UNITS = re.compile(
+    r'(?:[^"\\]+'
+    r'|\\u[dD][89abAB][0-9a-fA-F]{2}\\u[dD][c-fC-F][0-9a-fA-F]{2}'
+    r'|\\u(?![dD][89abAB])[0-9a-fA-F]{4}'
+    r'|\\[^u])*'
+)
+
+# Characters that matter while skipping a non-string value
+_STRUCTURAL = re.compile(r'["\\{}\[\],]')
+
+# Longest escape that can be split across chunks (a surrogate pair)
+_MAX_ESCAPE = 12
+
+_WHITESPACE = " \t\n\r"
+
+
+class JSONObjectStream:
+    """Decode one JSON object from text fed in chunks
+    
+    String values are decoded as their text arrives, so the encoded body
+    never has to be held in full; only the decoded pieces of the value being
+    read are kept until it ends. Other values (numbers, literals, nested
+    objects) are short in API payloads and are buffered, then decoded whole.
+    """
+    
+    def __init__(self):
+        self.result: Dict[str, Any] = {}
+        self._buffer = ""
+        self._state = "object"
+        self._key: Optional[str] = None
+        self._pieces: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, text: str):
+        """Consume the next chunk of the document"""
+        self._buffer = self._buffer + text if self._buffer else text
+        pos = 0
+        while True:
+            advanced = self._step(pos)
+            if advanced is None:
+                break
+            pos = advanced
+        self._buffer = self._buffer[pos:]
+    
+    def close(self) -> Dict[str, Any]:
+        """The decoded object; raises ValueError if the document ended early"""
+        if self._state != "done" or self._buffer.strip(_WHITESPACE):
+            raise ValueError(f"Truncated or malformed JSON object (stopped in state '{self._state}')")
+        return self.result
+    
+    def _step(self, pos: int) -> Optional[int]:
+        """Advance the parser from pos; None when more input is needed"""
+        buffer = self._buffer
+        state = self._state
+        if state == "string":
+            return self._read_string(pos)
+        if state == "raw":
+            return self._read_raw(pos)
+        
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            return None
+        char = buffer[pos]
+        
+        if state == "object":
+            self._expect(char, "{")
+            self._state = "first_key"
+            return pos + 1
+        if state in ("first_key", "key"):
+            if char == "}" and state == "first_key":
+                self._state = "done"
+                return pos + 1
+            self._expect(char, '"')
+            end = self._string_end(pos + 1)
+            if end is None:
+                return None
+            self._key = json.loads(buffer[pos:end + 1])
+            self._state = "colon"
+            return end + 1
+        if state == "colon":
+            self._expect(char, ":")
+            self._state = "value"
+            return pos + 1
+        if state == "value":
+            if char == '"':
+                self._state = "string"
+                return pos + 1
+            self._state = "raw"
+            self._depth = 0
+            self._in_string = self._escaped = False
+            self._pieces.clear()
+            return pos
+        if state == "next":
+            if char == ",":
+                self._state = "key"
+                return pos + 1
+            self._expect(char, "}")
+            self._state = "done"
+            return pos + 1
+        raise ValueError(f"Unexpected {char!r} after the end of the JSON object")
+    
+    def _read_string(self, pos: int) -> Optional[int]:
+        """Decode as much of a string value as is complete"""
+        buffer = self._buffer
+        end = self._string_end(pos)
+        closed = end is not None
+        if not closed:
+            end = len(buffer)
+            if "\\" in buffer[max(pos, end - _MAX_ESCAPE):]:
+                # The chunk may end inside an escape: decode only up to the last complete one
+                end = _STRING_UNITS.match(buffer, pos).end()
+        if end > pos:
+            self._pieces.append(json.loads(f'"{buffer[pos:end]}"'))
+        if not closed:
+            return end if end > pos else None
+        self._finish("".join(self._pieces))
+        return end + 1
+    
+    def _string_end(self, pos: int) -> Optional[int]:
+        """Index of the quote closing the string body starting at pos; None if it has not arrived yet"""
+        buffer = self._buffer
+        end = buffer.find('"', pos)
+        while end != -1:
+            # A quote after an odd run of backslashes is escaped
+            start = end
+            while start > pos and buffer[start - 1] == "\\":
+                start -= 1
+            if (end - start) % 2 == 0:
+                return end
+            end = buffer.find('"', end + 1)
+        return None
+    
+    def _read_raw(self, pos: int) -> Optional[int]:
+        """Buffer a non-string value up to the comma or brace that ends it"""
+        buffer = self._buffer
+        # Index of the character after a backslash inside a nested string
+        skip = pos if self._escaped else -1
+        for match in _STRUCTURAL.finditer(buffer, pos):
+            char = match.group()
+            if match.start() == skip:
+                continue
+            if self._in_string:
+                if char == "\\":
+                    skip = match.end()
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]" and self._depth:
+                self._depth -= 1
+            elif char in ",}" and not self._depth:
+                self._pieces.append(buffer[pos:match.start()])
+                self._finish(json.loads("".join(self._pieces)))
+                return match.start()
+        self._escaped = skip == len(buffer)
+        self._pieces.append(buffer[pos:])
+        return len(buffer) if len(buffer) > pos else None
+    
+    def _finish(self, value: Any):
+        self.result[self._key] = value
+        self._pieces = []
+        self._state = "next"
+    
+    @staticmethod
+    def _expect(char: str, expected: str):
+        if char != expected:
+            raise ValueError(f"Expected {expected!r} in JSON object, got {char!r}")
@@ -0,0 +1,199 @@
+"""
+Per-endpoint request metrics for the Mezmur API client
+"""
+import asyncio
+import bisect
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def error_class(error: BaseException) -> str:
+    """Name of the root exception class, looking through re-raised wrapper exceptions
+    
+    An exception raised "from None" is its own root.
+    """
+    seen = set()
+    while id(error) not in seen:
+        seen.add(id(error))
+        inner = error.__cause__ or (None if error.__suppress_context__ else error.__context__)
+        if inner is None:
+            break
+        error = inner
+    return type(error).__name__
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts for export plus a window of recent samples for percentiles"""
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+    
+    def observe(self, seconds: float):
+        """Record one latency sample"""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile (0-100) of the recent window, or None before any samples"""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+        return ordered[index]
+    
+    def cumulative(self) -> List[int]:
+        """Bucket counts in Prometheus 'le' form (each bucket includes the ones below it)"""
+        total, out = 0, []
+        for value in self.counts:
+            total += value
+            out.append(total)
+        return out
+
+
+class EndpointMetrics:
+    """Counters and latency for one API endpoint"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.errors: Counter = Counter()
+        self.upstream_requests = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain-dict view of this endpoint's metrics"""
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "upstream_requests": self.upstream_requests,
+            "bytes_received": self.bytes_received,
+            "latency": {
+                "count": self.latency.count,
+                "sum": self.latency.sum,
+                "p50": self.latency.percentile(50),
+                "p90": self.latency.percentile(90),
+                "p99": self.latency.percentile(99),
+            },
+        }
+
+
+class APIMetrics:
+    """Registry of per-endpoint metrics with snapshot and Prometheus text export"""
+    
+    def __init__(self, namespace: str = "mezmur_api"):
+        self.namespace = namespace
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+    
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """Metrics for an endpoint, created on first use"""
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+    
+    def observe(self, endpoint: str, seconds: float, error: Optional[BaseException] = None):
+        """Record one client method call as seen by its caller"""
+        metrics = self.endpoint(endpoint)
+        metrics.requests += 1
+        metrics.latency.observe(seconds)
+        if error is not None:
+            metrics.errors[error_class(error)] += 1
+    
+    def observe_upstream(self, endpoint: str, bytes_received: int):
+        """Record one HTTP request actually sent to the API"""
+        metrics = self.endpoint(endpoint)
+        metrics.upstream_requests += 1
+        metrics.bytes_received += bytes_received
+    
+    def observe_bytes(self, endpoint: str, bytes_received: int):
+        """Record body bytes of a streamed response, counted once it has been read"""
+        self.endpoint(endpoint).bytes_received += bytes_received
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Plain-dict view of every endpoint's metrics"""
+        return {name: metrics.snapshot() for name, metrics in sorted(self.endpoints.items())}
+    
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        ns = self.namespace
+        lines = []
+        
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {ns}_{name} {help_text}")
+            lines.append(f"# TYPE {ns}_{name} {kind}")
+        
+        endpoints = sorted(self.endpoints.items())
+        
+        family("requests_total", "counter", "Client method calls per endpoint")
+        for name, m in endpoints:
+            lines.append(f'{ns}_requests_total{{endpoint="{name}"}} {m.requests}')
+        
+        family("errors_total", "counter", "Failed client method calls per endpoint and error class")
+        for name, m in endpoints:
+            for error, count in sorted(m.errors.items()):
+                lines.append(f'{ns}_errors_total{{endpoint="{name}",error="{error}"}} {count}')
+        
+        family("upstream_requests_total", "counter", "HTTP requests sent to the API per endpoint")
+        for name, m in endpoints:
+            lines.append(f'{ns}_upstream_requests_total{{endpoint="{name}"}} {m.upstream_requests}')
+        
+        family("received_bytes_total", "counter", "Response body bytes received per endpoint")
+        for name, m in endpoints:
+            lines.append(f'{ns}_received_bytes_total{{endpoint="{name}"}} {m.bytes_received}')
+        
+        family("request_duration_seconds", "histogram", "Client method latency per endpoint")
+        for name, m in endpoints:
+            cumulative = m.latency.cumulative()
+            for bound, count in zip(m.latency.buckets, cumulative):
+                lines.append(f'{ns}_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} {count}')
+            lines.append(f'{ns}_request_duration_seconds_bucket{{endpoint="{name}",le="+Inf"}} {cumulative[-1]}')
+            lines.append(f'{ns}_request_duration_seconds_sum{{endpoint="{name}"}} {m.latency.sum}')
+            lines.append(f'{ns}_request_duration_seconds_count{{endpoint="{name}"}} {m.latency.count}')
+        
+        return "\n".join(lines) + "\n"
+
+
+def format_samples(namespace: str, samples: Sequence[Tuple[str, Dict[str, str], float]]) -> str:
+    """Render simple (name, labels, value) samples as untyped Prometheus lines"""
+    lines = []
+    for name, labels, value in samples:
+        label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+        lines.append(f"{namespace}_{name}{{{label_text}}} {value}" if label_text else f"{namespace}_{name} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+async def start_metrics_server(render: Callable[[], str], host: str = "0.0.0.0", port: int = 9100) -> asyncio.AbstractServer:
+    """Serve render() as text/plain on GET /metrics (minimal HTTP/1.0 responder)"""
+    
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request_line.split(b" ")[1] if request_line.count(b" ") >= 2 else b""
+            if path.split(b"?")[0] == b"/metrics":
+                body, status = render().encode(), b"200 OK"
+            else:
+                body, status = b"Not found\n", b"404 Not Found"
+            writer.write(
+                b"HTTP/1.0 " + status + b"\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    return await asyncio.start_server(handle, host=host, port=port)
@@ -0,0 +1,151 @@
+"""
+In-process prefix search over catalog titles, matching at the start of every path segment
+"""
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from utils.api_client import PaginatedResponse, SearchResult
+from utils.cache import normalize_query
+
+# Sorts after any character a normalized key can contain
+_KEY_END = "\U0010ffff"
+
+
+def segment_prefix_match(key: str, query_key: str) -> bool:
+    """Whether a normalized title key has a path segment starting with a normalized query"""
+    return key.startswith(query_key) or f"/{query_key}" in key
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _token_position(continue_token: Any) -> Optional[int]:
+    """Array position encoded in one of our continue tokens; None for no token or a foreign one"""
+    if not continue_token:
+        return None
+    try:
+        return int(continue_token)
+    except (TypeError, ValueError):
+        # E.g. an API token passed back by mistake: resume by page number instead of failing
+        return None
+
+
+class PrefixIndex:
+    """Sorted array of normalized title suffixes, one per path segment start
+    
+    "Artist/Album/Song" is indexed under "artist/album/song", "album/song" and
+    "song", so a query matches from the beginning of any segment. A title is
+    returned once, at the first of its matching suffixes in sorted order.
+    Titles whose suffixes share a prefix are recorded at build time, so
+    totals and page offsets do not need a scan of the match range.
+    """
+    
+    def __init__(self, titles: Iterable[Tuple[str, int]], key_func: Callable[[str], str] = normalize_query):
+        self.key_func = key_func
+        self.titles: List[str] = []
+        self.pageids: List[int] = []
+        
+        suffixes: List[Tuple[str, int]] = []
+        for title, pageid in titles:
+            index = len(self.titles)
+            self.titles.append(title)
+            self.pageids.append(pageid)
+            key = key_func(title)
+            start = 0
+            while True:
+                suffixes.append((key[start:], index))
+                slash = key.find("/", start)
+                if slash < 0:
+                    break
+                start = slash + 1
+        suffixes.sort()
+        
+        self.keys: List[str] = [key for key, _ in suffixes]
+        self.entries: List[int] = [index for _, index in suffixes]
+        
+        # Positions whose title already appeared earlier in key order, with the length of
+        # the longest prefix shared with that earlier suffix: for queries no longer than
+        # that, the earlier suffix matches too and this position is a duplicate
+        self._dup_positions: List[int] = []
+        self._dup_lengths: List[int] = []
+        seen = {}
+        for position, (key, index) in enumerate(suffixes):
+            earlier = seen.get(index)
+            if earlier is None:
+                seen[index] = [key]
+                continue
+            shared = max(_common_prefix_length(key, other) for other in earlier)
+            if shared:
+                self._dup_positions.append(position)
+                self._dup_lengths.append(shared)
+            earlier.append(key)
+    
+    def __len__(self) -> int:
+        return len(self.titles)
+    
+    def search_prefix(self, query: str, page: int = 1, limit: int = 10,
+                      continue_token: Any = None) -> PaginatedResponse:
+        """Same contract as MezmurAPIClient.search_prefix; next_token is an opaque position
+        
+        An empty query matches nothing, and a continue token that is not one of
+        ours is ignored in favour of page.
+        """
+        q = self.key_func(query)
+        lo = bisect_left(self.keys, q) if q else 0
+        hi = bisect_left(self.keys, q + _KEY_END, lo) if q else 0
+        duplicates = self._duplicates(lo, hi, len(q))
+        total = hi - lo - len(duplicates)
+        
+        start = _token_position(continue_token)
+        if start is not None:
+            start = max(lo, min(hi, start))
+            offset = start - lo - sum(1 for position in duplicates if position < start)
+        else:
+            offset = (page - 1) * limit
+            start = self._position_of(lo, hi, offset, duplicates)
+        
+        data = []
+        position = start
+        skip = set(duplicates)
+        while position < hi and len(data) < limit:
+            if position not in skip:
+                index = self.entries[position]
+                data.append(SearchResult(self.titles[index], self.pageids[index]))
+            position += 1
+        while position < hi and position in skip:
+            position += 1
+        
+        has_next = position < hi
+        return PaginatedResponse(
+            data=data,
+            total=total,
+            page=page,
+            limit=limit,
+            has_next=has_next,
+            has_prev=offset > 0,
+            next_token=str(position) if has_next else None
+        )
+    
+    def _duplicates(self, lo: int, hi: int, query_length: int) -> List[int]:
+        """Positions in [lo, hi) whose title is already returned at an earlier position"""
+        first = bisect_left(self._dup_positions, lo)
+        last = bisect_left(self._dup_positions, hi, first)
+        return [
+            self._dup_positions[i] for i in range(first, last)
+            if self._dup_lengths[i] >= query_length
+        ]
+    
+    @staticmethod
+    def _position_of(lo: int, hi: int, offset: int, duplicates: List[int]) -> int:
+        """Array position of the offset-th (0-based) unique match"""
+        position = lo + offset
+        for duplicate in duplicates:
+            if duplicate >= position:
+                break
+            position += 1
+        return min(position, hi)
@@ -0,0 +1,237 @@
+"""
+Retry, circuit breaker, hedging and time budget helpers for calls to the Mezmur API
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from utils.metrics import LatencyHistogram
+
+
+# Statuses worth retrying: the gateway or the API is briefly unavailable
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+    
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Mezmur API endpoint '{endpoint}' is unavailable, retrying in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when an API call runs out of its time budget (pool wait, connect, read and retries together)"""
+    
+    def __init__(self, endpoint: str, budget: float):
+        super().__init__(f"Mezmur API call to '{endpoint}' did not finish within its {budget:g}s budget")
+        self.endpoint = endpoint
+        self.budget = budget
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Time allowed for API calls: seconds per call, and no call past expires_at (time.monotonic) if set"""
+    seconds: float
+    expires_at: Optional[float] = None
+    
+    def deadline(self, now: float) -> float:
+        """Deadline of a call starting now"""
+        deadline = now + self.seconds
+        return deadline if self.expires_at is None else min(deadline, self.expires_at)
+
+
+_budget: ContextVar[Optional[Budget]] = ContextVar("api_budget", default=None)
+
+
+def current_budget() -> Optional[Budget]:
+    """Budget set by the innermost call_budget block, if any"""
+    return _budget.get()
+
+
+@contextmanager
+def call_budget(seconds: Optional[float], per_call: bool = False) -> Iterator[Optional[Budget]]:
+    """Bound the API calls made inside the block, including tasks it starts
+    
+    By default the calls share one deadline, seconds from now; with per_call
+    each call gets seconds of its own. An enclosing budget still applies, so
+    nesting can only shorten it. None leaves the current budget as it is.
+    """
+    outer = _budget.get()
+    if seconds is None:
+        yield outer
+        return
+    
+    expires_at = None if per_call else time.monotonic() + seconds
+    if outer is not None:
+        seconds = min(seconds, outer.seconds)
+        if outer.expires_at is not None:
+            expires_at = outer.expires_at if expires_at is None else min(expires_at, outer.expires_at)
+    budget = Budget(seconds, expires_at)
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+@dataclass
+class RetryPolicy:
+    """Retry settings for idempotent GET requests (full-jitter exponential backoff)"""
+    attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+    
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+@dataclass
+class HedgePolicy:
+    """When to send a duplicate of a slow idempotent GET, and how often at most
+    
+    A request still unanswered after the given percentile of recent latency
+    is hedged. Each request earns budget hedges (0.1: one hedge per ten
+    requests on average), and at most max_burst can be saved up.
+    """
+    percentile: float = 95.0
+    budget: float = 0.1
+    max_burst: float = 10.0
+    min_delay: float = 0.01
+    min_samples: int = 20
+
+
+class Hedger:
+    """Per-endpoint hedging state: recent latency, the hedge budget and win/loss counters"""
+    
+    def __init__(self, policy: HedgePolicy, window: int = 256):
+        self.policy = policy
+        self.latency = LatencyHistogram(window=window)
+        self.tokens = 0.0
+        
+        # Counters
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self.losses = 0
+        self.throttled = 0
+    
+    def start(self) -> Optional[float]:
+        """Count a request and return how long to wait before hedging it (None: too few samples yet)"""
+        self.requests += 1
+        self.tokens = min(self.policy.max_burst, self.tokens + self.policy.budget)
+        if self.latency.count < self.policy.min_samples:
+            return None
+        return max(self.policy.min_delay, self.latency.percentile(self.policy.percentile))
+    
+    def allow_hedge(self) -> bool:
+        """Spend one hedge from the budget, if there is one left"""
+        if self.tokens < 1.0:
+            self.throttled += 1
+            return False
+        self.tokens -= 1.0
+        self.hedges += 1
+        return True
+    
+    def observe(self, seconds: float):
+        """Record how long the first attempt of a request took (or had taken when a hedge beat it)"""
+        self.latency.observe(seconds)
+    
+    def record(self, hedge_won: bool):
+        """Record whether the hedge or the first attempt answered first"""
+        if hedge_won:
+            self.wins += 1
+        else:
+            self.losses += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hedging counters and the current hedge delay"""
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "losses": self.losses,
+            "throttled": self.throttled,
+            "delay": self.latency.percentile(self.policy.percentile),
+        }
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker: opens after repeated failures, then lets one probe through periodically"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        
+        # Counters
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+    
+    def allow_request(self) -> bool:
+        """Whether a call may go ahead; in half-open state only one probe is allowed at a time"""
+        if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        
+        self.rejected += 1
+        return False
+    
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed"""
+        return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+    
+    def record_success(self):
+        """A call succeeded: close the breaker"""
+        self.successes += 1
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self.state = self.CLOSED
+    
+    def record_failure(self):
+        """A call failed after its retries: open the breaker once failures pile up"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+    
+    def release(self):
+        """A call ended without an outcome (e.g. it was cancelled): free the probe slot"""
+        self._probe_in_flight = False
+    
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and counters"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
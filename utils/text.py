@@ -0,0 +1,76 @@
+"""
+Text normalization shared by the local search indexes
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List
+
+
+# Apostrophe-like marks that transliterations of Ge'ez use inconsistently (Ge'ez, Ge`ez, Geʿez)
+# are kept inside words by the tokenizer and dropped when the word is folded
+_APOSTROPHES = str.maketrans("", "", "'`’ʼʾʿ")
+_WORD = re.compile(r"\w+(?:['`’ʼʾʿ]\w+)*")
+_REPEATED_LETTER = re.compile(r"([a-z])\1+")
+
+
+def _geez_variants() -> Dict[int, int]:
+    """Map each homophone letter series onto the one most people type
+    
+    ሐ and ኀ are spelled ሀ, ሠ is spelled ሰ, ዐ is spelled አ and ፀ is spelled ጸ,
+    order for vowel order; the fourth order of the h and glottal series
+    (ሃ, ኣ) sounds like the first and is folded into it as well.
+    """
+    series = [
+        (0x1210, 0x1200, 8),  # ሐ ... ሗ -> ሀ ... ሇ
+        (0x1280, 0x1200, 7),  # ኀ ... ኆ -> ሀ ... ሆ
+        (0x1220, 0x1230, 8),  # ሠ ... ሧ -> ሰ ... ሷ
+        (0x12D0, 0x12A0, 7),  # ዐ ... ዖ -> አ ... ኦ
+        (0x1340, 0x1338, 8),  # ፀ ... ፇ -> ጸ ... ጿ
+    ]
+    table = {variant + order: canonical + order for variant, canonical, orders in series for order in range(orders)}
+    table[0x128B] = 0x1207  # ኋ -> ሇ
+    fourth = {0x1203: 0x1200, 0x12A3: 0x12A0}  # ሃ -> ሀ, ኣ -> አ
+    table = {variant: fourth.get(canonical, canonical) for variant, canonical in table.items()}
+    table.update(fourth)
+    return table
+
+
+_GEEZ_VARIANTS = _geez_variants()
+
+# str.translate looks each character up in the table; indexing a string is cheaper than a dict
+# lookup, and characters past its end are left alone
+_GEEZ_FOLD = "".join(chr(_GEEZ_VARIANTS.get(code, code)) for code in range(max(_GEEZ_VARIANTS) + 1))
+
+
+def normalize_geez(text: str) -> str:
+    """Spell interchangeable Ge'ez letters one way, so every spelling of a word compares equal"""
+    if text.isascii():
+        return text
+    return text.translate(_GEEZ_FOLD)
+
+
+def is_geez(word: str) -> bool:
+    """Word starts with a character from the Ethiopic, Ethiopic Supplement or Ethiopic Extended blocks"""
+    first = word[0]
+    return "\u1200" <= first <= "\u139f" or "\u2d80" <= first <= "\u2ddf"
+
+
+@lru_cache(maxsize=65536)
+def _fold_word(word: str) -> str:
+    """Ge'ez words are spelled one way; Latin ones lose diacritics and doubled letters
+    
+    Transliterations spell long vowels and geminated consonants either way
+    ("tesfaa", "yelelleh"), so doubled letters are collapsed.
+    """
+    if is_geez(word):
+        return word.translate(_GEEZ_FOLD)
+    word = word.translate(_APOSTROPHES)
+    if not word.isascii():
+        word = "".join(ch for ch in unicodedata.normalize("NFKD", word) if not unicodedata.combining(ch))
+    return _REPEATED_LETTER.sub(r"\1", word)
+
+
+def tokenize(text: str) -> List[str]:
+    """Search terms of a text, in order"""
+    return list(map(_fold_word, _WORD.findall(text.casefold())))
@@ -0,0 +1,313 @@
+"""
+Local full-text search over catalog titles and cached lyrics
+"""
+import asyncio
+import logging
+import math
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils.api_client import MezmurAPIClient, PaginatedResponse, SearchResult, lyrics_text
+from utils.cache import CacheEntry, normalize_query
+from utils.catalog import CatalogMirror, CatalogSnapshot
+from utils.text import is_geez, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Amharic proclitics (inde-, sile-, ye-, be-, le-, ke-): words carrying one are also indexed bare
+GEEZ_PREFIXES = ("እንደ", "ስለ", "የ", "በ", "ለ", "ከ")
+
+# Title words count this many times as often as lyrics words
+TITLE_WEIGHT = 3
+
+# The last query word also matches words it is a prefix of, up to this many, scored lower
+MAX_PREFIX_EXPANSIONS = 50
+PREFIX_MATCH_WEIGHT = 0.8
+
+SNIPPET_LENGTH = 120
+
+# Sorts after any character a term can contain
+_TERM_END = "\U0010ffff"
+
+
+@lru_cache(maxsize=65536)
+def _stem(term: str) -> Optional[str]:
+    """A Ge'ez word without its proclitic, or None"""
+    if is_geez(term):
+        for prefix in GEEZ_PREFIXES:
+            if term.startswith(prefix) and len(term) - len(prefix) >= 2:
+                return term[len(prefix):]
+    return None
+
+
+def index_terms(text: str) -> Iterator[str]:
+    """Terms a document is indexed under: its tokens, plus Ge'ez words stripped of a proclitic"""
+    for term in tokenize(text):
+        yield term
+        stem = _stem(term)
+        if stem:
+            yield stem
+
+
+def term_counts(text: str) -> Counter:
+    """How often each of index_terms(text) occurs"""
+    counts = Counter(tokenize(text))
+    for term, count in list(counts.items()):
+        stem = _stem(term)
+        if stem:
+            counts[stem] += count
+    return counts
+
+
+class TextIndex:
+    """Immutable inverted index over (title, pageid, text) documents, ranked with BM25
+    
+    Postings are stored per term as one flat array of (document, term frequency)
+    pairs. Title words are weighted TITLE_WEIGHT times. Documents matching
+    only some query words are kept but ranked below those matching all of them.
+    """
+    
+    def __init__(self, documents: Iterable[Tuple[str, int, Optional[str]]], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.titles: List[str] = []
+        self.pageids: List[int] = []
+        self.texts: List[Optional[str]] = []
+        self.lengths = array("I")
+        
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for doc, (title, pageid, text) in enumerate(documents):
+            self.titles.append(title)
+            self.pageids.append(pageid)
+            self.texts.append(text)
+            
+            counts = term_counts(text) if text else Counter()
+            for term, count in term_counts(title).items():
+                counts[term] += count * TITLE_WEIGHT
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings[term].extend((doc, tf))
+        
+        self.postings: Dict[str, array] = {term: array("I", entries) for term, entries in postings.items()}
+        self.terms: List[str] = sorted(postings)
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+    
+    def __len__(self) -> int:
+        return len(self.titles)
+    
+    def search(self, query: str, page: int = 1, limit: int = 10, continue_token: Any = None) -> PaginatedResponse:
+        """Same contract as MezmurAPIClient.search_full; results carry a lyrics snippet when one matches"""
+        slots = self._query_slots(query)
+        ranked = self._rank(slots)
+        offset = int(continue_token) if continue_token else (page - 1) * limit
+        terms = {term for slot in slots for term, _ in slot}
+        
+        data = [
+            SearchResult(self.titles[doc], self.pageids[doc], snippet=self.snippet(doc, terms))
+            for doc in ranked[offset:offset + limit]
+        ]
+        has_next = offset + limit < len(ranked)
+        return PaginatedResponse(
+            data=data,
+            total=len(ranked),
+            page=page,
+            limit=limit,
+            has_next=has_next,
+            has_prev=offset > 0,
+            next_token=str(offset + limit) if has_next else None
+        )
+    
+    def snippet(self, doc: int, terms: Set[str]) -> Optional[str]:
+        """First lyrics line of a document containing one of terms, shortened to SNIPPET_LENGTH"""
+        text = self.texts[doc]
+        if not text:
+            return None
+        for line in text.splitlines():
+            if not terms.isdisjoint(index_terms(line)):
+                line = " ".join(line.split())
+                return line if len(line) <= SNIPPET_LENGTH else line[:SNIPPET_LENGTH - 1] + "…"
+        return None
+    
+    def _query_slots(self, query: str) -> List[List[Tuple[str, float]]]:
+        """(term, weight) alternatives for each query word; the last word is prefix-expanded"""
+        words = list(dict.fromkeys(tokenize(query)))
+        slots = [[(word, 1.0)] for word in words]
+        if words:
+            last = words[-1]
+            start = bisect_left(self.terms, last)
+            end = bisect_left(self.terms, last + _TERM_END, start)
+            slots[-1].extend(
+                (term, PREFIX_MATCH_WEIGHT)
+                for term in self.terms[start:min(end, start + MAX_PREFIX_EXPANSIONS + 1)]
+                if term != last
+            )
+        return slots
+    
+    def _rank(self, slots: List[List[Tuple[str, float]]]) -> List[int]:
+        """Matching documents, best first"""
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        total = len(self.titles)
+        k1, b, average = self.k1, self.b, self.average_length or 1.0
+        lengths = self.lengths
+        
+        for slot in slots:
+            best: Dict[int, float] = {}
+            for term, weight in slot:
+                entries = self.postings.get(term)
+                if entries is None:
+                    continue
+                df = len(entries) // 2
+                idf = weight * math.log(1.0 + (total - df + 0.5) / (df + 0.5))
+                for i in range(0, len(entries), 2):
+                    doc, tf = entries[i], entries[i + 1]
+                    score = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc] / average))
+                    if score > best.get(doc, 0.0):
+                        best[doc] = score
+            for doc, score in best.items():
+                scores[doc] = scores.get(doc, 0.0) + score
+                matched[doc] = matched.get(doc, 0) + 1
+        
+        # Scale by the share of query words matched so partial matches rank last
+        return sorted(scores, key=lambda doc: (-scores[doc] * matched[doc] / len(slots), doc))
+
+
+class SearchIndexer:
+    """Keeps a TextIndex over the catalog mirror's titles and the client's cached lyrics
+    
+    Each refresh picks up lyrics stored in the memory cache since the last
+    one (and, the first time, everything persisted in the disk tier),
+    extracting their text in a worker thread. Lyrics stay indexed after they
+    leave the cache. The index is rebuilt in a worker thread only when the
+    catalog snapshot or the collected lyrics changed, then swapped in with a
+    single assignment.
+    """
+    
+    def __init__(self, api_client: MezmurAPIClient, catalog: Optional[CatalogMirror] = None):
+        self.api_client = api_client
+        self.catalog = catalog
+        
+        self.index: Optional[TextIndex] = None
+        self._lyrics: Dict[str, Tuple[str, str]] = {}
+        # stored_at of each memory cache entry already extracted, keyed by (endpoint, title)
+        self._extracted: Dict[Tuple[str, str], float] = {}
+        self._disk_loaded = False
+        self._indexed_snapshot: Optional[CatalogSnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+        
+        # Counters
+        self.builds = 0
+        self.skipped = 0
+        self.refresh_failures = 0
+        self.last_build_seconds = 0.0
+    
+    def search(self, query: str, page: int = 1, limit: int = 10,
+               continue_token: Any = None) -> Optional[PaginatedResponse]:
+        """Local search_full, or None before the first build"""
+        index = self.index
+        if index is None:
+            return None
+        return index.search(query, page=page, limit=limit, continue_token=continue_token)
+    
+    async def refresh(self) -> Optional[TextIndex]:
+        """Collect new lyrics and rebuild the index if anything changed"""
+        async with self._refresh_lock:
+            changed = self.index is None
+            if not self._disk_loaded:
+                changed |= self._merge(await asyncio.to_thread(self.api_client.stored_lyrics))
+                self._disk_loaded = True
+            # Extracting text from rich lyrics is slow for big caches: only look at entries stored
+            # since the last refresh, and do it in a worker thread
+            entries = self.api_client.cached_lyrics_entries()
+            fresh = {key: entry for key, entry in entries.items() if self._extracted.get(key) != entry.stored_at}
+            self._extracted = {key: stored_at for key, stored_at in self._extracted.items() if key in entries}
+            if fresh:
+                changed |= await asyncio.to_thread(self._merge_entries, fresh)
+            snapshot = self.catalog.snapshot if self.catalog is not None else None
+            if not changed and snapshot is self._indexed_snapshot:
+                self.skipped += 1
+                return self.index
+            
+            started = time.perf_counter()
+            lyrics = dict(self._lyrics)
+            index = await asyncio.to_thread(lambda: TextIndex(self._documents(snapshot, lyrics)))
+            self.index = index
+            self._indexed_snapshot = snapshot
+            self.builds += 1
+            self.last_build_seconds = time.perf_counter() - started
+            logger.info(
+                f"Search index: {len(index)} documents, {len(lyrics)} with lyrics, "
+                f"{len(index.terms)} terms in {self.last_build_seconds:.1f}s"
+            )
+            return index
+    
+    async def refresh_job(self, context: Any = None) -> None:
+        """JobQueue callback: refresh, logging instead of raising on failure"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning(f"Search index refresh failed, keeping the previous index: {e}")
+    
+    def schedule(self, job_queue: Any, interval: float, first: float = 0.0) -> Any:
+        """Run refresh_job every interval seconds on a PTB JobQueue"""
+        return job_queue.run_repeating(self.refresh_job, interval=interval, first=first, name="search_index")
+    
+    async def run_periodically(self, interval: float) -> None:
+        """Plain asyncio loop equivalent of schedule(), for when no JobQueue is available"""
+        while True:
+            await self.refresh_job()
+            await asyncio.sleep(interval)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Index size and refresh counters"""
+        index = self.index
+        return {
+            "documents": len(index) if index is not None else 0,
+            "terms": len(index.terms) if index is not None else 0,
+            "lyrics": len(self._lyrics),
+            "builds": self.builds,
+            "skipped": self.skipped,
+            "refresh_failures": self.refresh_failures,
+            "last_build_seconds": self.last_build_seconds,
+        }
+    
+    def _merge_entries(self, entries: Dict[Tuple[str, str], CacheEntry]) -> bool:
+        """Extract and add the lyrics of memory cache entries, remembering which versions were seen"""
+        texts = {}
+        for (endpoint, title), entry in entries.items():
+            text = lyrics_text(entry.value)
+            if text:
+                texts[title] = text
+            self._extracted[(endpoint, title)] = entry.stored_at
+        return self._merge(texts)
+    
+    def _merge(self, texts: Dict[str, str]) -> bool:
+        """Add collected lyrics; returns True if any were new or changed"""
+        changed = False
+        for title, text in texts.items():
+            key = normalize_query(title)
+            current = self._lyrics.get(key)
+            if current is None or current[1] != text:
+                self._lyrics[key] = (title, text)
+                changed = True
+        return changed
+    
+    @staticmethod
+    def _documents(snapshot: Optional[CatalogSnapshot],
+                   lyrics: Dict[str, Tuple[str, str]]) -> Iterator[Tuple[str, int, Optional[str]]]:
+        """Every mirrored title with its lyrics, then lyrics of songs the mirror does not have yet"""
+        indexed = set()
+        if snapshot is not None:
+            for pageid, node in snapshot.nodes.items():
+                key = normalize_query(node.item.title)
+                entry = lyrics.get(key)
+                indexed.add(key)
+                yield node.item.title, pageid, entry[1] if entry else None
+        for key, (title, text) in lyrics.items():
+            if key not in indexed:
+                yield title, 0, text
@@ -0,0 +1,91 @@
+"""
+Sampled, level-gated structured tracing for request hot paths
+"""
+import itertools
+import logging
+import os
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# Fraction of traces that are emitted; 0 disables tracing entirely
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+
+
+class TraceMessage:
+    """A trace event used as a log message; fields are only rendered when a handler formats it"""
+    
+    __slots__ = ("event", "_fields", "_resolved")
+    
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self._fields = fields
+        self._resolved: Optional[Dict[str, Any]] = None
+    
+    def fields(self) -> Dict[str, Any]:
+        """Field values, calling any zero-argument callables (lazy fields) once"""
+        if self._resolved is None:
+            self._resolved = {key: value() if callable(value) else value for key, value in self._fields.items()}
+        return self._resolved
+    
+    def __str__(self) -> str:
+        return " ".join([self.event] + [f"{key}={value!r}" for key, value in self.fields().items()])
+
+
+class Span:
+    """One sampled operation: its events share a trace id and carry the elapsed time"""
+    
+    __slots__ = ("tracer", "name", "trace_id", "started")
+    
+    def __init__(self, tracer: "Tracer", name: str, trace_id: int):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+    
+    def event(self, event: str, **fields: Any):
+        """Emit an event belonging to this span"""
+        fields["trace_id"] = self.trace_id
+        fields["elapsed_ms"] = round((time.perf_counter() - self.started) * 1000, 3)
+        self.tracer._emit(f"{self.name}.{event}", fields)
+
+
+class Tracer:
+    """Emits trace events through a logger, gated by its level and sampled per trace
+    
+    Field values may be zero-argument callables, which are evaluated only for
+    events that are actually written. With a sample rate of 0, or the logger
+    disabled for the trace level, every call returns after a single check.
+    """
+    
+    def __init__(self, name: str, sample_rate: Optional[float] = None, level: int = logging.DEBUG,
+                 rng: Callable[[], float] = random.random):
+        self.logger = logging.getLogger(name)
+        self.sample_rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.level = level
+        self.rng = rng
+        self._ids = itertools.count(1)
+    
+    def sampled(self) -> bool:
+        """Decide whether the next trace is written"""
+        if self.sample_rate <= 0 or not self.logger.isEnabledFor(self.level):
+            return False
+        return self.sample_rate >= 1 or self.rng() < self.sample_rate
+    
+    def event(self, event: str, **fields: Any):
+        """Emit a standalone event, subject to sampling"""
+        if self.sampled():
+            self._emit(event, fields)
+    
+    def span(self, name: str, **fields: Any) -> Optional[Span]:
+        """Start a sampled span and emit its start event; None when this trace is not sampled"""
+        if not self.sampled():
+            return None
+        span = Span(self, name, next(self._ids))
+        span.event("start", **fields)
+        return span
+    
+    def _emit(self, event: str, fields: Dict[str, Any]):
+        message = TraceMessage(event, fields)
+        self.logger.log(self.level, message, extra={"trace": message}, stacklevel=3)